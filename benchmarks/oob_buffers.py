@@ -0,0 +1,117 @@
+"""Benchmark in-band pickling vs. pickle protocol 5 out-of-band buffers for RunModule arguments.
+
+Simulates the RunModule wire path for a single numpy array argument without a cluster: the client builds the
+``Message`` and serializes it to wire bytes, then the server parses the wire bytes and the arguments are
+unpickled (which happens in the Ray worker on a real cluster).
+Peak traced memory for each side is reported as a multiple of the payload size, i.e. roughly the number of
+full copies of the payload held at once. Protobuf's internal arena copies aren't traced. Each case runs in a
+fresh subprocess. Note that gRPC messages are capped at ``UnaryClient.MAX_MESSAGE_LENGTH`` (1 GB), and
+protobuf can't serialize messages over 2 GB at all, so larger arguments fail in both modes.
+
+Usage:
+    python benchmarks/oob_buffers.py --sizes-mb 100 500 1000 2000
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+import tracemalloc
+
+MODES = ["inband", "oob"]
+
+
+def run_single(mode: str, size_mb: int):
+    import numpy as np
+    import ray.cloudpickle as pickle
+
+    import runhouse.servers.grpc.unary_pb2 as pb2
+    from runhouse.servers.grpc.serialization import (
+        deserialize_with_buffers,
+        serialize_with_buffers,
+    )
+
+    arr = np.ones(size_mb * 1024 * 1024, dtype=np.uint8)
+    args = (arr,)
+    tracemalloc.start()
+
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    if mode == "oob":
+        data, buffers = serialize_with_buffers(args)
+    else:
+        data, buffers = pickle.dumps(args), []
+    message = pb2.Message(
+        module_name="module",
+        func_name="fn",
+        fn_type="call",
+        args=[pb2.SerializedArgs(data=data, buffers=buffers)],
+    )
+    wire = message.SerializeToString()
+    client_done = time.perf_counter()
+    del data, buffers, message
+    client_peak = tracemalloc.get_traced_memory()[1] - len(wire)
+
+    tracemalloc.reset_peak()
+    server_start = time.perf_counter()
+    request = pb2.Message.FromString(wire)
+    # Unpickled inside the Ray worker on a real cluster
+    received = deserialize_with_buffers(request.args[0].data, request.args[0].buffers)
+    end = time.perf_counter()
+    server_peak = tracemalloc.get_traced_memory()[1] - len(wire)
+
+    assert received[0].nbytes == arr.nbytes
+    return {
+        "mode": mode,
+        "size_mb": size_mb,
+        "client_s": round(client_done - start, 3),
+        "server_s": round(end - server_start, 3),
+        "client_copies": round(client_peak / arr.nbytes, 2),
+        "server_copies": round(server_peak / arr.nbytes, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes-mb", nargs="+", type=int, default=[100, 500, 1000, 2000]
+    )
+    parser.add_argument(
+        "--single", nargs=2, metavar=("MODE", "SIZE_MB"), help=argparse.SUPPRESS
+    )
+    args = parser.parse_args()
+
+    if args.single:
+        mode, size_mb = args.single
+        print(json.dumps(run_single(mode, int(size_mb))))
+        return
+
+    print(
+        f"{'size (MB)':>10} {'mode':>7} {'client (s)':>11} {'server (s)':>11} "
+        f"{'client copies':>14} {'server copies':>14}"
+    )
+    for size_mb in args.sizes_mb:
+        for mode in MODES:
+            proc = subprocess.run(
+                [sys.executable, __file__, "--single", mode, str(size_mb)],
+                capture_output=True,
+                text=True,
+            )
+            if proc.returncode != 0:
+                # e.g. protobuf refuses to serialize messages over 2 GB, or the process ran out of memory
+                error = (
+                    proc.stderr.strip().splitlines()[-1]
+                    if proc.stderr.strip()
+                    else f"exited with code {proc.returncode}"
+                )
+                print(f"{size_mb:>10} {mode:>7}   failed: {error}")
+                continue
+            r = json.loads(proc.stdout.strip().splitlines()[-1])
+            print(
+                f"{r['size_mb']:>10} {r['mode']:>7} {r['client_s']:>11} {r['server_s']:>11} "
+                f"{r['client_copies']:>14} {r['server_copies']:>14}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 from runhouse.rns.top_level_rns_fns import (
+    as_completed,
     current_folder,
     exists,
     get_pinned_object,
@@ -9,6 +10,7 @@ from runhouse.rns.top_level_rns_fns import (
     resources,
     set_folder,
     unset_folder,
+    wait,
 )
 
 # Note these are global variables that are instantiated within rh_config.py:
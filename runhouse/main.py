@@ -10,6 +10,8 @@ from runhouse import cluster, configs
 from runhouse.rns import (  # Need to rename it because it conflicts with the login command
     login as login_module,
 )
+from runhouse.servers import tunnel_daemon
+from runhouse.servers.grpc.unary_client import print_log_chunk
 
 # create an explicit Typer application
 app = typer.Typer(add_completion=False)
@@ -104,12 +106,17 @@ def logs(
     cluster_name: str,
     run_key: str,
     print_results: Optional[bool] = typer.Option(False, help="Print results"),
+    follow: bool = typer.Option(
+        True, help="Keep streaming the logs until the run finishes"
+    ),
 ):
     """Get logs from a run on a cluster."""
     c = cluster(name=cluster_name)
-    res = c.get(run_key, stream_logs=True)
+    # Reconnects and resumes from where it left off if the connection drops
+    for chunk in c.stream_logs(run_key, follow=follow):
+        print_log_chunk(chunk)
     if print_results:
-        console.print(res)
+        console.print(c.get(run_key))
 
 
 def load_cluster(cluster_name: str):
@@ -130,6 +137,26 @@ def restart_grpc(
     c.restart_grpc_server(resync_rh=resync_rh, restart_ray=restart_ray)
 
 
+@app.command()
+def tunnels(
+    stop: bool = typer.Option(False, help="Close the tunnels and stop the daemon"),
+):
+    """Show the SSH tunnels held by the tunnel daemon (enabled with the use_tunnel_daemon config)."""
+    try:
+        if stop:
+            tunnel_daemon.daemon_request("shutdown")
+            console.print("Stopped the tunnel daemon")
+            return
+        status = tunnel_daemon.daemon_request("status")
+    except (ConnectionError, FileNotFoundError):
+        console.print("Tunnel daemon is not running")
+        return
+    console.print(f"Tunnel daemon running with pid {status['pid']}")
+    for socket_path, tunnel in status["tunnels"].items():
+        state_str = "active" if tunnel["active"] else "down"
+        console.print(f"{socket_path}: {state_str}, idle for {tunnel['idle_secs']}s")
+
+
 @app.callback()
 def main(verbose: bool = False):
     """
@@ -6,6 +6,8 @@ import logging.config
 from runhouse.rns.defaults import Defaults
 from runhouse.rns.obj_store import ObjStore
 from runhouse.rns.rns_client import RNSClient
+from runhouse.rns.run_result_cache import RunResultCache
+from runhouse.servers.grpc.connections import ConnectionManager
 
 # Configure the logger once
 # TODO commenting out for now because this duplicates the logging config in the root logger
@@ -15,9 +17,13 @@ logger = logging.getLogger(__name__)
 
 configs = Defaults()
 
-open_grpc_tunnels = {}
+# Connections to clusters' Runhouse servers, shared by all the Cluster objects in this process
+connection_manager = ConnectionManager()
 
 rns_client = RNSClient(configs=configs)
 
+# Results of finished runs already fetched from clusters, so they aren't downloaded again
+result_cache = RunResultCache(configs=configs)
+
 # To allow pinning objects to memory inside a function, e.g. to save time sending to cuda over and over
 obj_store = ObjStore()
@@ -0,0 +1,102 @@
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class CallBatcher(object):
+    """
+    Collects the calls made to a Function (from any number of threads or async tasks) over a short window, and
+    sends them to the cluster together as one batch, where they're run as a few Ray tasks rather than one each.
+
+    The window starts with the first call after a batch is sent, and the batch is sent as soon as the window
+    closes or it reaches ``max_batch`` calls. Each call gets a future which resolves to its own result or
+    exception.
+    """
+
+    # Full batches are sent from a pool of this many threads, so a burst of calls queues up behind the batches in
+    # flight rather than starting a thread per batch
+    MAX_CONCURRENT_BATCHES = 4
+
+    def __init__(
+        self,
+        send_batch: Callable[[List[Tuple[tuple, Dict]]], List[Tuple[Any, Any, Any]]],
+        window_ms: float,
+        max_batch: int,
+    ):
+        """
+        Args:
+            send_batch: Runs a list of ``(args, kwargs)`` calls, returning a ``(result, exception, traceback)``
+                outcome for each.
+            window_ms: How long to wait for more calls before sending a batch.
+            max_batch: The most calls to send in one batch.
+        """
+        self._send_batch = send_batch
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        self._pending: List[Tuple[tuple, Dict, Future]] = []
+        self._timer = None
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.MAX_CONCURRENT_BATCHES, thread_name_prefix="rh-batch"
+        )
+
+    def submit(self, args, kwargs) -> Future:
+        future = Future()
+        with self._lock:
+            self._pending.append((args, kwargs, future))
+            if len(self._pending) >= self.max_batch:
+                batch = self._take()
+            else:
+                batch = None
+                if self._timer is None:
+                    self._timer = threading.Timer(self.window, self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+
+        if batch:
+            # Sent from the pool, so submitting never blocks (e.g. an event loop)
+            self._executor.submit(self._send, batch)
+        return future
+
+    def flush(self):
+        """Send the pending calls now, rather than waiting for the window to close."""
+        with self._lock:
+            batch = self._take()
+        if batch:
+            self._send(batch)
+
+    def _take(self):
+        batch, self._pending = self._pending, []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch
+
+    def _send(self, batch):
+        logger.info(f"Sending batch of {len(batch)} calls")
+        try:
+            outcomes = self._send_batch([(args, kwargs) for args, kwargs, _ in batch])
+        except Exception as e:
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+
+        if len(outcomes) != len(batch):
+            # Never leave a caller waiting on a future nothing will resolve
+            error = RuntimeError(
+                f"Got {len(outcomes)} outcomes back for a batch of {len(batch)} calls"
+            )
+            logger.error(str(error))
+            for _, _, future in batch[len(outcomes) :]:
+                future.set_exception(error)
+
+        for (_, _, future), (result, exception, fn_traceback) in zip(batch, outcomes):
+            if exception is not None:
+                logger.error(f"Error inside batched call: {exception}.")
+                logger.error(f"Traceback: {fn_traceback}")
+                future.set_exception(exception)
+            else:
+                future.set_result(result)
@@ -1,9 +1,12 @@
+import asyncio
 import copy
+import functools
 import inspect
 import json
 import logging
 import os
 import re
+import threading
 import warnings
 from pathlib import Path
 from typing import Callable, Dict, List, Optional, Tuple, Union
@@ -13,6 +16,7 @@ import requests
 from runhouse import rh_config
 from runhouse.rns.api_utils.resource_access import ResourceAccess
 from runhouse.rns.api_utils.utils import is_jsonable, load_resp_content, read_resp_data
+from runhouse.rns.call_batcher import CallBatcher
 from runhouse.rns.envs import CondaEnv, Env
 from runhouse.rns.hardware import Cluster
 from runhouse.rns.packages import git_package, Package
@@ -24,6 +28,9 @@ from runhouse.rns.utils.env import _get_env_from
 
 logger = logging.getLogger(__name__)
 
+# Guards creating each Function's call batcher
+_batcher_lock = threading.Lock()
+
 
 class Function(Resource):
     RESOURCE_TYPE = "function"
@@ -39,6 +46,8 @@ class Function(Resource):
         dryrun: bool = False,
         access: Optional[str] = None,
         resources: Optional[dict] = None,
+        batch_window_ms: Optional[float] = None,
+        max_batch: int = 256,
         **kwargs,  # We have this here to ignore extra arguments when calling from from_config
     ):
         """
@@ -55,6 +64,9 @@ class Function(Resource):
         self.access = access or self.DEFAULT_ACCESS
         self.dryrun = dryrun
         self.resources = resources or {}
+        self.batch_window_ms = batch_window_ms
+        self.max_batch = max_batch
+        self._batcher = None
         super().__init__(name=name, dryrun=dryrun)
 
         self = self.to(self.system, env=self.env)
@@ -253,7 +265,9 @@ class Function(Resource):
 
     # ----------------- Function call methods -----------------
 
-    def __call__(self, *args, stream_logs=False, **kwargs):
+    def __call__(self, *args, stream_logs=False, call_timeout=None, **kwargs):
+        """Call the Function on its cluster. If it doesn't finish within ``call_timeout`` seconds, its Ray task is
+        cancelled and a ``TimeoutError`` is raised."""
         fn_type = "call"
         if self.access in [ResourceAccess.WRITE, ResourceAccess.READ]:
             if not self.system or self.system.name == rh_config.obj_store.cluster_name:
@@ -274,13 +288,24 @@ class Function(Resource):
                     conda_env=conda_env,
                     args=args,
                     kwargs=kwargs,
+                    serialize=False,
+                    timeout=call_timeout,
                 )
             elif stream_logs:
                 run_key = self.remote(*args, **kwargs)
-                return self.system.get(run_key, stream_logs=True)
+                try:
+                    return self.system.get(
+                        run_key, stream_logs=True, timeout=call_timeout
+                    )
+                except TimeoutError:
+                    self.system.cancel(run_key)
+                    raise
+            elif self.batch_window_ms is not None and call_timeout is None:
+                # Calls with a deadline are sent on their own, so they can be cancelled on their own
+                return self.batcher.submit(args, kwargs).result()
             else:
                 return self._call_fn_with_ssh_access(
-                    fn_type=fn_type, args=args, kwargs=kwargs
+                    fn_type=fn_type, args=args, kwargs=kwargs, timeout=call_timeout
                 )
         else:
             # run the function via http path - user only needs Proxy access
@@ -322,23 +347,24 @@ class Function(Resource):
                 "Function.repeat only works with Write or Read access, not Proxy access"
             )
 
-    def map(self, arg_list, **kwargs):
-        """Map a function over a list of arguments."""
+    def map(self, arg_list, call_timeout=None, **kwargs):
+        """Map a function over a list of arguments. If the calls don't all finish within ``call_timeout`` seconds,
+        all their Ray tasks are cancelled and a ``TimeoutError`` is raised."""
         if self.access in [ResourceAccess.WRITE, ResourceAccess.READ]:
             return self._call_fn_with_ssh_access(
-                fn_type="map", args=arg_list, kwargs=kwargs
+                fn_type="map", args=arg_list, kwargs=kwargs, timeout=call_timeout
             )
         else:
             raise NotImplementedError(
                 "Function.map only works with Write or Read access, not Proxy access"
             )
 
-    def starmap(self, args_lists, **kwargs):
+    def starmap(self, args_lists, call_timeout=None, **kwargs):
         """Like :func:`map` except that the elements of the iterable are expected to be iterables
         that are unpacked as arguments. An iterable of [(1,2), (3, 4)] results in [func(1,2), func(3,4)]."""
         if self.access in [ResourceAccess.WRITE, ResourceAccess.READ]:
             return self._call_fn_with_ssh_access(
-                fn_type="starmap", args=args_lists, kwargs=kwargs
+                fn_type="starmap", args=args_lists, kwargs=kwargs, timeout=call_timeout
             )
         else:
             raise NotImplementedError(
@@ -364,7 +390,6 @@ class Function(Resource):
         """Run async remote call on cluster."""
         # TODO [DG] pin the obj_ref and return a string (printed to log) so result can be retrieved later and we
         # don't need to init ray here. Also, allow user to pass the string as a param to remote().
-        # TODO [DG] add rpc for listing gettaable strings, plus metadata (e.g. when it was created)
         # We need to ray init here so the returned Ray object ref doesn't throw an error it's deserialized
         # import ray
         # ray.init(ignore_reinit_error=True)
@@ -393,6 +418,93 @@ class Function(Resource):
                 "Function.remote only works with Write or Read access, not Proxy access"
             )
 
+    def remote_many(self, arg_list, **kwargs):
+        """Like :func:`remote`, but submits a separate call for each element of ``arg_list`` in a single round
+        trip to the cluster. Returns the list of run keys, one per call. If any of the calls can't be submitted,
+        the first exception is raised once the rest have been (use :func:`Cluster.submit_many` with
+        ``return_errors=True`` to get the run keys of the calls which were submitted as well).
+
+        Example:
+            >>> run_keys = my_fn.remote_many([1, 2, 3], b=4)
+            >>> results = [my_cluster.get(run_key) for run_key in run_keys]
+        """
+        if self.access in [ResourceAccess.WRITE, ResourceAccess.READ]:
+            return self.system.submit_many([(self, [arg], kwargs) for arg in arg_list])
+        else:
+            raise NotImplementedError(
+                "Function.remote_many only works with Write or Read access, not Proxy access"
+            )
+
+    async def acall(self, *args, stream_logs=False, call_timeout=None, **kwargs):
+        """Async version of calling the Function, so many calls (e.g. to Functions on different clusters) can be
+        run concurrently from one event loop.
+
+        Example:
+            >>> results = await asyncio.gather(*[my_fn.acall(i) for i in range(100)])
+        """
+        if self.access not in [ResourceAccess.WRITE, ResourceAccess.READ]:
+            raise NotImplementedError(
+                "Function.acall only works with Write or Read access, not Proxy access"
+            )
+        if not self.system or self.system.name == rh_config.obj_store.cluster_name:
+            # Runs on this cluster, without going through gRPC
+            return await asyncio.get_running_loop().run_in_executor(
+                None,
+                functools.partial(
+                    self.__call__, *args, call_timeout=call_timeout, **kwargs
+                ),
+            )
+        if stream_logs:
+            run_key = await self.aremote(*args, **kwargs)
+            try:
+                return await self.system.aget(
+                    run_key, stream_logs=True, timeout=call_timeout
+                )
+            except TimeoutError:
+                await asyncio.get_running_loop().run_in_executor(
+                    None, self.system.cancel, run_key
+                )
+                raise
+        if self.batch_window_ms is not None and call_timeout is None:
+            return await asyncio.wrap_future(self.batcher.submit(args, kwargs))
+        return await self.system.arun_module(
+            *self._run_module_args(fn_type="call", args=args, kwargs=kwargs),
+            timeout=call_timeout,
+        )
+
+    async def aremote(self, *args, **kwargs):
+        """Async version of :func:`remote`, returning the run key of the call."""
+        if self.access not in [ResourceAccess.WRITE, ResourceAccess.READ]:
+            raise NotImplementedError(
+                "Function.aremote only works with Write or Read access, not Proxy access"
+            )
+        run_key = await self.system.arun_module(
+            *self._run_module_args(fn_type="remote", args=args, kwargs=kwargs)
+        )
+        logger.info(
+            f"Submitted remote call to cluster with run_key {run_key}, whose result can be retrieved with "
+            f"`await my_cluster.aget(run_key)`"
+        )
+        return run_key
+
+    @property
+    def batcher(self) -> CallBatcher:
+        """Batches up the calls to this Function if ``batch_window_ms`` is set."""
+        with _batcher_lock:
+            if self._batcher is None:
+                self._batcher = CallBatcher(
+                    self._run_batch,
+                    window_ms=self.batch_window_ms,
+                    max_batch=self.max_batch,
+                )
+            return self._batcher
+
+    def _run_batch(self, calls):
+        logger.info(f"Running batch of {len(calls)} calls to {self.name} via gRPC")
+        return self.system.run_module(
+            *self._run_module_args(fn_type="batch", args=calls, kwargs={})
+        )
+
     def get(self, obj_ref):
         """Get the result of a Function call that was submitted as async using `remote`.
 
@@ -400,23 +512,31 @@ class Function(Resource):
             obj_ref: A single or list of Ray.ObjectRef objects returned by a Function.remote() call. The ObjectRefs
                 must be from the cluster that this Function is running on.
         """
-        # TODO [DG] replace with self.system.get()?
-        if self.access in [ResourceAccess.WRITE, ResourceAccess.READ]:
-            arg_list = obj_ref if isinstance(obj_ref, list) else [obj_ref]
-            return self._call_fn_with_ssh_access(
-                fn_type="get", args=arg_list, kwargs={}
-            )
-        else:
+        if self.access not in [ResourceAccess.WRITE, ResourceAccess.READ]:
             raise NotImplementedError(
                 "Function.get only works with Write or Read access, not Proxy access"
             )
-
-    def _call_fn_with_ssh_access(self, fn_type, resources=None, args=None, kwargs=None):
+        if isinstance(obj_ref, str):
+            # A run key, which goes through the cluster's local cache of finished results
+            return self.system.get(obj_ref)
+        arg_list = obj_ref if isinstance(obj_ref, list) else [obj_ref]
+        return self._call_fn_with_ssh_access(fn_type="get", args=arg_list, kwargs={})
+
+    def _call_fn_with_ssh_access(
+        self, fn_type, resources=None, args=None, kwargs=None, timeout=None
+    ):
         # https://docs.ray.io/en/latest/ray-core/tasks/patterns/map-reduce.html
         # return ray.get([map.remote(i, map_func) for i in replicas])
         # TODO allow specifying resources per worker for map
         # TODO [DG] check whether we're on the cluster and if so, just call the function directly via the
         # helper function currently in UnaryServer
+        run_module_args = self._run_module_args(fn_type, resources, args, kwargs)
+        name = self.name or run_module_args[2] or "anonymous function"
+        logger.info(f"Running {name} via gRPC")
+        return self.system.run_module(*run_module_args, timeout=timeout)
+
+    def _run_module_args(self, fn_type, resources=None, args=None, kwargs=None):
+        """The arguments to :func:`Cluster.run_module` for a call to this Function."""
         resources = (
             resources or self.resources
         )  # Allow for passing in one-off resources for this specific call
@@ -425,12 +545,10 @@ class Function(Resource):
             raise RuntimeError(f"No fn pointers saved for {name}")
 
         [relative_path, module_name, fn_name] = self.fn_pointers
-        name = self.name or fn_name or "anonymous function"
-        logger.info(f"Running {name} via gRPC")
         env_name = (
             self.env.env_name if (self.env and isinstance(self.env, CondaEnv)) else None
         )
-        res = self.system.run_module(
+        return (
             relative_path,
             module_name,
             fn_name,
@@ -440,7 +558,6 @@ class Function(Resource):
             args,
             kwargs,
         )
-        return res
 
     # TODO [DG] test this properly
     # def debug(self, redirect_logging=False, timeout=10000, *args, **kwargs):
@@ -497,10 +614,18 @@ class Function(Resource):
                 "env": self._resource_string_for_subconfig(self.env),
                 "fn_pointers": self.fn_pointers,
                 "resources": self.resources,
+                "batch_window_ms": self.batch_window_ms,
+                "max_batch": self.max_batch,
             }
         )
         return config
 
+    def __getstate__(self):
+        """Delete non-serializable elements (e.g. thread locks) before pickling."""
+        state = self.__dict__.copy()
+        state["_batcher"] = None
+        return state
+
     def _save_sub_resources(self):
         self.system.save()
 
@@ -641,6 +766,8 @@ def function(
     load_secrets: bool = False,
     serialize_notebook_fn: bool = False,
     load: bool = True,
+    batch_window_ms: Optional[float] = None,
+    max_batch: Optional[int] = None,
     # args below are deprecated
     reqs: Optional[List[str]] = None,
     setup_cmds: Optional[List[str]] = None,
@@ -664,6 +791,10 @@ def function(
         serialize_notebook_fn (bool): If function is of a notebook setting, whether or not to serialized the function.
             (Default: ``False``)
         load (bool): Whether to load an existing config for the Function. (Default: ``True``)
+        batch_window_ms (Optional[float]): If set, calls to the Function (e.g. from many threads or async tasks)
+            are collected for this many milliseconds and sent to the cluster together, where they're run as a few
+            Ray tasks rather than one task each. Worthwhile for many small calls. (Default: ``None``)
+        max_batch (Optional[int]): The most calls to send in one batch. (Default: ``256``)
 
     Returns:
         Function: The resulting Function object.
@@ -679,6 +810,11 @@ def function(
         >>>
         >>> # using the function
         >>> summer(5, 8)  # returns 13
+        >>>
+        >>> # batching up many small concurrent calls
+        >>> summer = rh.function(fn=sum, system=cluster, batch_window_ms=5)
+        >>> with ThreadPoolExecutor(max_workers=100) as pool:
+        >>>     sums = list(pool.map(summer, range(1000), range(1000)))
     """
 
     config = rh_config.rns_client.load_config(name) if load else {}
@@ -689,6 +825,12 @@ def function(
     config["serialize_notebook_fn"] = serialize_notebook_fn or config.get(
         "serialize_notebook_fn"
     )
+    config["batch_window_ms"] = (
+        batch_window_ms
+        if batch_window_ms is not None
+        else config.get("batch_window_ms")
+    )
+    config["max_batch"] = max_batch or config.get("max_batch") or 256
 
     if setup_cmds:
         warnings.warn(
@@ -1,9 +1,11 @@
+import asyncio
 import contextlib
 import logging
 import pkgutil
 import subprocess
 import threading
 import time
+from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple, Union
 
@@ -14,13 +16,28 @@ import sshtunnel
 from sky.utils import command_runner
 from sshtunnel import HandlerSSHTunnelForwarderError, SSHTunnelForwarder
 
-from runhouse.rh_config import open_grpc_tunnels, rns_client
+from runhouse.rh_config import configs, connection_manager, result_cache, rns_client
 from runhouse.rns.folders.folder import Folder
 from runhouse.rns.packages.package import Package
 from runhouse.rns.resource import Resource
 from runhouse.rns.utils.hardware import _current_cluster
-
-from runhouse.servers.grpc.unary_client import UnaryClient
+from runhouse.servers import tunnel_daemon
+
+from runhouse.servers.grpc.bulk_args import (
+    BULK_ARG_THRESHOLD,
+    bulk_arg_uploader,
+    BULK_ARGS_DIR,
+)
+from runhouse.servers.grpc.connections import Connection
+from runhouse.servers.grpc.in_process_client import (
+    InProcessClient,
+    service_in_this_process,
+)
+from runhouse.servers.grpc.unary_client import (
+    AsyncUnaryClient,
+    print_log_chunk,
+    UnaryClient,
+)
 from runhouse.servers.grpc.unary_server import UnaryService
 
 logger = logging.getLogger(__name__)
@@ -29,6 +46,9 @@ logger = logging.getLogger(__name__)
 class Cluster(Resource):
     RESOURCE_TYPE = "cluster"
     GRPC_TIMEOUT = 5  # seconds
+    # How long to wait for a restarted server to be ready, e.g. for it to import Runhouse and connect to Ray
+    SERVER_START_TIMEOUT = 60  # seconds
+    LOG_STREAM_RETRIES = 5
 
     def __init__(
         self,
@@ -216,40 +236,455 @@ class Cluster(Resource):
         )
         self.client.install_packages(to_install, env)
 
-    def get(self, key: str, default: Any = None, stream_logs: bool = False):
-        """Get the object at the given key from the cluster's object store."""
+    def get(
+        self,
+        key: str,
+        default: Any = None,
+        stream_logs: bool = False,
+        timeout: Optional[float] = None,
+    ):
+        """Get the object at the given key from the cluster's object store. If ``stream_logs`` is set and the
+        key is a run key, print the run's logs until it finishes first. Raises a ``TimeoutError`` if it takes
+        longer than ``timeout`` seconds (e.g. waiting for a run to finish), though the run itself carries on.
+
+        The results of finished runs are cached locally once fetched (see ``result_cache_size`` and
+        ``result_cache_disk_size`` in the Runhouse config), so getting them again doesn't download them again."""
+        hit, res = self._cached_result(key, stream_logs)
+        if hit:
+            return res
         self.check_grpc()
-        return self.client.get_object(key, stream_logs=stream_logs) or default
+        if timeout is not None:
+            # One RPC with a deadline, which sends the logs along with the result
+            return (
+                self._get_and_cache(key, stream_logs=stream_logs, timeout=timeout)
+                or default
+            )
+        if stream_logs:
+            try:
+                for chunk in self.stream_logs(key):
+                    print_log_chunk(chunk)
+            except grpc.RpcError as e:
+                if e.code() != grpc.StatusCode.NOT_FOUND:
+                    raise
+        return self._get_and_cache(key) or default
+
+    def _cached_result(self, key, stream_logs=False):
+        if stream_logs or not self.address or not isinstance(key, str):
+            # Getting with logs prints them again, so always goes to the cluster
+            return False, None
+        return result_cache.get(self.address, key)
+
+    def _get_and_cache(self, key, stream_logs=False, timeout=None):
+        if not isinstance(self.client, UnaryClient):
+            return self.client.get_object(key, stream_logs=stream_logs, timeout=timeout)
+        res, immutable, size = self.client.get_object_info(
+            key, stream_logs=stream_logs, timeout=timeout
+        )
+        if immutable:
+            result_cache.put(self.address, key, res, size)
+        return res
+
+    def get_many(
+        self, keys: List[str], timeout: Optional[float] = None
+    ) -> Tuple[Dict[str, Any], Dict[str, Exception]]:
+        """Get the objects at many keys in the cluster's object store in one round trip, rather than one per key.
+        Returns a dict of the values got and a dict of the errors for the rest, by key: a ``KeyError`` for keys
+        which aren't in the object store, otherwise the exception raised getting the value (e.g. by a failed
+        run). Results of finished runs are cached locally, like with :func:`get`.
+
+        Example:
+            >>> results, errors = my_cluster.get_many(run_keys)
+        """
+        values, to_get = self._cached_results(keys)
+        errors = {}
+        if to_get:
+            self.check_grpc()
+            got, errors, sizes = self.client.get_objects(to_get, timeout=timeout)
+            self._cache_results(values, got, sizes)
+        return {key: values[key] for key in keys if key in values}, errors
+
+    def _cached_results(self, keys):
+        values, misses = {}, []
+        for key in keys:
+            hit, res = self._cached_result(key)
+            if hit:
+                values[key] = res
+            else:
+                misses.append(key)
+        return values, misses
+
+    def _cache_results(self, values, got, sizes):
+        for key, size in sizes.items():
+            result_cache.put(self.address, key, got[key], size)
+        values.update(got)
+
+    def stream_logs(
+        self,
+        run_key: str,
+        follow: bool = True,
+        offsets: Optional[Dict[str, int]] = None,
+        timeout: Optional[float] = None,
+    ):
+        """Stream the raw stdout and stderr of a run on the cluster, yielding ``LogChunk`` messages with the
+        ``data``, ``stream`` (``"stdout"`` or ``"stderr"``), ``file``, ``worker_id`` and ``offset`` of each chunk.
+        If the connection drops, reconnect and resume from where the stream stopped.
+
+        Args:
+            run_key (str): Run key of the run.
+            follow (bool): Keep streaming until the run finishes, rather than only the logs written so far.
+                (Default: ``True``)
+            offsets (Dict[str, int], optional): Offset of the last chunk received for each file, to resume a
+                previous stream.
+            timeout (float, optional): Raise a ``TimeoutError`` if the stream (or the stream resumed after a
+                dropped connection) hasn't finished after this many seconds.
+        """
+        self.check_grpc()
+        offsets = dict(offsets or {})
+        retries = 0
+        while True:
+            try:
+                for chunk in self.client.stream_logs(
+                    run_key, offsets=offsets, follow=follow, timeout=timeout
+                ):
+                    offsets[chunk.file] = chunk.offset
+                    retries = 0
+                    yield chunk
+                return
+            except grpc.RpcError as e:
+                if (
+                    e.code() != grpc.StatusCode.UNAVAILABLE
+                    or retries >= self.LOG_STREAM_RETRIES
+                ):
+                    raise
+                retries += 1
+                logger.info(
+                    f"Lost connection to cluster <{self.name}> while streaming logs for {run_key}, resuming"
+                )
+                time.sleep(retries)
+                self.check_grpc()
 
     def add_secrets(self, provider_secrets: dict):
         """Copy secrets from current environment onto the cluster"""
         self.check_grpc()
         return self.client.add_secrets(pickle.dumps(provider_secrets))
 
-    def put(self, key: str, obj: Any):
-        """Put the given object on the cluster's object store at the given key."""
+    def put(self, key: str, obj: Any, never_evict: bool = False):
+        """Put the given object on the cluster's object store at the given key. With ``never_evict``, the object
+        is kept even when the object store is over its memory budget or TTL (see :func:`obj_store_stats`), until
+        it's deleted or cleared."""
+        self.check_grpc()
+        result_cache.invalidate(self.address, [key])
+        return self.client.put_object(key, obj, never_evict=never_evict)
+
+    def put_many(
+        self, objs: Dict[str, Any], never_evict: bool = False
+    ) -> Dict[str, Exception]:
+        """Put many objects on the cluster's object store, by key, in one round trip. Returns the errors for any
+        which couldn't be put, by key (so an empty dict if they all were)."""
         self.check_grpc()
-        return self.client.put_object(key, obj)
+        result_cache.invalidate(self.address, list(objs))
+        return self.client.put_objects(objs, never_evict=never_evict)
+
+    def delete_many(self, keys: List[str]) -> Dict[str, Exception]:
+        """Delete many keys from the cluster's object store in one round trip. Returns a ``KeyError`` for each of
+        the keys which weren't in the object store."""
+        if not keys:
+            return {}
+        self.check_grpc()
+        self._invalidate_results(keys)
+        deleted = set(self.client.clear_pins(keys))
+        return {key: KeyError(key) for key in keys if key not in deleted}
 
-    def list_keys(self):
-        """List all keys in the cluster's object store."""
+    def list_keys(
+        self,
+        prefix: Optional[str] = None,
+        status: Optional[Union[str, List[str]]] = None,
+        submitted_after: Optional[Union[float, datetime]] = None,
+        submitted_before: Optional[Union[float, datetime]] = None,
+    ):
+        """List the keys in the cluster's object store, optionally filtered (on the cluster) as in
+        :func:`list_runs`, in which case they're listed oldest first."""
         self.check_grpc()
-        res = self.client.list_keys()
+        res = self.client.list_keys(
+            prefix=prefix,
+            statuses=status,
+            submitted_after=_timestamp(submitted_after),
+            submitted_before=_timestamp(submitted_before),
+        )
         return res
 
+    def list_runs(
+        self,
+        prefix: Optional[str] = None,
+        status: Optional[Union[str, List[str]]] = None,
+        submitted_after: Optional[Union[float, datetime]] = None,
+        submitted_before: Optional[Union[float, datetime]] = None,
+        limit: Optional[int] = 100,
+        page_token: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        List the keys in the cluster's object store with their metadata, oldest first, filtered and paginated on
+        the cluster so that listing thousands of runs stays cheap.
+
+        Each record has the ``key``, a unique ``run_id``, the ``fn_name``, the ``submitted`` and ``finished``
+        times (in seconds since the epoch), the ``status`` (``"pending"``, ``"running"``, ``"done"``,
+        ``"failed"`` or ``"cancelled"``), the result's ``size`` in bytes and the ``user`` who submitted it. All
+        but the key, submit time and size are ``None`` for objects which were put rather than run.
+
+        Args:
+            prefix (str, optional): Only keys starting with this, e.g. a function's name.
+            status (Union[str, List[str]], optional): Only runs with this status, or one of these statuses.
+            submitted_after (Union[float, datetime], optional): Only keys submitted at or after this time.
+            submitted_before (Union[float, datetime], optional): Only keys submitted before this time.
+            limit (int, optional): At most this many records, or ``None`` for all of them. (Default: 100)
+            page_token (str, optional): Page token returned by the previous call, to get the next page.
+
+        Returns:
+            A tuple of the records and the page token for the next page, which is ``None`` if there are no more.
+
+        Example:
+            >>> runs, page_token = my_cluster.list_runs(prefix="train", status="failed")
+            >>> while page_token:
+            >>>     more, page_token = my_cluster.list_runs(prefix="train", status="failed", page_token=page_token)
+        """
+        self.check_grpc()
+        return self.client.list_runs(
+            prefix=prefix,
+            statuses=status,
+            submitted_after=_timestamp(submitted_after),
+            submitted_before=_timestamp(submitted_before),
+            limit=limit,
+            page_token=page_token,
+        )
+
+    def watch_keys(
+        self,
+        keys: Optional[List[str]] = None,
+        prefix: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ):
+        """Watch the given keys (or all keys starting with ``prefix``) in the cluster's object store, yielding
+        a ``(key, status)`` tuple as each one resolves, where status is ``"completed"``, ``"failed"``,
+        ``"cancelled"`` or ``"not_found"``. All the keys are watched over a single stream."""
+        self.check_grpc()
+        return self.client.watch_keys(keys, prefix=prefix, timeout=timeout)
+
     def cancel(self, key: Optional[str] = None, force=False, all=False):
         """Cancel a given run on cluster by its key. If `all` is set to ``True``, then all jobs on the
         cluster will be cancelled."""
         self.check_grpc()
+        self._invalidate_results(None if all else key)
         return self.client.cancel_runs(key, force=force, all=all)
 
     def clear_pins(self, pins: Optional[List[str]] = None):
         """Remove the given pinned items from the cluster. If `pins` is set to ``None``, then
         all pinned objects will be cleared."""
         self.check_grpc()
+        self._invalidate_results(pins)
         self.client.clear_pins(pins)
         logger.info(f'Clearing pins on cluster {pins or ""}')
 
+    def obj_store_stats(self):
+        """Memory use of the cluster's object store: the number of entries and their bytes, its memory budget
+        (``obj_store_max_bytes`` in the cluster's Runhouse config, by default half of Ray's object store) and TTL
+        (``obj_store_ttl``), and how many entries have been evicted by each. Least recently used entries are
+        evicted when the store is over budget, and entries older than the TTL are evicted regardless."""
+        self.check_grpc()
+        return self.client.obj_store_stats()
+
+    def _invalidate_results(self, keys=None):
+        """Drop the given keys (or all the keys, if ``None``) of this cluster from the local result cache."""
+        if self.address:
+            result_cache.invalidate(
+                self.address, [keys] if isinstance(keys, str) else keys
+            )
+
+    def server_status(self):
+        """Load on each of the Runhouse server's thread pools ("lanes") for control calls, data and package
+        installs: the number of workers, and the calls running, queued and completed in each."""
+        self.check_grpc()
+        return self.client.server_status()
+
+    def clear_bulk_args(self):
+        """Delete the large args which have been uploaded to the cluster over SFTP (see ``bulk_arg_threshold``
+        in the Runhouse config), so they'll be uploaded again the next time they're passed to a function."""
+        self.run([f"rm -rf {BULK_ARGS_DIR}"])
+        uploader = getattr(self.client, "bulk_arg_uploader", None)
+        if uploader is not None:
+            uploader.forget_uploads()
+
+    def health(self):
+        """The Runhouse server's version, whether it's connected to Ray, its uptime in seconds and the load
+        on each of its thread pools (see :func:`server_status`)."""
+        self.check_grpc()
+        return self.client.health()
+
+    # ----------------- Async Methods ----------------- #
+
+    async def _async_client(self) -> AsyncUnaryClient:
+        """The :class:`AsyncUnaryClient` for the running event loop, connected through the same SSH tunnel (or
+        Unix socket, on the cluster itself) as the blocking client."""
+        loop = asyncio.get_running_loop()
+        if not self.is_connected():
+            # Setting up the tunnel blocks, so do it in the executor
+            await loop.run_in_executor(None, self.check_grpc)
+
+        if isinstance(self.client, UnaryClient):
+            host, port = self.client.host, self.client.port
+            oob_buffers, compression = self.client.oob_buffers, self.client.compression
+            uploader = self.client.bulk_arg_uploader
+        else:
+            # Calling from within the server's own process, so connect over its Unix socket
+            host, port = f"unix://{UnaryService.UNIX_SOCKET_PATH}", None
+            oob_buffers, compression = configs.get("use_oob_buffers", True), None
+            uploader = None
+
+        return connection_manager.async_client(
+            host,
+            port,
+            lambda: AsyncUnaryClient(
+                host=host,
+                port=port,
+                oob_buffers=oob_buffers,
+                compression=compression,
+                bulk_arg_uploader=uploader,
+                user=configs.get("username"),
+            ),
+        )
+
+    async def aget(
+        self,
+        key: str,
+        default: Any = None,
+        stream_logs: bool = False,
+        timeout: Optional[float] = None,
+    ):
+        """Async version of :func:`get`."""
+        hit, res = self._cached_result(key, stream_logs)
+        if hit:
+            return res
+        if timeout is not None:
+            return (
+                await self._aget_and_cache(
+                    key, stream_logs=stream_logs, timeout=timeout
+                )
+                or default
+            )
+        if stream_logs:
+            try:
+                async for chunk in self.astream_logs(key):
+                    print_log_chunk(chunk)
+            except grpc.RpcError as e:
+                if e.code() != grpc.StatusCode.NOT_FOUND:
+                    raise
+        return await self._aget_and_cache(key) or default
+
+    async def _aget_and_cache(self, key, stream_logs=False, timeout=None):
+        client = await self._async_client()
+        res, immutable, size = await client.get_object_info(
+            key, stream_logs=stream_logs, timeout=timeout
+        )
+        if immutable:
+            result_cache.put(self.address, key, res, size)
+        return res
+
+    async def aput(self, key: str, obj: Any, never_evict: bool = False):
+        """Async version of :func:`put`."""
+        client = await self._async_client()
+        result_cache.invalidate(self.address, [key])
+        return await client.put_object(key, obj, never_evict=never_evict)
+
+    async def aget_many(
+        self, keys: List[str], timeout: Optional[float] = None
+    ) -> Tuple[Dict[str, Any], Dict[str, Exception]]:
+        """Async version of :func:`get_many`."""
+        values, to_get = self._cached_results(keys)
+        errors = {}
+        if to_get:
+            client = await self._async_client()
+            got, errors, sizes = await client.get_objects(to_get, timeout=timeout)
+            self._cache_results(values, got, sizes)
+        return {key: values[key] for key in keys if key in values}, errors
+
+    async def aput_many(
+        self, objs: Dict[str, Any], never_evict: bool = False
+    ) -> Dict[str, Exception]:
+        """Async version of :func:`put_many`."""
+        client = await self._async_client()
+        result_cache.invalidate(self.address, list(objs))
+        return await client.put_objects(objs, never_evict=never_evict)
+
+    async def astream_logs(
+        self,
+        run_key: str,
+        follow: bool = True,
+        offsets: Optional[Dict[str, int]] = None,
+        timeout: Optional[float] = None,
+    ):
+        """Async version of :func:`stream_logs`, for use with ``async for``."""
+        offsets = dict(offsets or {})
+        retries = 0
+        while True:
+            client = await self._async_client()
+            try:
+                async for chunk in client.stream_logs(
+                    run_key, offsets=offsets, follow=follow, timeout=timeout
+                ):
+                    offsets[chunk.file] = chunk.offset
+                    retries = 0
+                    yield chunk
+                return
+            except grpc.RpcError as e:
+                if (
+                    e.code() != grpc.StatusCode.UNAVAILABLE
+                    or retries >= self.LOG_STREAM_RETRIES
+                ):
+                    raise
+                retries += 1
+                logger.info(
+                    f"Lost connection to cluster <{self.name}> while streaming logs for {run_key}, resuming"
+                )
+                await asyncio.sleep(retries)
+
+    async def awatch_keys(
+        self,
+        keys: Optional[List[str]] = None,
+        prefix: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ):
+        """Async version of :func:`watch_keys`, for use with ``async for``."""
+        client = await self._async_client()
+        async for key, status in client.watch_keys(
+            keys, prefix=prefix, timeout=timeout
+        ):
+            yield key, status
+
+    async def arun_module(
+        self,
+        relative_path,
+        module_name,
+        fn_name,
+        fn_type,
+        resources,
+        conda_env,
+        args,
+        kwargs,
+        timeout=None,
+    ):
+        """Async version of :func:`run_module`."""
+        client = await self._async_client()
+        return await client.run_module(
+            relative_path,
+            module_name,
+            fn_name,
+            fn_type,
+            resources,
+            conda_env,
+            args,
+            kwargs,
+            timeout=timeout,
+        )
+
     def on_this_cluster(self):
         """Whether this function is being called on the same cluster."""
         return _current_cluster("name") == self.rns_address
@@ -260,43 +695,113 @@ class Cluster(Resource):
         # FYI based on: https://sshtunnel.readthedocs.io/en/latest/#example-1
         # FYI If we ever need to do this from scratch, we can use this example:
         # https://github.com/paramiko/paramiko/blob/main/demos/rforward.py#L74
+        if self.on_this_cluster() and self._connect_local_grpc(force_reconnect):
+            return
+
         if not self.address:
             raise ValueError(f"No address set for cluster <{self.name}>. Is it up?")
 
-        # TODO [DG] figure out how to ping to see if tunnel is already up
-        if self._grpc_tunnel and force_reconnect:
-            self._grpc_tunnel.close()
+        # Shared with all the other Cluster objects for this cluster in this process
+        connection = connection_manager.connect(
+            self.address, self._open_grpc_connection, force_reconnect=force_reconnect
+        )
+        self._grpc_tunnel = connection.tunnel
+        self.client = connection.client
+
+    def _open_grpc_connection(self) -> Connection:
+        if configs.get("use_tunnel_daemon", False):
+            return self._open_daemon_grpc_connection()
 
         # TODO Check if port is already open instead of refcounting?
         # status = subprocess.run(['nc', '-z', self.address, str(self.grpc_port)], capture_output=True)
         # if not self.check_port(self.address, UnaryClient.DEFAULT_PORT):
+        ssh_tunnel, connected_port = self.ssh_tunnel(
+            UnaryClient.DEFAULT_PORT,
+            remote_port=UnaryService.DEFAULT_PORT,
+            num_ports_to_try=5,
+        )
 
-        tunnel_refcount = 0
-        if self.address in open_grpc_tunnels:
-            ssh_tunnel, connected_port, tunnel_refcount = open_grpc_tunnels[
-                self.address
-            ]
-            ssh_tunnel.check_tunnels()
-            if ssh_tunnel.tunnel_is_up[ssh_tunnel.local_bind_address]:
-                self._grpc_tunnel = ssh_tunnel
-        else:
-            self._grpc_tunnel, connected_port = self.ssh_tunnel(
-                UnaryClient.DEFAULT_PORT,
+        # Connecting to localhost because it's tunneled into the server at the specified port.
+        client = UnaryClient(
+            host="127.0.0.1",
+            port=connected_port,
+            oob_buffers=configs.get("use_oob_buffers", True),
+            compression=configs.get("grpc_compression", "gzip"),
+            bulk_arg_uploader=self._bulk_arg_uploader(),
+            user=configs.get("username"),
+        )
+        self._wait_for_connection(client)
+        return Connection(client, tunnel=ssh_tunnel)
+
+    def _open_daemon_grpc_connection(self) -> Connection:
+        """Connect through the SSH tunnel held by the per-user tunnel daemon, which other processes (and CLI
+        calls) share, rather than opening a tunnel of our own."""
+        creds: dict = self.ssh_creds()
+
+        def open_tunnel():
+            return tunnel_daemon.tunnel_socket(
+                self.address,
+                ssh_user=creds["ssh_user"],
+                ssh_private_key=creds["ssh_private_key"],
                 remote_port=UnaryService.DEFAULT_PORT,
-                num_ports_to_try=5,
+                idle_timeout=configs.get("tunnel_daemon_idle_timeout", None),
             )
-        open_grpc_tunnels[self.address] = (
-            self._grpc_tunnel,
-            connected_port,
-            tunnel_refcount + 1,
+
+        socket_path = open_tunnel()
+        client = UnaryClient(
+            host=f"unix://{socket_path}",
+            port=None,
+            oob_buffers=configs.get("use_oob_buffers", True),
+            compression=configs.get("grpc_compression", "gzip"),
+            bulk_arg_uploader=self._bulk_arg_uploader(),
+            user=configs.get("username"),
+        )
+        self._wait_for_connection(client)
+        return Connection(
+            client,
+            tunnel=tunnel_daemon.DaemonTunnel(self.address, socket_path, open_tunnel),
         )
 
-        # Connecting to localhost because it's tunneled into the server at the specified port.
-        self.client = UnaryClient(host="127.0.0.1", port=connected_port)
-        waited = 0
-        while not self.is_connected() and waited <= self.GRPC_TIMEOUT:
-            time.sleep(0.25)
-            waited += 0.25
+    def _bulk_arg_uploader(self):
+        return bulk_arg_uploader(
+            self.address,
+            self.ssh_creds(),
+            threshold=configs.get("bulk_arg_threshold", BULK_ARG_THRESHOLD),
+        )
+
+    def _wait_for_connection(self, client):
+        # Returns as soon as the channel is connected and the server says it's ready
+        client.wait_until_ready(timeout=self.GRPC_TIMEOUT)
+
+    def _connect_local_grpc(self, force_reconnect=False):
+        """Connect to the server from the cluster itself, skipping the SSH tunnel. Callers in the same process
+        as the server call it directly, and other processes (e.g. nested Functions in Ray workers) connect over
+        a Unix socket. Returns whether we connected."""
+        if service_in_this_process():
+            self.client = InProcessClient()
+            return True
+
+        if not Path(UnaryService.UNIX_SOCKET_PATH).exists():
+            return False
+
+        def open_connection():
+            client = UnaryClient(
+                host=f"unix://{UnaryService.UNIX_SOCKET_PATH}",
+                port=None,
+                oob_buffers=configs.get("use_oob_buffers", True),
+                # Nothing to gain from compressing over a local socket
+                compression=None,
+                user=configs.get("username"),
+            )
+            self._wait_for_connection(client)
+            return Connection(client)
+
+        self.client = connection_manager.connect(
+            f"unix://{UnaryService.UNIX_SOCKET_PATH}",
+            open_connection,
+            force_reconnect=force_reconnect,
+        ).client
+        return self.is_connected()
 
     def check_grpc(self, restart_grpc_server=True):
         if not self.address:
@@ -312,37 +817,50 @@ class Cluster(Resource):
                 # is already up but doesn't have an address assigned yet.
                 self.up_if_not()
 
-        if not self.client:
-            try:
-                self.connect_grpc()
-            except (
-                grpc.RpcError,
-                sshtunnel.BaseSSHTunnelForwarderError,
-            ):
-                # It's possible that the cluster went down while we were trying to install packages.
-                if not self.is_up():
-                    self.up_if_not()
-                else:
-                    self.restart_grpc_server(resync_rh=False)
-
         if self.is_connected():
             return
 
-        self.connect_grpc()
-        if self.is_connected():
-            return
+        # Only one thread (across all the Cluster objects for this cluster) reconnects or restarts the server
+        # at a time
+        with connection_manager.lock(self.address):
+            if not self.client:
+                try:
+                    self.connect_grpc()
+                except (
+                    grpc.RpcError,
+                    sshtunnel.BaseSSHTunnelForwarderError,
+                    tunnel_daemon.TunnelDaemonError,
+                ):
+                    # It's possible that the cluster went down while we were trying to install packages.
+                    if not self.is_up():
+                        self.up_if_not()
+                    else:
+                        self.restart_grpc_server(resync_rh=False)
 
-        if restart_grpc_server:
-            self.restart_grpc_server(resync_rh=False)
-            self.connect_grpc()
             if self.is_connected():
                 return
 
-            self.restart_grpc_server(resync_rh=True)
+            # Pick up the connection if another thread already reconnected (giving the shared channel a chance to
+            # finish connecting, e.g. if it was idle), otherwise reconnect ourselves
             self.connect_grpc()
+            self._wait_for_connection(self.client)
+            if self.is_connected():
+                return
+            self.connect_grpc(force_reconnect=True)
             if self.is_connected():
                 return
 
+            if restart_grpc_server:
+                self.restart_grpc_server(resync_rh=False)
+                self.connect_grpc(force_reconnect=True)
+                if self.is_connected():
+                    return
+
+                self.restart_grpc_server(resync_rh=True)
+                self.connect_grpc(force_reconnect=True)
+                if self.is_connected():
+                    return
+
         raise ValueError(f"Could not connect to cluster <{self.name}>")
 
         # try:
@@ -401,15 +919,7 @@ class Cluster(Resource):
 
     # TODO [DG] Remove this for now, for some reason it was causing execution to hang after programs completed
     # def __del__(self):
-    #     if self.address in open_grpc_tunnels:
-    #         tunnel, port, refcount = open_grpc_tunnels[self.address]
-    #         if refcount == 1:
-    #             tunnel.close()
-    #             open_grpc_tunnels.pop(self.address)
-    #         else:
-    #             open_grpc_tunnels[self.address] = (tunnel, port, refcount - 1)
-    #     elif self._grpc_tunnel:  # Not sure why this would be reached but keeping it just in case
-    #         self._grpc_tunnel.close()
+    #     connection_manager.close(self.address)
 
     # import paramiko
     # ssh = paramiko.SSHClient()
@@ -434,7 +944,8 @@ class Cluster(Resource):
         resync_rh: bool = True,
         restart_ray: bool = False,
     ):
-        """Restart the GRPC server."""
+        """Restart the GRPC server. Objects in the cluster's object store and the results of finished runs are
+        kept, unless ``restart_ray`` is set."""
         # TODO how do we capture errors if this fails?
         if resync_rh:
             self.sync_runhouse_to_cluster(_install_url=_rh_install_url)
@@ -464,14 +975,37 @@ class Cluster(Resource):
         # kill_proc_at_port_cmd = debian_kill_proc_cmd if cloud_provider == 'GCP' \
         #     else ubuntu_kill_proc_cmd
 
+        started_after = time.time()
+        if restart_ray:
+            # The object store survives a server restart, but not Ray restarting
+            self._invalidate_results()
         status_codes = self.run(
             commands=cmds,
             stream_logs=True,
         )
-        # As of 2022-27-Dec still seems we need this.
-        time.sleep(2)
+        self._wait_for_restart(started_after)
         return status_codes
 
+    def _wait_for_restart(self, started_after):
+        """Wait for the new server to say it's ready, rather than sleeping for a fixed time."""
+        try:
+            self.connect_grpc()
+        except Exception as e:
+            logger.warning(f"Could not connect to restarted server: {e}")
+            return
+        health = self.client.wait_until_ready(
+            timeout=self.SERVER_START_TIMEOUT, started_after=started_after
+        )
+        if health is None:
+            logger.warning(
+                f"Restarted server on cluster <{self.name}> was not ready after {self.SERVER_START_TIMEOUT} "
+                f"seconds, see ~/.rh/{self.name}_grpc_server.log on the cluster"
+            )
+        else:
+            logger.info(
+                f"Restarted server is ready, running Runhouse {health['version']}"
+            )
+
     @contextlib.contextmanager
     def pause_autostop(self):
         """Context manager to temporarily pause autostop. Mainly for OnDemand clusters, for BYO cluster
@@ -488,6 +1022,7 @@ class Cluster(Resource):
         conda_env,
         args,
         kwargs,
+        timeout=None,
     ):
         self.check_grpc()
         return self.client.run_module(
@@ -499,14 +1034,67 @@ class Cluster(Resource):
             conda_env,
             args,
             kwargs,
+            timeout=timeout,
         )
 
+    def run_module_batch(self, calls, timeout=None):
+        """Run many calls in a single round trip, where each call is a tuple of the arguments to
+        :func:`run_module`. Returns a ``(result, exception)`` tuple for each call, where ``exception`` is None
+        unless the call failed."""
+        self.check_grpc()
+        return self.client.run_module_batch(calls, timeout=timeout)
+
+    def submit_many(self, calls, return_errors: bool = False):
+        """Submit many remote calls to the cluster in a single round trip, rather than one per call, and return
+        their run keys in the same order. Each call gets its own run key, which can be passed to :func:`get`.
+
+        Args:
+            calls (List[Tuple]): Tuples of ``(fn, args)``, ``(fn, args, kwargs)`` or ``(fn, args, kwargs,
+                resources)``, where ``fn`` is a Function which has been sent to this cluster. The calls can be
+                for different Functions, args and resources.
+            return_errors (bool): Return a ``(run_key, exception)`` tuple for each call, where ``exception``
+                is None unless the call couldn't be submitted (in which case ``run_key`` is None), rather than
+                raising the first exception once the rest have been submitted. (Default: ``False``)
+
+        Example:
+            >>> calls = [(preprocess, [path]) for path in paths] + [(train, [], {"epochs": 2})]
+            >>> run_keys = my_cluster.submit_many(calls)
+            >>> results = [my_cluster.get(run_key) for run_key in run_keys]
+        """
+        run_module_calls = []
+        for call in calls:
+            fn, args, kwargs, resources = (tuple(call) + (None, None))[:4]
+            run_module_calls.append(
+                fn._run_module_args(
+                    fn_type="remote", resources=resources, args=args, kwargs=kwargs
+                )
+            )
+        outcomes = self.run_module_batch(run_module_calls)
+        run_keys = [run_key for run_key, error in outcomes if error is None]
+        logger.info(
+            f"Submitted {len(run_keys)} remote calls to cluster. Results or logs can be retrieved with "
+            f"their run keys, e.g. `my_cluster.get(run_key, stream_logs=True)`"
+        )
+        if return_errors:
+            return outcomes
+        errors = [error for _, error in outcomes if error is not None]
+        if errors:
+            logger.error(
+                f"{len(errors)} of {len(outcomes)} calls could not be submitted, the rest were submitted with "
+                f"run keys {run_keys}"
+            )
+            raise errors[0]
+        return run_keys
+
     def is_connected(self):
         return self.client is not None and self.client.is_connected()
 
     def disconnect(self):
-        if self._grpc_tunnel:
-            self._grpc_tunnel.stop()
+        # Closes the connection for all the Cluster objects for this cluster in this process
+        if self.address:
+            connection_manager.close(self.address)
+        self._grpc_tunnel = None
+        self.client = None
         # if self.client:
         #     self.client.shutdown()
 
@@ -656,3 +1244,7 @@ class Cluster(Resource):
         """Remove conda env from the cluster."""
         env_name = env if isinstance(env, str) else env.env_name
         self.run([f"conda env remove -n {env_name}"])
+
+
+def _timestamp(t: Optional[Union[float, datetime]]) -> Optional[float]:
+    return t.timestamp() if isinstance(t, datetime) else t
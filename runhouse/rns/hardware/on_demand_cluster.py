@@ -14,6 +14,7 @@ from runhouse.rh_config import configs, rns_client
 
 from runhouse.rns.hardware.cluster import Cluster
 from runhouse.rns.utils.hardware import _current_cluster
+from runhouse.servers import tunnel_daemon
 
 logger = logging.getLogger(__name__)
 
@@ -340,6 +341,11 @@ class OnDemandCluster(Cluster):
         """Teardown cluster."""
         # Stream logs
         sky.down(self.name)
+        # Close the shared tunnel and channel to the old address
+        self.disconnect()
+        if configs.get("use_tunnel_daemon", False):
+            tunnel_daemon.close_tunnels(self.address)
+        self._invalidate_results()
         self.address = None
 
     def teardown_and_delete(self):
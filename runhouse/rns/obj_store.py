@@ -1,85 +1,769 @@
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from concurrent import futures
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import ray
+import ray.cloudpickle as pickle
 
+from runhouse.rns import spill
 from runhouse.rns.utils.hardware import _current_cluster
 
 
 THIS_CLUSTER = _current_cluster("cluster_name")
 
+logger = logging.getLogger(__name__)
+
+# The detached actor holding the cluster's object store, found by name when the server (re)starts
+ACTOR_NAME = "runhouse_obj_store"
+ACTOR_NAMESPACE = "runhouse"
+
+RUN_STATUSES = ("pending", "running", "done", "failed", "cancelled")
+
+
+class _Entry:
+    """An object ref in the store, with what's needed to decide when to evict it, and for runs, a record of the
+    run for listing and filtering keys."""
+
+    def __init__(
+        self,
+        obj_ref,
+        size=None,
+        is_run=False,
+        never_evict=False,
+        fn_name=None,
+        user=None,
+        outcome_ref=None,
+    ):
+        self.obj_ref = obj_ref
+        # Bytes held in the Ray object store (or on disk, if spilled), or None if not known yet (e.g. the run
+        # hasn't finished)
+        self.size = size
+        self.is_run = is_run
+        self.never_evict = never_evict
+        self.created = time.time()
+        # The file the value was spilled to, in which case obj_ref is None
+        self.spill_path = None
+        # Run keys are only unique on the cluster, the run ID is unique everywhere
+        self.run_id = uuid.uuid4().hex if is_run else None
+        self.fn_name = fn_name
+        self.user = user
+        # One of RUN_STATUSES for runs, with the time the store saw the run had finished
+        self.status = "pending" if is_run else None
+        self.finished = None
+        # For runs, the run's second return value, which tells how it ended without fetching its result (see
+        # run_module_utils.returning_outcome_fn_wrapper)
+        self.outcome_ref = outcome_ref
+
+
+@ray.remote(num_cpus=0)
+class ObjStoreActor:
+    """The authoritative copy of a cluster's object store entries. It's a detached actor, so it outlives the
+    server process, and objects put in the store are owned by it (via ``ray.put(..., _owner=...)``), so Ray
+    doesn't free them when the process which put them goes away. Each process using the store keeps a
+    read-through cache of the entries in an ``ObjStore``."""
+
+    def __init__(self):
+        self.entries: Dict[str, _Entry] = {}
+
+    def put(self, key: str, entry: _Entry):
+        self.entries[key] = entry
+
+    def put_many(self, entries: Dict[str, _Entry]):
+        self.entries.update(entries)
+
+    def get(self, key: str) -> Optional[_Entry]:
+        return self.entries.get(key)
+
+    def get_many(self, keys: List[str]) -> Dict[str, _Entry]:
+        return {key: self.entries[key] for key in keys if key in self.entries}
+
+    def keys(self) -> List[str]:
+        return list(self.entries)
+
+    def items(self) -> Dict[str, _Entry]:
+        return dict(self.entries)
+
+    def delete(self, keys: List[str]):
+        for key in keys:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        self.entries = {}
+
 
 class ObjStore:
     """Class to handle object storage for Runhouse. Object storage for a cluster is
-    stored in the Ray GCS, if available."""
+    stored in the Ray GCS, if available.
+
+    The store can be given a memory budget (``max_bytes``), above which the least recently used entries are
+    evicted, and a time to live (``ttl``), after which entries are evicted however recently they were used. Runs
+    are only evicted once they've finished, and entries put with ``never_evict`` are never evicted (only
+    deleted or cleared). Evicting an entry drops the store's reference to it, so Ray can free its memory.
+
+    With a spill directory (see :meth:`set_spill`), entries evicted for the memory budget are written to disk
+    instead of dropped, numpy arrays and Arrow tables in formats which are memory-mapped back rather than
+    deserialized, and are put back in Ray's object store the next time they're used. Spilled entries are
+    dropped (least recently used first) once they're over the spill budget, and when they expire.
 
-    # Note, if we turn this into a ray actor we could get it by a string on server restart, which
-    # would allow us to persist the store across server restarts. Unclear if this is desirable yet.
-    # https://docs.ray.io/en/latest/ray-core/package-ref.html#ray-get-actor
+    On a cluster, the entries are held by a detached, named :class:`ObjStoreActor`, which the server reattaches
+    to when it restarts, so pinned objects and the records of runs survive a server restart or upgrade (though
+    not ``ray stop``). This class is then a read-through cache of the actor in each process, which writes its
+    changes through to the actor. Runs' results are owned by the server process which submitted them (Ray can't
+    hand an object to a new owner without copying it), so they're lost with it: after a restart, runs are still
+    listed, but getting their results fails. Without Ray (or the actor), the store is local to the process.
+
+    Runs are recorded as finished (with how they ended and their size) by a background thread in the process
+    which submitted them, which waits on them with ``ray.wait`` rather than checking on every call to the store."""
 
     RH_LOGFILE_PATH = Path.home() / ".rh/logs"
+    DEFAULT_SPILL_DIR = "~/.rh/spill"
+    # How long runs submitted while the sweep is waiting on others can wait to be picked up
+    SWEEP_INTERVAL = 0.1
 
-    def __init__(self, cluster_name: Optional[str] = None):
+    def __init__(
+        self,
+        cluster_name: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[float] = None,
+    ):
         self.cluster_name = cluster_name or THIS_CLUSTER
-        self._obj_store_cache = {}
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # In order of last use, least recent first
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.evictions = {"lru": 0, "ttl": 0}
+        self.evicted_bytes = 0
+        self.spill_dir = None
+        self.spill_max_bytes = None
+        self.spills = 0
+        self.promotions = 0
         self.imported_modules = {}
+        self._actor = None
+        self._attach_tried = False
+        # Runs which haven't been seen to finish yet, and the futures waiting for them to, by object ref
+        self._unfinished: Dict[Any, Tuple[str, _Entry]] = {}
+        self._finish_waiters: Dict[Any, List[futures.Future]] = {}
+        self._sweep_wakeup = threading.Event()
+        self._sweep_thread = None
+
+    def attach(self, load_entries: bool = True):
+        """Attach to the cluster's object store actor, creating it if there isn't one yet, and with
+        ``load_entries``, load all the entries it holds (e.g. from before the server restarted). Otherwise entries
+        are looked up in the actor one by one as they're used."""
+        self._attach_tried = True
+        try:
+            actor = _get_or_create_actor()
+            entries = ray.get(actor.items.remote()) if load_entries else {}
+        except Exception as e:
+            logger.warning(
+                f"Could not attach to the object store actor, the store will be local to this process: {e}"
+            )
+            return
+        with self._lock:
+            self._actor = actor
+            # Ahead of anything this process already used, oldest first
+            for key, entry in sorted(
+                entries.items(), key=lambda kv: kv[1].created, reverse=True
+            ):
+                if key not in self._entries:
+                    self._entries[key] = entry
+                    self._entries.move_to_end(key, last=False)
+                    if _unfinished(entry):
+                        self._track_run(key, entry)
+            self._evict()
+        if entries:
+            logger.info(f"Reattached to {len(entries)} object store entries")
+
+    def _store_actor(self):
+        # Processes other than the server (e.g. Ray workers pinning objects) attach the first time they use
+        # the store on a cluster, without loading everything in it
+        if self._actor is None and not self._attach_tried:
+            if self.cluster_name and ray.is_initialized():
+                self.attach(load_entries=False)
+            else:
+                self._attach_tried = True
+        return self._actor
+
+    def set_limits(self, max_bytes: Optional[int] = None, ttl: Optional[float] = None):
+        """Set the memory budget in bytes and the time to live in seconds (``None`` for no limit), evicting
+        whatever is now over them."""
+        with self._lock:
+            self.max_bytes = max_bytes
+            self.ttl = ttl
+            self._evict()
+
+    def set_spill(self, spill_dir: Optional[str], max_bytes: Optional[int] = None):
+        """Spill entries evicted for the memory budget to files in ``spill_dir``, up to ``max_bytes`` on disk
+        (``None`` for no limit). A ``spill_dir`` of ``None`` or ``max_bytes`` of 0 turns spilling off."""
+        with self._lock:
+            self.spill_dir = (
+                str(Path(spill_dir).expanduser())
+                if spill_dir and max_bytes != 0
+                else None
+            )
+            self.spill_max_bytes = max_bytes
+            self._evict()
+
+    def remove_orphaned_spill_files(self):
+        """Remove files in the spill directory which no entry refers to, e.g. left from before Ray restarted."""
+        if self.spill_dir is None or not Path(self.spill_dir).is_dir():
+            return
+        with self._lock:
+            in_use = {entry.spill_path for entry in self._entries.values()}
+            for path in Path(self.spill_dir).iterdir():
+                if str(path) not in in_use:
+                    spill.remove(str(path))
 
     @property
     def obj_store_cache(self):
-        return self._obj_store_cache
+        return _ObjRefs(self)
 
     @obj_store_cache.setter
     def obj_store_cache(self, value: Dict):
-        self._obj_store_cache = value
+        with self._lock:
+            self._entries = OrderedDict(
+                (key, _Entry(obj_ref)) for key, obj_ref in value.items()
+            )
+
+    def put(
+        self,
+        key: str,
+        value: Any,
+        size: Optional[int] = None,
+        never_evict: bool = False,
+    ):
+        """Put ``value`` in the store. ``size`` is its size in bytes serialized, if already known (otherwise it's
+        measured). Entries put with ``never_evict`` aren't evicted when the store is over its budget or TTL."""
+        self._store_actor()
+        obj_ref = self._ray_put(value)
+        if size is None:
+            size = _object_size(value)
+        self._put_entry(key, _Entry(obj_ref, size=size, never_evict=never_evict))
+
+    def put_many(
+        self,
+        values: Dict[str, Any],
+        sizes: Optional[Dict[str, int]] = None,
+        never_evict: bool = False,
+    ) -> Dict[str, Exception]:
+        """Put many values in the store at once, with one eviction pass and one call to the store's actor.
+        ``sizes`` has the sizes in bytes serialized of any values they're already known for. Returns the errors
+        for any values which couldn't be put, by key."""
+        self._store_actor()
+        sizes = sizes or {}
+        entries, errors = {}, {}
+        for key, value in values.items():
+            try:
+                obj_ref = self._ray_put(value)
+            except Exception as e:
+                errors[key] = e
+                continue
+            size = sizes.get(key)
+            entries[key] = _Entry(
+                obj_ref,
+                size=_object_size(value) if size is None else size,
+                never_evict=never_evict,
+            )
+        self._put_entries(entries)
+        return errors
+
+    def put_obj_ref(self, key, obj_ref, fn_name=None, user=None, outcome_ref=None):
+        self._store_actor()
+        entry = _Entry(
+            obj_ref, is_run=True, fn_name=fn_name, user=user, outcome_ref=outcome_ref
+        )
+        self._put_entry(key, entry)
+        if _unfinished(entry):
+            with self._lock:
+                self._track_run(key, entry)
 
-    def put(self, key: str, value: Any):
-        obj_ref = ray.put(value)
-        self.obj_store_cache[key] = obj_ref
+    def __contains__(self, key: str) -> bool:
+        # Only what this process has seen, without going to the store's actor
+        return key in self._entries
 
-    def put_obj_ref(self, key, obj_ref):
-        self.obj_store_cache[key] = obj_ref
+    def _put_entry(self, key, entry):
+        self._put_entries({key: entry})
+
+    def _put_entries(self, entries):
+        with self._lock:
+            for key, entry in entries.items():
+                self._remove_spilled(self._entries.pop(key, None))
+                self._entries[key] = entry
+            if self._actor is not None and entries:
+                self._actor.put_many.remote(entries)
+            self._evict()
+
+    def is_run_result(self, key: str) -> bool:
+        """Whether ``key`` holds the result of a run, which won't change once the run has finished."""
+        entry = self._entries.get(key)
+        return entry is not None and entry.is_run
 
     def get(
         self, key: str, default: Optional[Any] = None, timeout: Optional[float] = None
     ):
-        obj_ref = self.obj_store_cache.get(key, None)
+        obj_ref = self.get_obj_ref(key)
         if obj_ref:
             return ray.get(obj_ref, timeout=timeout)
         else:
             return default
 
+    def get_many(
+        self, keys: List[str], timeout: Optional[float] = None
+    ) -> Tuple[Dict[str, Any], Dict[str, Exception]]:
+        """Get the values of ``keys`` with a single ``ray.get``. Returns the values got, by key, and the errors for
+        the rest: a ``KeyError`` for keys which aren't in the store, or the exception a run raised (in which case
+        the other values are got one by one). Raises a ``GetTimeoutError`` after ``timeout`` seconds."""
+        found = self.get_obj_refs(keys)
+        obj_refs = {key: found[key] for key in keys if key in found}
+        errors = {key: KeyError(key) for key in keys if key not in found}
+        try:
+            values = ray.get(list(obj_refs.values()), timeout=timeout)
+            return dict(zip(obj_refs, values)), errors
+        except ray.exceptions.GetTimeoutError:
+            raise
+        except Exception:
+            pass
+
+        values = {}
+        for key, obj_ref in obj_refs.items():
+            try:
+                values[key] = ray.get(obj_ref, timeout=timeout)
+            except ray.exceptions.GetTimeoutError:
+                raise
+            except Exception as e:
+                errors[key] = e
+        return values, errors
+
+    def get_obj_ref(self, key: str):
+        return self.get_obj_refs([key]).get(key)
+
+    def get_obj_refs(self, keys: List[str]) -> Dict[str, Any]:
+        """The object refs of whichever of ``keys`` are in the store, by key, with a single call to the store's
+        actor for all the keys this process hasn't seen."""
+        self._lookup_many(keys)
+        obj_refs = {}
+        with self._lock:
+            now = time.time()
+            for key in keys:
+                # Looked up again, in case it was deleted or replaced in the meantime
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                if self._evictable(entry) and self._expired(entry, now):
+                    self._pop_entry(key, "ttl")
+                    continue
+                self._entries.move_to_end(key)
+                obj_ref = (
+                    entry.obj_ref
+                    if entry.spill_path is None
+                    else self._promote(key, entry)
+                )
+                if obj_ref is not None:
+                    obj_refs[key] = obj_ref
+        return obj_refs
+
+    def _lookup(self, key):
+        return self._lookup_many([key]).get(key)
+
+    def _lookup_many(self, keys):
+        """The entries for whichever of ``keys`` are in the store, reading through to the store's actor (e.g. for
+        objects another process pinned) for any this process hasn't seen. The lock isn't held while waiting on the
+        actor, so other calls to the store aren't held up behind it."""
+        actor = self._store_actor()
+        with self._lock:
+            entries = {key: self._entries[key] for key in keys if key in self._entries}
+        missing = list(dict.fromkeys(key for key in keys if key not in entries))
+        if missing and actor is not None:
+            found = ray.get(actor.get_many.remote(missing))
+            with self._lock:
+                for key, entry in found.items():
+                    # Unless this process put the key while the actor was being asked
+                    entries[key] = self._entries.setdefault(key, entry)
+        return entries
+
+    def run_finished(self, key: str) -> Optional[futures.Future]:
+        """A future for how the run at ``key`` ends (``"done"``, ``"failed"`` or ``"cancelled"``), set once the
+        store sees it finish, or already set if it has (or ``key`` was put rather than run). None if ``key`` isn't
+        in the store."""
+        future = futures.Future()
+        self._lookup(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if _unfinished(entry):
+                self._finish_waiters.setdefault(entry.obj_ref, []).append(future)
+                self._track_run(key, entry)
+            else:
+                future.set_result(entry.status or "done")
+        return future
+
+    def _promote(self, key, entry):
+        """Put a spilled entry back in Ray's object store, making room for it if needed."""
+        try:
+            value = spill.read(entry.spill_path)
+        except Exception as e:
+            logger.warning(f"Could not read {key} back from {entry.spill_path}: {e}")
+            self._pop_entry(key, "lru")
+            return None
+        obj_ref = self._ray_put(value)
+        spill.remove(entry.spill_path)
+        entry.obj_ref, entry.spill_path = obj_ref, None
+        self.promotions += 1
+        if self._actor is not None:
+            self._actor.put.remote(key, entry)
+        self._evict()
+        # Even if evicting spilled it again, the ref keeps the value in Ray's object store while it's used
+        return obj_ref
+
+    def _ray_put(self, value):
+        return (
+            ray.put(value)
+            if self._actor is None
+            else ray.put(value, _owner=self._actor)
+        )
+
     def get_obj_refs_list(self, keys: List):
-        return [
-            self.obj_store_cache.get(key, key) if isinstance(key, str) else key
-            for key in keys
-        ]
+        obj_refs = self.get_obj_refs([key for key in keys if isinstance(key, str)])
+        return [obj_refs.get(key, key) if isinstance(key, str) else key for key in keys]
 
     def get_obj_refs_dict(self, d: Dict):
+        obj_refs = self.get_obj_refs([v for v in d.values() if isinstance(v, str)])
         return {
-            k: self.obj_store_cache.get(v, v) if isinstance(v, str) else v
-            for k, v in d.items()
+            k: obj_refs.get(v, v) if isinstance(v, str) else v for k, v in d.items()
         }
 
     def keys(self):
-        return list(self.obj_store_cache.keys())
+        actor = self._store_actor()
+        if actor is not None:
+            self._lookup_many(ray.get(actor.keys.remote()))
+        with self._lock:
+            self._evict()
+            return list(self._entries.keys())
 
     def delete(self, key: str):
-        self.obj_store_cache.pop(key, None)
+        self.delete_many([key])
+
+    def delete_many(self, keys: List[str]) -> List[str]:
+        """Delete ``keys`` from the store, returning the ones which were in it."""
+        actor = self._store_actor()
+        found = None
+        with self._lock:
+            entries = {
+                key: self._entries.pop(key) for key in keys if key in self._entries
+            }
+            if actor is not None:
+                missing = [key for key in keys if key not in entries]
+                # Both only submitted under the lock, the actor runs them in order
+                if missing:
+                    found = actor.get_many.remote(missing)
+                actor.delete.remote(list(keys))
+        if found is not None:
+            entries.update(ray.get(found))
+        for entry in entries.values():
+            self._remove_spilled(entry)
+        return [key for key in keys if key in entries]
 
     def pop(self, key: str, default: Optional[Any] = None):
-        return self.obj_store_cache.pop(key, default)
+        entry = self._take(key)
+        if entry is None:
+            return default
+        if entry.spill_path is not None:
+            entry.obj_ref = self._ray_put(spill.read(entry.spill_path))
+            self._remove_spilled(entry)
+        return entry.obj_ref
+
+    def _take(self, key):
+        """Remove ``key`` from the store, returning its entry (or None if there wasn't one)."""
+        actor = self._store_actor()
+        found = None
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if actor is not None:
+                if entry is None:
+                    found = actor.get.remote(key)
+                actor.delete.remote([key])
+        if found is not None:
+            entry = ray.get(found)
+        return entry
 
     def clear(self):
-        self.obj_store_cache = {}
+        actor = self._store_actor()
+        with self._lock:
+            for entry in self._entries.values():
+                self._remove_spilled(entry)
+            self._entries = OrderedDict()
+            if actor is not None:
+                actor.clear.remote()
 
     def cancel(self, key: str, force: bool = False, recursive: bool = True):
-        obj_ref = self.obj_store_cache.get(key, None)
+        with self._lock:
+            # Not get_obj_ref, which would read back a spilled entry (which is finished anyway)
+            entry = self._entries.get(key)
+            obj_ref = entry.obj_ref if entry is not None else None
+            if entry is not None and entry.status in ("pending", "running"):
+                entry.status, entry.finished = "cancelled", time.time()
+                if self._actor is not None:
+                    self._actor.put.remote(key, entry)
         if obj_ref:
             ray.cancel(obj_ref, force=force, recursive=recursive)
 
+    def query(
+        self,
+        prefix: Optional[str] = None,
+        statuses: Optional[List[str]] = None,
+        submitted_after: Optional[float] = None,
+        submitted_before: Optional[float] = None,
+        limit: Optional[int] = None,
+        page_token: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Records of the keys in the store, oldest first, with the key, ``run_id``, ``fn_name``, ``submitted`` and
+        ``finished`` times (in seconds since the epoch), ``status`` (one of ``RUN_STATUSES``), ``size`` in bytes
+        and ``user`` (all but the key, submit time and size are None for objects which were put rather than run).
+
+        Only keys starting with ``prefix``, runs with one of ``statuses``, and keys submitted in
+        ``[submitted_after, submitted_before)`` are included. Returns at most ``limit`` records, and a page
+        token to pass back for the next page (None if there are no more).
+        """
+        if limit is not None and limit < 1:
+            raise ValueError(f"limit must be at least 1, got {limit}")
+        self.keys()
+        with self._lock:
+            items = sorted(
+                self._entries.items(), key=lambda item: (item[1].created, item[0])
+            )
+        after = _parse_page_token(page_token)
+        records = []
+        for key, entry in items:
+            if after is not None and (entry.created, key) <= after:
+                continue
+            if prefix and not key.startswith(prefix):
+                continue
+            if submitted_after is not None and entry.created < submitted_after:
+                continue
+            if submitted_before is not None and entry.created >= submitted_before:
+                continue
+            if statuses and self._status(key, entry) not in statuses:
+                continue
+            if limit is not None and len(records) == limit:
+                last = records[-1]
+                return records, f"{last['submitted']!r}:{last['key']}"
+            records.append(self._record(key, entry))
+        return records, None
+
+    def _status(self, key, entry):
+        # A run's log directory is made when its Ray task starts
+        if entry.status == "pending" and (self.RH_LOGFILE_PATH / key).exists():
+            entry.status = "running"
+        return entry.status
+
+    def _record(self, key, entry):
+        return {
+            "key": key,
+            "run_id": entry.run_id,
+            "fn_name": entry.fn_name,
+            "submitted": entry.created,
+            "finished": entry.finished,
+            "status": self._status(key, entry),
+            "size": entry.size,
+            "user": entry.user,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Number of entries and bytes in the store, its limits, and how much has been evicted (by policy)."""
+        with self._lock:
+            self._evict()
+            entries = list(self._entries.values())
+            spilled = [entry for entry in entries if entry.spill_path is not None]
+            return {
+                "entries": len(entries),
+                "bytes": self._bytes_in_memory(),
+                "never_evict": sum(1 for entry in entries if entry.never_evict),
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "evicted_lru": self.evictions["lru"],
+                "evicted_ttl": self.evictions["ttl"],
+                "evicted_bytes": self.evicted_bytes,
+                "spilled": len(spilled),
+                "spilled_bytes": sum(entry.size or 0 for entry in spilled),
+                "spill_max_bytes": self.spill_max_bytes
+                if self.spill_dir is not None
+                else None,
+                "spills": self.spills,
+                "promotions": self.promotions,
+            }
+
+    def _bytes_in_memory(self):
+        return sum(
+            entry.size or 0
+            for entry in self._entries.values()
+            if entry.spill_path is None
+        )
+
+    def _evict(self):
+        """Evict expired entries, then the least recently used ones until the store is within its budget (spilling
+        them to disk, if there's a spill directory), then the least recently used spilled entries until they're
+        within the spill budget."""
+        if self.max_bytes is None and self.ttl is None:
+            return
+        now = time.time()
+        evictable = [
+            key for key, entry in self._entries.items() if self._evictable(entry)
+        ]
+        if self.ttl is not None:
+            for key in evictable:
+                if self._expired(self._entries[key], now):
+                    self._pop_entry(key, "ttl")
+        if self.max_bytes is not None:
+            total = self._bytes_in_memory()
+            for key in evictable:
+                if total <= self.max_bytes:
+                    break
+                entry = self._entries.get(key)
+                if entry is not None and entry.spill_path is None:
+                    total -= entry.size or 0
+                    if not self._spill(key, entry):
+                        self._pop_entry(key, "lru")
+        if self.spill_dir is not None and self.spill_max_bytes is not None:
+            spilled = [
+                (key, entry)
+                for key, entry in self._entries.items()
+                if entry.spill_path is not None
+            ]
+            total = sum(entry.size or 0 for _, entry in spilled)
+            for key, entry in spilled:
+                if total <= self.spill_max_bytes:
+                    break
+                total -= entry.size or 0
+                self._pop_entry(key, "lru")
+
+    def _spill(self, key, entry) -> bool:
+        """Move an entry's value from Ray's object store to a file in the spill directory, returning whether it
+        was spilled (it isn't if there's no spill directory, it's too big, or it's a failed run's error)."""
+        if self.spill_dir is None or (
+            self.spill_max_bytes is not None
+            and (entry.size or 0) > self.spill_max_bytes
+        ):
+            return False
+        try:
+            value = ray.get(entry.obj_ref)
+        except Exception:
+            return False
+        try:
+            entry.spill_path, entry.size = spill.write(self.spill_dir, key, value)
+        except Exception as e:
+            logger.warning(f"Could not spill {key} to {self.spill_dir}: {e}")
+            return False
+        entry.obj_ref = None
+        self.spills += 1
+        if self._actor is not None:
+            self._actor.put.remote(key, entry)
+        logger.info(f"Spilled {key} from object store to disk")
+        return True
+
+    @staticmethod
+    def _remove_spilled(entry):
+        if entry is not None and entry.spill_path is not None:
+            spill.remove(entry.spill_path)
+
+    def _pop_entry(self, key, reason):
+        entry = self._entries.pop(key)
+        self._remove_spilled(entry)
+        if self._actor is not None:
+            self._actor.delete.remote([key])
+        self.evictions[reason] += 1
+        self.evicted_bytes += entry.size or 0
+        logger.info(f"Evicted {key} from object store ({reason})")
+
+    def _expired(self, entry, now):
+        return self.ttl is not None and now - entry.created > self.ttl
+
+    @staticmethod
+    def _evictable(entry):
+        # A run's size is measured once it has finished (and it isn't evicted before), and put objects are
+        # measured when they're put
+        return not entry.never_evict and entry.size is not None
+
+    def _track_run(self, key, entry):
+        """Have the sweep thread record the run at ``key`` when it finishes, starting the thread if needed."""
+        self._unfinished[entry.obj_ref] = (key, entry)
+        if self._sweep_thread is None:
+            self._sweep_thread = threading.Thread(target=self._sweep, daemon=True)
+            self._sweep_thread.start()
+        self._sweep_wakeup.set()
+
+    def _sweep(self):
+        while True:
+            with self._lock:
+                obj_refs = list(self._unfinished)
+            if not obj_refs:
+                self._sweep_wakeup.wait()
+                self._sweep_wakeup.clear()
+                continue
+            try:
+                ready, _ = ray.wait(
+                    obj_refs,
+                    num_returns=1,
+                    timeout=self.SWEEP_INTERVAL,
+                    fetch_local=False,
+                )
+                if ready:
+                    # Pick up any others which finished in the meantime
+                    ready, _ = ray.wait(
+                        obj_refs,
+                        num_returns=len(obj_refs),
+                        timeout=0,
+                        fetch_local=False,
+                    )
+                    self._finish_runs(ready)
+            except Exception as e:
+                logger.warning(f"Could not record finished runs: {e}")
+                time.sleep(self.SWEEP_INTERVAL)
+
+    def _finish_runs(self, obj_refs):
+        """Record how finished runs ended and their sizes, and wake anything waiting for them to finish. How they
+        ended comes from their outcome refs, which are small, so their results are never fetched."""
+        finished = time.time()
+        sizes = _ray_object_sizes(obj_refs)
+        with self._lock:
+            outcome_refs = {
+                obj_ref: self._unfinished[obj_ref][1].outcome_ref
+                for obj_ref in obj_refs
+                if obj_ref in self._unfinished
+            }
+        statuses = {
+            obj_ref: _run_outcome(outcome_ref)
+            for obj_ref, outcome_ref in outcome_refs.items()
+        }
+        with self._lock:
+            for obj_ref, status in statuses.items():
+                if obj_ref not in self._unfinished:
+                    continue
+                key, entry = self._unfinished.pop(obj_ref)
+                # Unless it failed because it was cancelled (e.g. its worker was killed)
+                if status == "failed" and entry.status == "cancelled":
+                    status = "cancelled"
+                entry.status, entry.finished = status, finished
+                entry.size = sizes[obj_ref]
+                if self._actor is not None and self._entries.get(key) is entry:
+                    self._actor.put.remote(key, entry)
+                for future in self._finish_waiters.pop(obj_ref, []):
+                    # Unless whatever was waiting gave up
+                    if future.set_running_or_notify_cancel():
+                        future.set_result(status)
+            self._evict()
+
     def get_logfiles(self, key: str, log_type=None):
         # Info on ray logfiles: https://docs.ray.io/en/releases-2.2.0/ray-observability/ray-logging.html#id1
-        obj_ref = self.obj_store_cache.get(key, None)
+        obj_ref = self.get_obj_ref(key)
         if obj_ref:
             # Logs are like worker-[worker_id]-[job_id]-[pid].[out|err]
             key_logs_path = Path(self.RH_LOGFILE_PATH) / key
@@ -100,3 +784,97 @@ class ObjStore:
 
     def __str__(self):
         return f"ObjStore({self.obj_store_cache})"
+
+
+def _run_outcome(outcome_ref) -> str:
+    """How a finished run ended (``"done"``, ``"failed"`` or ``"cancelled"``), from its outcome ref."""
+    if outcome_ref is None:
+        # Submitted without one (e.g. a ref put directly), and there's no telling without fetching the result
+        return "done"
+    try:
+        ray.get(outcome_ref, timeout=0)
+    except ray.exceptions.TaskCancelledError:
+        return "cancelled"
+    except Exception:
+        return "failed"
+    return "done"
+
+
+class _ObjRefs(MutableMapping):
+    """The store's object refs by key, as the plain dict the store used to be. Writes go through the store, as
+    runs put with :meth:`ObjStore.put_obj_ref`."""
+
+    def __init__(self, obj_store: ObjStore):
+        self._obj_store = obj_store
+
+    def __getitem__(self, key):
+        return self._obj_store._entries[key].obj_ref
+
+    def __setitem__(self, key, obj_ref):
+        self._obj_store.put_obj_ref(key, obj_ref)
+
+    def __delitem__(self, key):
+        if not self._obj_store.delete_many([key]):
+            raise KeyError(key)
+
+    def __iter__(self):
+        return iter(list(self._obj_store._entries))
+
+    def __len__(self):
+        return len(self._obj_store._entries)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+def _unfinished(entry):
+    # A run's size is measured once it has finished
+    return entry.size is None and isinstance(entry.obj_ref, ray.ObjectRef)
+
+
+def _parse_page_token(page_token):
+    if not page_token:
+        return None
+    submitted, key = page_token.split(":", 1)
+    return float(submitted), key
+
+
+def _get_or_create_actor():
+    try:
+        return ray.get_actor(ACTOR_NAME, namespace=ACTOR_NAMESPACE)
+    except ValueError:
+        pass
+    try:
+        return ObjStoreActor.options(
+            name=ACTOR_NAME, namespace=ACTOR_NAMESPACE, lifetime="detached"
+        ).remote()
+    except ValueError:
+        # Another process created it first
+        return ray.get_actor(ACTOR_NAME, namespace=ACTOR_NAMESPACE)
+
+
+def _object_size(value) -> int:
+    from runhouse.servers.grpc.serialization import nbytes
+
+    size = nbytes(value)
+    if size:
+        return size
+    try:
+        return len(pickle.dumps(value))
+    except Exception:
+        return 0
+
+
+def _ray_object_sizes(obj_refs) -> Dict[Any, int]:
+    """Sizes in bytes of finished objects in the Ray object store, 0 for any Ray doesn't know the size of."""
+    sizes = {obj_ref: 0 for obj_ref in obj_refs}
+    if not obj_refs:
+        return sizes
+    try:
+        locations = ray.experimental.get_object_locations(obj_refs)
+    except Exception as e:
+        logger.debug(f"Could not get object sizes from Ray: {e}")
+        return sizes
+    for obj_ref, location in locations.items():
+        sizes[obj_ref] = (location or {}).get("object_size") or 0
+    return sizes
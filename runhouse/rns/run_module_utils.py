@@ -1,7 +1,10 @@
+import asyncio
 import importlib
 import logging
 import os
 import sys
+import threading
+import traceback
 from datetime import datetime
 from functools import wraps
 from pathlib import Path
@@ -10,10 +13,17 @@ import ray
 import ray.cloudpickle as pickle
 
 from runhouse import rh_config
+from runhouse.servers.grpc.serialization import (
+    deserialize_with_buffers,
+    serialize_result,
+)
 
 
 logger = logging.getLogger(__name__)
 
+# Number of calls in a batch (see the "batch" fn_type) run one after another in each Ray task
+BATCH_TASK_SIZE = 64
+
 
 def call_fn_by_type(
     fn_type,
@@ -24,76 +34,479 @@ def call_fn_by_type(
     conda_env=None,
     args=None,
     kwargs=None,
+    oob_buffers=False,
+    serialize=True,
+    timeout=None,
 ):
-    run_key = f"{fn_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    """Run the function on the cluster's Ray runtime according to ``fn_type``. Unless the function is nested or
+    ``serialize`` is ``False`` (for callers in the same process), results are returned serialized, and if
+    ``oob_buffers`` is set they're returned as a ``(data, buffers)`` tuple with large buffers pickled
+    out-of-band. If the function doesn't finish within ``timeout`` seconds, its Ray tasks are cancelled and a
+    ``TimeoutError`` is raised."""
+    # TODO other possible fn_types: 'streaming'
+    if fn_type == "call" and not serialize:
+        # Same as a call, but without serializing the result in the worker
+        fn_type = "nested"
+    result = _call_fn_by_type(
+        fn_type,
+        fn_name,
+        relative_path,
+        module_name,
+        resources,
+        conda_env,
+        args,
+        kwargs,
+        oob_buffers,
+        timeout,
+    )
+    return _format_result(fn_type, result, oob_buffers) if serialize else result
+
 
-    # TODO other possible fn_types: 'batch', 'streaming'
+def _call_fn_by_type(
+    fn_type,
+    fn_name,
+    relative_path,
+    module_name,
+    resources,
+    conda_env=None,
+    args=None,
+    kwargs=None,
+    oob_buffers=False,
+    timeout=None,
+):
     if fn_type == "get":
-        obj_ref = args[0]
-        res = pickle.dumps(rh_config.obj_store.get(obj_ref))
+        return rh_config.obj_store.get(args[0], timeout=timeout)
+
+    run_key, obj_ref = submit_fn_by_type(
+        fn_type,
+        fn_name,
+        relative_path,
+        module_name,
+        resources,
+        conda_env,
+        args,
+        kwargs,
+        oob_buffers,
+    )
+    if fn_type == "remote":
+        return run_key
+    try:
+        return ray.get(obj_ref, timeout=timeout)
+    except ray.exceptions.GetTimeoutError as e:
+        cancel_obj_refs(obj_ref)
+        raise TimeoutError(
+            f"Call to {fn_name} did not finish within {timeout} seconds"
+        ) from e
+
+
+def submit_fn_by_type(
+    fn_type,
+    fn_name,
+    relative_path,
+    module_name,
+    resources,
+    conda_env=None,
+    args=None,
+    kwargs=None,
+    oob_buffers=False,
+):
+    """Submit the Ray task(s) for the function without waiting on them. Returns the run key and the object ref,
+    or list of object refs for map, starmap and repeat."""
+    run_key = _run_key(fn_name)
 
+    args = rh_config.obj_store.get_obj_refs_list(args)
+    kwargs = rh_config.obj_store.get_obj_refs_dict(kwargs)
+
+    num_tasks = len(args) if fn_type in ["map", "starmap"] else 1
+    ray_fn, module_path, num_cuda_devices = _ray_fn_for(
+        get_fn_from_pointers,
+        run_key,
+        fn_type,
+        relative_path,
+        resources,
+        conda_env,
+        num_tasks,
+    )
+    fn_pointers = (module_path, module_name, fn_name)
+
+    if fn_type == "map":
+        obj_ref = [
+            ray_fn.remote(
+                fn_pointers, fn_type, num_cuda_devices, oob_buffers, arg, **kwargs
+            )
+            for arg in args
+        ]
+    elif fn_type == "starmap":
+        obj_ref = [
+            ray_fn.remote(
+                fn_pointers, fn_type, num_cuda_devices, oob_buffers, *arg, **kwargs
+            )
+            for arg in args
+        ]
+    elif fn_type in ("queue", "remote", "call", "nested"):
+        obj_ref = ray_fn.remote(
+            fn_pointers, fn_type, num_cuda_devices, oob_buffers, *args, **kwargs
+        )
+    elif fn_type == "repeat":
+        [num_repeats, args] = args
+        obj_ref = [
+            ray_fn.remote(
+                fn_pointers, fn_type, num_cuda_devices, oob_buffers, *args, **kwargs
+            )
+            for _ in range(num_repeats)
+        ]
     else:
-        args = rh_config.obj_store.get_obj_refs_list(args)
-        kwargs = rh_config.obj_store.get_obj_refs_dict(kwargs)
-
-        ray.init(ignore_reinit_error=True)
-        num_gpus = ray.cluster_resources().get("GPU", 0)
-        num_cuda_devices = resources.get("num_gpus") or num_gpus
-
-        # We need to add the module_path to the PYTHONPATH because ray runs remotes in a new process
-        # We need to set max_calls to make sure ray doesn't cache the remote function and ignore changes to the module
-        # See: https://docs.ray.io/en/releases-2.2.0/ray-core/package-ref.html#ray-remote
-        module_path = (
-            str((Path.home() / relative_path).resolve()) if relative_path else None
+        raise ValueError(f"fn_type {fn_type} not recognized")
+
+    if fn_type == "remote":
+        obj_ref, outcome_ref = obj_ref
+        rh_config.obj_store.put_obj_ref(
+            key=run_key, obj_ref=obj_ref, fn_name=fn_name, outcome_ref=outcome_ref
         )
-        runtime_env = {"env_vars": {"PYTHONPATH": module_path or ""}}
-        if conda_env:
-            runtime_env["conda"] = conda_env
-
-        fn_pointers = (module_path, module_name, fn_name)
-        logging_wrapped_fn = enable_logging_fn_wrapper(get_fn_from_pointers, run_key)
-
-        ray_fn = ray.remote(
-            num_cpus=resources.get("num_cpus") or 0.0001,
-            num_gpus=resources.get("num_gpus") or 0.0001 if num_gpus > 0 else None,
-            max_calls=len(args) if fn_type in ["map", "starmap"] else 1,
-            runtime_env=runtime_env,
-        )(logging_wrapped_fn)
-
-        if fn_type == "map":
-            obj_ref = [
-                ray_fn.remote(fn_pointers, fn_type, num_cuda_devices, arg, **kwargs)
-                for arg in args
-            ]
-        elif fn_type == "starmap":
-            obj_ref = [
-                ray_fn.remote(fn_pointers, fn_type, num_cuda_devices, *arg, **kwargs)
-                for arg in args
-            ]
-        elif fn_type in ("queue", "remote", "call", "nested"):
-            obj_ref = ray_fn.remote(
-                fn_pointers, fn_type, num_cuda_devices, *args, **kwargs
+    return run_key, obj_ref
+
+
+async def acall_serialized_fn_by_type(
+    fn_type,
+    fn_name,
+    relative_path,
+    module_name,
+    resources,
+    conda_env=None,
+    args=None,
+    kwargs=None,
+    num_repeats=0,
+    serialized_fn=None,
+    oob_buffers=False,
+    user=None,
+):
+    """Like :func:`call_fn_by_type`, but with args and kwargs still serialized as sent by the client, and
+    awaiting the Ray object refs instead of blocking on them. See :func:`submit_serialized_fn_by_type`."""
+    if fn_type == "get":
+        _, _, keys = args[0]
+        obj_ref = rh_config.obj_store.get_obj_ref(keys.get("0"))
+        res = await obj_ref if obj_ref is not None else None
+        return serialize_result(res, oob_buffers)
+
+    run_key, obj_ref = submit_serialized_fn_by_type(
+        fn_type,
+        fn_name,
+        relative_path,
+        module_name,
+        resources,
+        conda_env,
+        args,
+        kwargs,
+        num_repeats,
+        serialized_fn,
+        oob_buffers,
+        user,
+    )
+    if fn_type == "remote":
+        return serialize_result(run_key, oob_buffers)
+    try:
+        if isinstance(obj_ref, list):
+            result = list(await asyncio.gather(*obj_ref))
+        else:
+            result = await obj_ref
+    except asyncio.CancelledError:
+        # The client gave up (its deadline passed or it went away), so don't leave the tasks running
+        cancel_obj_refs(obj_ref)
+        raise
+    if fn_type == "batch":
+        # One list of outcomes per Ray task
+        result = [outcome for outcomes in result for outcome in outcomes]
+    return _format_result(fn_type, result, oob_buffers)
+
+
+def submit_serialized_fn_by_type(
+    fn_type,
+    fn_name,
+    relative_path,
+    module_name,
+    resources,
+    conda_env=None,
+    args=None,
+    kwargs=None,
+    num_repeats=0,
+    serialized_fn=None,
+    oob_buffers=False,
+    user=None,
+):
+    """Submit the Ray task(s) for the function without unpickling its args, kwargs or (for notebook functions)
+    the function itself, which only happens inside the Ray worker.
+
+    ``args`` is a list of ``(data, buffers, keys)`` tuples, one per task (a single one for repeat), and
+    ``kwargs`` is one such tuple shared by all the tasks. ``keys`` maps the position or name of top-level string
+    args to the string, and any which are keys in the object store are swapped for the stored object.
+
+    For batches of calls (the "batch" fn_type), each of ``args`` is the pickled ``(args, kwargs)`` of one call,
+    with ``keys`` prefixed by "args." or "kwargs.", and the calls are split across Ray tasks of
+    ``BATCH_TASK_SIZE`` calls each.
+
+    ``user`` is recorded as the owner of remote runs, for listing runs by user."""
+    run_key = _run_key(fn_name)
+
+    if fn_type == "batch":
+        batches = [
+            args[i : i + BATCH_TASK_SIZE] for i in range(0, len(args), BATCH_TASK_SIZE)
+        ]
+        num_tasks = len(batches)
+    else:
+        num_tasks = num_repeats if fn_type == "repeat" else len(args)
+    ray_fn, module_path, num_cuda_devices = _ray_fn_for(
+        run_serialized_batch if fn_type == "batch" else run_serialized_fn,
+        run_key,
+        fn_type,
+        relative_path,
+        resources,
+        conda_env,
+        num_tasks,
+    )
+    fn_pointers = (
+        module_path,
+        module_name,
+        serialized_fn if module_name == "notebook" else fn_name,
+    )
+
+    if fn_type == "batch":
+        obj_refs = _lookup_keys(args)
+        obj_ref = [
+            _submit_batch(
+                ray_fn, fn_pointers, num_cuda_devices, oob_buffers, batch, obj_refs
             )
-        elif fn_type == "repeat":
-            [num_repeats, args] = args
-            obj_ref = [
-                ray_fn.remote(fn_pointers, fn_type, num_cuda_devices, *args, **kwargs)
-                for _ in range(num_repeats)
-            ]
+            for batch in batches
+        ]
+        return run_key, obj_ref
+
+    obj_refs = _lookup_keys(list(args) + [kwargs])
+    kwargs_data, kwargs_buffers, kwargs_keys = kwargs
+    # Shared by all the tasks, so only put it in the object store once
+    kwargs_ref = ray.put((kwargs_data, kwargs_buffers))
+    kwargs_resolved = _resolve_keys("kwargs", kwargs_keys, obj_refs)
+
+    def submit(task_args):
+        data, buffers, keys = task_args
+        resolved = _resolve_keys("args", keys, obj_refs) + kwargs_resolved
+        # Pass the resolved object refs as top-level args so Ray resolves them to their values in the worker
+        return ray_fn.remote(
+            fn_pointers,
+            fn_type,
+            num_cuda_devices,
+            oob_buffers,
+            (data, buffers),
+            kwargs_ref,
+            [name for name, _ in resolved],
+            *[obj_ref for _, obj_ref in resolved],
+        )
+
+    if fn_type in ("map", "starmap"):
+        obj_ref = [submit(task_args) for task_args in args]
+    elif fn_type == "repeat":
+        obj_ref = [submit(args[0]) for _ in range(num_repeats)]
+    elif fn_type in ("queue", "remote", "call", "nested"):
+        obj_ref = submit(args[0])
+    else:
+        raise ValueError(f"fn_type {fn_type} not recognized")
+
+    if fn_type == "remote":
+        obj_ref, outcome_ref = obj_ref
+        rh_config.obj_store.put_obj_ref(
+            key=run_key,
+            obj_ref=obj_ref,
+            fn_name=fn_name,
+            user=user,
+            outcome_ref=outcome_ref,
+        )
+    return run_key, obj_ref
+
+
+def _submit_batch(ray_fn, fn_pointers, num_cuda_devices, oob_buffers, batch, obj_refs):
+    resolved = []
+    for index, (_, _, keys) in enumerate(batch):
+        for name, key in keys.items():
+            obj_ref = obj_refs.get(key)
+            if obj_ref is not None:
+                kind, name = name.split(".", 1)
+                resolved.append(((index, kind, name), obj_ref))
+    return ray_fn.remote(
+        fn_pointers,
+        "batch",
+        num_cuda_devices,
+        oob_buffers,
+        [(data, buffers) for data, buffers, _ in batch],
+        [name for name, _ in resolved],
+        *[obj_ref for _, obj_ref in resolved],
+    )
+
+
+def cancel_obj_refs(obj_ref, force=False):
+    """Cancel the Ray task(s) behind an object ref or list of them (e.g. for map), along with any tasks they
+    started themselves."""
+    obj_refs = obj_ref if isinstance(obj_ref, list) else [obj_ref]
+    for ref in obj_refs:
+        try:
+            ray.cancel(ref, force=force, recursive=True)
+        except Exception as e:
+            logger.debug(f"Failed to cancel {ref}: {e}")
+    logger.info(f"Cancelled {len(obj_refs)} tasks")
+
+
+def _lookup_keys(serialized_args):
+    """Look up which of the top-level string args of all the ``(data, buffers, keys)`` tuples are keys in the object
+    store at once, so that a map over many strings (e.g. paths) doesn't ask the store's actor about each one.
+    Returns their object refs by key."""
+    return rh_config.obj_store.get_obj_refs(
+        list({key for _, _, keys in serialized_args for key in keys.values()})
+    )
+
+
+def _resolve_keys(kind, keys, obj_refs):
+    """Which of the top-level string args or kwargs are keys in the object store (as looked up by
+    :func:`_lookup_keys`), as a list of ``((kind, position or name), obj_ref)`` tuples."""
+    return [
+        ((kind, name), obj_refs[key]) for name, key in keys.items() if key in obj_refs
+    ]
+
+
+_run_key_lock = threading.Lock()
+# Number of run keys handed out for each function in the current second
+_run_key_counts = {}
+_run_key_timestamp = None
+
+
+def _run_key(fn_name):
+    global _run_key_timestamp
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    run_key = f"{fn_name}_{timestamp}"
+    # Calls submitted in the same second (e.g. in a batch) get a counter suffix so each has its own key
+    with _run_key_lock:
+        if timestamp != _run_key_timestamp:
+            _run_key_counts.clear()
+            _run_key_timestamp = timestamp
+        count = _run_key_counts.get(run_key, 0)
+        # Skip keys already in the object store too, e.g. from before the server restarted in the same second
+        while (f"{run_key}_{count}" if count else run_key) in rh_config.obj_store:
+            count += 1
+        _run_key_counts[run_key] = count + 1
+    return f"{run_key}_{count}" if count else run_key
+
+
+def _ray_fn_for(
+    entrypoint, run_key, fn_type, relative_path, resources, conda_env, num_tasks
+):
+    ray.init(ignore_reinit_error=True)
+    num_gpus = ray.cluster_resources().get("GPU", 0)
+    num_cuda_devices = resources.get("num_gpus") or num_gpus
+
+    # We need to add the module_path to the PYTHONPATH because ray runs remotes in a new process
+    # We need to set max_calls to make sure ray doesn't cache the remote function and ignore changes to the module
+    # See: https://docs.ray.io/en/releases-2.2.0/ray-core/package-ref.html#ray-remote
+    module_path = (
+        str((Path.home() / relative_path).resolve()) if relative_path else None
+    )
+    runtime_env = {"env_vars": {"PYTHONPATH": module_path or ""}}
+    if conda_env:
+        runtime_env["conda"] = conda_env
+
+    logging_wrapped_fn = enable_logging_fn_wrapper(entrypoint, run_key)
+    if fn_type == "remote":
+        logging_wrapped_fn = returning_outcome_fn_wrapper(logging_wrapped_fn)
+
+    ray_fn = ray.remote(
+        num_cpus=resources.get("num_cpus") or 0.0001,
+        num_gpus=resources.get("num_gpus") or 0.0001 if num_gpus > 0 else None,
+        max_calls=num_tasks if fn_type in ["map", "starmap", "batch"] else 1,
+        runtime_env=runtime_env,
+        num_returns=2 if fn_type == "remote" else 1,
+    )(logging_wrapped_fn)
+    return ray_fn, module_path, num_cuda_devices
+
+
+def _format_result(fn_type, result, oob_buffers):
+    if fn_type in ("call", "nested"):
+        # Already serialized inside the worker (or not at all, for nested calls)
+        return result
+    return serialize_result(result, oob_buffers)
+
+
+def run_serialized_fn(
+    fn_pointers,
+    fn_type,
+    num_gpus,
+    oob_buffers,
+    serialized_args,
+    serialized_kwargs,
+    resolved_names,
+    *resolved_values,
+):
+    """Entrypoint inside the Ray worker for calls submitted by :func:`submit_serialized_fn_by_type`. Unpickles
+    the args, kwargs and notebook function, swaps in any resolved objects, and runs the function."""
+    args = list(deserialize_with_buffers(*serialized_args))
+    kwargs = deserialize_with_buffers(*serialized_kwargs)
+    for (kind, name), value in zip(resolved_names, resolved_values):
+        if kind == "args":
+            args[int(name)] = value
         else:
-            raise ValueError(f"fn_type {fn_type} not recognized")
+            kwargs[name] = value
+
+    (module_path, module_name, fn_name) = fn_pointers
+    if module_name == "notebook":
+        fn_pointers = (module_path, module_name, pickle.loads(fn_name))
+    return get_fn_from_pointers(
+        fn_pointers, fn_type, num_gpus, oob_buffers, *args, **kwargs
+    )
 
-        if fn_type == "remote":
-            rh_config.obj_store.put_obj_ref(key=run_key, obj_ref=obj_ref)
-            res = pickle.dumps(run_key)
-        elif fn_type in ("call", "nested"):
-            res = ray.get(obj_ref)
+
+def run_serialized_batch(
+    fn_pointers,
+    fn_type,
+    num_gpus,
+    oob_buffers,
+    serialized_calls,
+    resolved_names,
+    *resolved_values,
+):
+    """Entrypoint inside the Ray worker for a batch of calls submitted by :func:`submit_serialized_fn_by_type`.
+    Runs the calls one after another, returning a ``(result, exception, traceback)`` outcome for each, so one
+    failing call doesn't fail the others."""
+    calls = [
+        (list(args), kwargs)
+        for args, kwargs in (
+            deserialize_with_buffers(*serialized_call)
+            for serialized_call in serialized_calls
+        )
+    ]
+    for (index, kind, name), value in zip(resolved_names, resolved_values):
+        args, kwargs = calls[index]
+        if kind == "args":
+            args[int(name)] = value
         else:
-            res = pickle.dumps(ray.get(obj_ref))
-    return res
+            kwargs[name] = value
 
+    (module_path, module_name, fn_name) = fn_pointers
+    if module_name == "notebook":
+        fn_pointers = (module_path, module_name, pickle.loads(fn_name))
+    fn = _load_fn(fn_pointers, num_gpus)
 
-def get_fn_from_pointers(fn_pointers, fn_type, num_gpus, *args, **kwargs):
+    outcomes = []
+    for args, kwargs in calls:
+        try:
+            outcomes.append((fn(*args, **kwargs), None, None))
+        except Exception as e:
+            outcomes.append((None, e, traceback.format_exc()))
+    return outcomes
+
+
+def get_fn_from_pointers(fn_pointers, fn_type, num_gpus, oob_buffers, *args, **kwargs):
+    fn = _load_fn(fn_pointers, num_gpus)
+    result = fn(*args, **kwargs)
+    if fn_type == "call":
+        return serialize_result(result, oob_buffers)
+    return result
+
+
+def _load_fn(fn_pointers, num_gpus):
     (module_path, module_name, fn_name) = fn_pointers
     if module_name == "notebook":
         fn = fn_name  # already unpickled
@@ -117,11 +530,7 @@ def get_fn_from_pointers(fn_pointers, fn_type, num_gpus, *args, **kwargs):
 
     cuda_visible_devices = list(range(int(num_gpus)))
     os.environ["CUDA_VISIBLE_DEVICES"] = ",".join(map(str, cuda_visible_devices))
-
-    result = fn(*args, **kwargs)
-    if fn_type == "call":
-        return pickle.dumps(result)
-    return result
+    return fn
 
 
 RAY_LOGFILE_PATH = Path("/tmp/ray/session_latest/logs")
@@ -146,3 +555,14 @@ def enable_logging_fn_wrapper(fn, run_key):
         return fn(*inner_args, **inner_kwargs)
 
     return wrapped_fn
+
+
+def returning_outcome_fn_wrapper(fn):
+    @wraps(fn)
+    def wrapped_fn(*inner_args, **inner_kwargs):
+        """Returns "done" as a second return value of the Ray task, alongside the function's result. It's a small
+        object which resolves to "done" if the run succeeded or raises its error if not, so the object store can
+        tell how the run ended without fetching its result."""
+        return fn(*inner_args, **inner_kwargs), "done"
+
+    return wrapped_fn
@@ -0,0 +1,190 @@
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Optional, Tuple
+
+import ray.cloudpickle as pickle
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MEMORY_BYTES = 256 * 1024 * 1024  # 256 MB
+DEFAULT_DISK_DIR = "~/.cache/runhouse/results"
+
+
+class RunResultCache:
+    """
+    Client-side cache of the results of finished runs, keyed by cluster address and run key. A finished run's
+    result never changes, so once it has been fetched, later gets (e.g. from a notebook or dashboard re-reading
+    the same results) are served locally rather than downloaded and deserialized again. Only results the server
+    marks as immutable are cached, never objects which were ``put`` or runs which failed.
+
+    Results are kept in memory in an LRU of up to ``result_cache_size`` bytes (in pickled size), and, if
+    ``result_cache_disk_size`` is set in the Runhouse config, in an LRU on disk under ``~/.cache/runhouse`` too,
+    shared by all the processes on this machine. Set ``result_cache_size`` to 0 to disable the cache. Each process
+    scans the disk cache once, on first use, and after that keeps track of its size from what it writes and
+    removes itself, so results other processes write later only count towards its limit once this one reads them.
+
+    Results served from memory are the same object each time, so shouldn't be modified in place.
+    """
+
+    def __init__(self, configs):
+        self._configs = configs
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[Tuple[str, str], Tuple[Any, int]]" = OrderedDict()
+        self.size = 0
+        # The files in the disk cache by path, least recently used first, with their sizes
+        self._disk_index: "Optional[OrderedDict[str, int]]" = None
+        self.disk_size = 0
+
+    @property
+    def max_bytes(self) -> int:
+        return self._configs.get("result_cache_size", DEFAULT_MEMORY_BYTES)
+
+    @property
+    def max_disk_bytes(self) -> int:
+        return self._configs.get("result_cache_disk_size", 0)
+
+    @property
+    def disk_dir(self) -> Path:
+        return Path(
+            self._configs.get("result_cache_dir", DEFAULT_DISK_DIR)
+        ).expanduser()
+
+    def get(self, address: str, key: str) -> Tuple[bool, Any]:
+        """Returns ``(True, result)`` if the result of ``key`` on the cluster at ``address`` is cached, or
+        ``(False, None)`` if not."""
+        if not self.max_bytes:
+            return False, None
+        with self._lock:
+            cached = self._cache.get((address, key))
+            if cached is not None:
+                self._cache.move_to_end((address, key))
+                return True, cached[0]
+
+        if not self.max_disk_bytes:
+            return False, None
+        path = self._disk_path(address, key)
+        try:
+            with open(path, "rb") as f:
+                result = pickle.load(f)
+            # Bump the modification time, which disk eviction goes by
+            os.utime(path)
+            size = path.stat().st_size
+        except FileNotFoundError:
+            return False, None
+        except Exception as e:
+            logger.warning(f"Could not load cached result for {key}: {e}")
+            return False, None
+        self._index_on_disk(str(path), size)
+        self._put_in_memory(address, key, result, size)
+        return True, result
+
+    def put(self, address: str, key: str, result: Any, size: int):
+        """Cache the result of ``key``, which was ``size`` bytes pickled."""
+        if not self.max_bytes:
+            return
+        self._put_in_memory(address, key, result, size)
+        if self.max_disk_bytes and size <= self.max_disk_bytes:
+            try:
+                self._put_on_disk(address, key, result)
+            except Exception as e:
+                logger.warning(f"Could not cache result for {key} on disk: {e}")
+
+    def _put_in_memory(self, address, key, result, size):
+        with self._lock:
+            self._pop((address, key))
+            if size > self.max_bytes:
+                return
+            self._cache[(address, key)] = (result, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted_size) = self._cache.popitem(last=False)
+                self.size -= evicted_size
+
+    def _put_on_disk(self, address, key, result):
+        path = self._disk_path(address, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Written to a temp file first, so other processes never read a partial result
+        with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as f:
+            pickle.dump(result, f)
+        size = os.path.getsize(f.name)
+        os.replace(f.name, path)
+        self._index_on_disk(str(path), size)
+
+    def _index_on_disk(self, path, size):
+        """Record that the file at ``path`` was just written or read, then remove the least recently used files
+        until the disk cache fits in ``result_cache_disk_size`` again."""
+        evicted = []
+        with self._lock:
+            index = self._load_disk_index()
+            self.disk_size += size - index.pop(path, 0)
+            index[path] = size
+            while self.disk_size > self.max_disk_bytes and index:
+                evicted_path, evicted_size = index.popitem(last=False)
+                self.disk_size -= evicted_size
+                evicted.append(evicted_path)
+        for evicted_path in evicted:
+            try:
+                os.remove(evicted_path)
+            except FileNotFoundError:
+                pass
+
+    def _load_disk_index(self):
+        """The index of the disk cache, scanning the cache directory the first time. Called with the lock held."""
+        if self._disk_index is None:
+            files = []
+            if self.disk_dir.exists():
+                for cluster_dir in self.disk_dir.iterdir():
+                    for entry in os.scandir(cluster_dir):
+                        stat = entry.stat()
+                        files.append((stat.st_mtime, entry.path, stat.st_size))
+            self._disk_index = OrderedDict(
+                (path, size) for _, path, size in sorted(files)
+            )
+            self.disk_size = sum(self._disk_index.values())
+        return self._disk_index
+
+    def _unindex_on_disk(self, should_drop):
+        """Drop the files for which ``should_drop(path)`` is true from the disk cache's index."""
+        with self._lock:
+            if self._disk_index is not None:
+                for path in [p for p in self._disk_index if should_drop(p)]:
+                    self.disk_size -= self._disk_index.pop(path)
+
+    def _disk_path(self, address, key) -> Path:
+        cluster_dir = hashlib.sha1(address.encode()).hexdigest()
+        return self.disk_dir / cluster_dir / hashlib.sha1(key.encode()).hexdigest()
+
+    def _pop(self, cache_key):
+        evicted = self._cache.pop(cache_key, None)
+        if evicted is not None:
+            self.size -= evicted[1]
+
+    def invalidate(self, address: str, keys: Optional[list] = None):
+        """Drop the given keys for the cluster at ``address``, or all of its results if ``keys`` is None (e.g. it
+        was torn down, or all its runs were cancelled)."""
+        with self._lock:
+            if keys is None:
+                for cache_key in [k for k in self._cache if k[0] == address]:
+                    self._pop(cache_key)
+            else:
+                for key in keys:
+                    self._pop((address, key))
+
+        if keys is None:
+            cluster_dir = self.disk_dir / hashlib.sha1(address.encode()).hexdigest()
+            self._unindex_on_disk(lambda path: Path(path).parent == cluster_dir)
+            shutil.rmtree(cluster_dir, ignore_errors=True)
+        else:
+            paths = {str(self._disk_path(address, key)) for key in keys}
+            self._unindex_on_disk(lambda path: path in paths)
+            for key in keys:
+                try:
+                    os.remove(self._disk_path(address, key))
+                except FileNotFoundError:
+                    pass
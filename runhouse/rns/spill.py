@@ -0,0 +1,89 @@
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Tuple
+
+import ray.cloudpickle as pickle
+
+NUMPY_SUFFIX = ".npy"
+ARROW_TABLE_SUFFIX = ".table.arrow"
+ARROW_BATCH_SUFFIX = ".batch.arrow"
+PICKLE_SUFFIX = ".pkl"
+
+
+def write(directory: str, key: str, value: Any) -> Tuple[str, int]:
+    """
+    Write an object store value to a file in ``directory``, in a format it can be read back from cheaply:
+    numpy arrays as ``.npy`` files and Arrow tables and record batches in the Arrow IPC file format, which are
+    both memory-mapped when they're read back rather than deserialized, and anything else pickled.
+
+    Returns the path of the file and its size in bytes.
+    """
+    directory = Path(directory).expanduser()
+    directory.mkdir(parents=True, exist_ok=True)
+    suffix, write_fn = _writer(value)
+    path = directory / (hashlib.sha1(key.encode()).hexdigest() + suffix)
+    # Written to a temp file first, so a crash never leaves a partial file at the path
+    f = tempfile.NamedTemporaryFile(dir=directory, delete=False)
+    try:
+        with f:
+            write_fn(value, f)
+        os.replace(f.name, path)
+    except BaseException:
+        remove(f.name)
+        raise
+    return str(path), path.stat().st_size
+
+
+def read(path: str) -> Any:
+    """Read back a value written with :func:`write`. Numpy arrays and Arrow data are memory-mapped (read-only)."""
+    if path.endswith(NUMPY_SUFFIX):
+        import numpy as np
+
+        return np.load(path, mmap_mode="r")
+    if path.endswith((ARROW_TABLE_SUFFIX, ARROW_BATCH_SUFFIX)):
+        import pyarrow as pa
+
+        # Not closed, the buffers of what's read point into the mapping
+        reader = pa.ipc.open_file(pa.memory_map(path))
+        if path.endswith(ARROW_BATCH_SUFFIX):
+            return reader.get_batch(0)
+        return reader.read_all()
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _writer(value):
+    # Checked by module first, so numpy and pyarrow are only imported if the value is from them
+    module = type(value).__module__.split(".")[0]
+    if module == "numpy":
+        import numpy as np
+
+        if isinstance(value, np.ndarray) and not value.dtype.hasobject:
+            return NUMPY_SUFFIX, lambda v, f: np.save(f, v, allow_pickle=False)
+    elif module == "pyarrow":
+        import pyarrow as pa
+
+        if isinstance(value, pa.Table):
+            return ARROW_TABLE_SUFFIX, _write_arrow
+        if isinstance(value, pa.RecordBatch):
+            return ARROW_BATCH_SUFFIX, _write_arrow
+    return PICKLE_SUFFIX, pickle.dump
+
+
+def _write_arrow(value, f):
+    import pyarrow as pa
+
+    with pa.ipc.new_file(f, value.schema) as writer:
+        if isinstance(value, pa.Table):
+            writer.write_table(value)
+        else:
+            writer.write_batch(value)
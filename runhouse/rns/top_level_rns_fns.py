@@ -1,5 +1,5 @@
 import sys
-from typing import List
+from typing import List, Optional
 
 from runhouse.rh_config import rns_client
 
@@ -131,8 +131,8 @@ def load_all_clusters():
 from runhouse import rh_config
 
 
-def pin_to_memory(key: str, value):
-    rh_config.obj_store.put(key, value)
+def pin_to_memory(key: str, value, never_evict: bool = False):
+    rh_config.obj_store.put(key, value, never_evict=never_evict)
 
 
 def get_pinned_object(key: str, default=None):
@@ -155,6 +155,67 @@ def get(key: str, cluster=None, default=None):
         return cluster.get(key, default=default)
 
 
+def _cluster_from(cluster):
+    from runhouse.rns.hardware.on_demand_cluster import OnDemandCluster
+
+    if isinstance(cluster, str):
+        return OnDemandCluster.from_name(cluster)
+    return cluster
+
+
+def wait(
+    run_keys: List[str],
+    cluster,
+    num_returns: Optional[int] = None,
+    timeout: Optional[float] = None,
+):
+    """Wait for runs submitted with ``remote`` to finish, like ``ray.wait``. Runs count as done whether they
+    completed, failed or were cancelled.
+
+    Args:
+        run_keys (List[str]): Run keys of the runs to wait for.
+        cluster (Union[str, Cluster]): Cluster the runs were submitted to.
+        num_returns (int, optional): Return once this many runs are done. (Default: all of them)
+        timeout (float, optional): Return after this many seconds even if fewer runs are done.
+
+    Returns:
+        A tuple of the list of run keys which are done, in the order they finished, and the list which aren't.
+    """
+    num_returns = len(run_keys) if num_returns is None else num_returns
+    done = []
+    try:
+        events = _cluster_from(cluster).watch_keys(run_keys, timeout=timeout)
+        for key, _ in events:
+            done.append(key)
+            if len(done) >= num_returns:
+                events.close()
+                break
+    except TimeoutError:
+        pass
+    done_keys = set(done)
+    return done, [key for key in run_keys if key not in done_keys]
+
+
+def as_completed(run_keys: List[str], cluster, timeout: Optional[float] = None):
+    """Yield the run keys of runs submitted with ``remote`` as they finish, whether they completed, failed or were
+    cancelled. The result (or exception) can then be retrieved with ``cluster.get(run_key)``. All the runs are
+    watched over a single stream to the cluster.
+
+    Args:
+        run_keys (List[str]): Run keys of the runs to wait for.
+        cluster (Union[str, Cluster]): Cluster the runs were submitted to.
+        timeout (float, optional): Raise a ``TimeoutError`` if the runs haven't all finished after this many
+            seconds.
+
+    Example:
+        >>> run_keys = my_fn.remote_many(inputs)
+        >>> for run_key in rh.as_completed(run_keys, my_cluster):
+        >>>     print(my_cluster.get(run_key))
+    """
+    for key, _ in _cluster_from(cluster).watch_keys(run_keys, timeout=timeout):
+        yield key
+
+
 def remove_pinned_object(key: str):
     rh_config.obj_store.delete(key)
 
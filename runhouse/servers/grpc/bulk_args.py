@@ -0,0 +1,271 @@
+import hashlib
+import logging
+import os
+import sys
+import threading
+import uuid
+from pathlib import Path, PurePosixPath
+from typing import Dict, Optional, Tuple
+
+from runhouse.servers.grpc.serialization import CHUNK_SIZE, nbytes
+
+logger = logging.getLogger(__name__)
+
+# Args at least this big are uploaded over SFTP rather than sent in the RunModule message
+BULK_ARG_THRESHOLD = 64 * 1024 * 1024  # 64 MB
+# Where uploaded args are stored on the cluster, in a directory per content hash
+BULK_ARGS_DIR = "~/.rh/bulk"
+# The same directory for SFTP, where relative paths are relative to the home directory
+_SFTP_BULK_ARGS_DIR = str(PurePosixPath(BULK_ARGS_DIR).relative_to("~"))
+# Where ssh looks for known host keys, unless UserKnownHostsFile says otherwise
+_DEFAULT_KNOWN_HOSTS = "~/.ssh/known_hosts ~/.ssh/known_hosts2"
+_GLOBAL_KNOWN_HOSTS = "/etc/ssh/ssh_known_hosts"
+
+
+class UnknownHostKeyError(Exception):
+    """The cluster's SSH host key isn't in any known_hosts file, so args aren't uploaded to it."""
+
+
+class BulkArg(object):
+    """
+    Stand-in for a large arg which has been uploaded to the cluster, pickled in its place. It unpickles (on the
+    worker) into the uploaded file: a read-only memory-mapped array for numpy arrays, the path on the cluster
+    for local files, and the bytes themselves for bytes.
+    """
+
+    def __init__(self, digest: str, kind: str, name: str):
+        self.digest = digest
+        self.kind = kind
+        self.name = name
+
+    def __reduce__(self):
+        return _load_bulk_arg, (self.digest, self.kind, self.name)
+
+
+def _load_bulk_arg(digest, kind, name):
+    path = Path(BULK_ARGS_DIR).expanduser() / digest / name
+    if not path.exists():
+        raise FileNotFoundError(
+            f"Uploaded arg {path} not found. Uploaded args are stored on the head node, so can't be loaded by "
+            f"functions running on other nodes of the cluster."
+        )
+    if kind == "numpy":
+        import numpy as np
+
+        return np.load(path, mmap_mode="r")
+    if kind == "bytes":
+        return path.read_bytes()
+    return path
+
+
+class BulkArgUploader(object):
+    """
+    Uploads large args (bytes, numpy arrays and ``pathlib.Path`` s to local files) to the cluster over an SFTP
+    session of their own, on the cluster's SSH credentials, so they don't have to be held in memory in a single
+    gRPC message on both ends.
+
+    Args are stored on the cluster under their content hash, so an arg which has already been uploaded (e.g. the
+    same 5 GB input to each run of a function being iterated on) is only hashed and not sent again.
+
+    The connection follows the host's entry in ``~/.ssh/config`` (``HostName``, ``Port``, ``UserKnownHostsFile`` and
+    ``StrictHostKeyChecking``), and like ``ssh`` only trusts host keys in the known_hosts files. If the cluster's
+    host key isn't known, args are sent in the message as usual, with a warning.
+    """
+
+    def __init__(
+        self,
+        address: str,
+        ssh_user: str,
+        ssh_private_key: str,
+        threshold: int = BULK_ARG_THRESHOLD,
+    ):
+        self.address = address
+        self.ssh_user = ssh_user
+        self.ssh_private_key = ssh_private_key
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._ssh = None
+        self._sftp = None
+        # Set if the cluster's host key isn't known, so there's nothing to upload to
+        self._disabled = False
+        # Digests known to be on the cluster, so they don't need to be checked again
+        self._uploaded = set()
+        # Hashes of local files by (path, size, mtime), so unchanged files aren't hashed again
+        self._file_digests: Dict[Tuple[str, int, int], str] = {}
+
+    def swap(self, args):
+        """Upload the large top-level items of a tuple of args or dict of kwargs, returning a copy with a
+        :class:`BulkArg` in place of each."""
+        if isinstance(args, dict):
+            return {key: self._swap_arg(arg) for key, arg in args.items()}
+        return tuple(self._swap_arg(arg) for arg in args)
+
+    def _swap_arg(self, arg):
+        if self._disabled:
+            return arg
+        bulk_arg = None
+        if isinstance(arg, Path):
+            if not arg.is_file() or arg.stat().st_size < self.threshold:
+                return arg
+            bulk_arg = self._upload_file(arg)
+        elif nbytes(arg) < self.threshold:
+            return arg
+        elif isinstance(arg, bytes):
+            digest = hashlib.blake2b(arg, digest_size=20).hexdigest()
+            bulk_arg = self._upload(
+                digest, "bytes", "data", lambda f: _write_bytes(f, arg)
+            )
+        else:
+            np = sys.modules.get("numpy")
+            if np is not None and isinstance(arg, np.ndarray) and arg.dtype != object:
+                bulk_arg = self._upload_array(np, arg)
+        return arg if bulk_arg is None else bulk_arg
+
+    def _upload_file(self, path: Path):
+        path = path.expanduser().resolve()
+        stat = path.stat()
+        file_key = (str(path), stat.st_size, stat.st_mtime_ns)
+        digest = self._file_digests.get(file_key)
+        if digest is None:
+            hasher = hashlib.blake2b(digest_size=20)
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                    hasher.update(chunk)
+            digest = self._file_digests[file_key] = hasher.hexdigest()
+
+        def write(f):
+            with open(path, "rb") as local_file:
+                for chunk in iter(lambda: local_file.read(CHUNK_SIZE), b""):
+                    f.write(chunk)
+
+        return self._upload(digest, "path", path.name, write)
+
+    def _upload_array(self, np, arr):
+        arr = np.ascontiguousarray(arr)
+        hasher = hashlib.blake2b(digest_size=20)
+        hasher.update(f"{arr.dtype.str}{arr.shape}".encode())
+        hasher.update(memoryview(arr).cast("B"))
+
+        def write(f):
+            np.lib.format.write_array_header_1_0(
+                f, np.lib.format.header_data_from_array_1_0(arr)
+            )
+            _write_bytes(f, memoryview(arr).cast("B"))
+
+        return self._upload(hasher.hexdigest(), "numpy", "array.npy", write)
+
+    def _upload(self, digest, kind, name, write):
+        """Upload an arg (unless it's already there), returning its :class:`BulkArg`, or ``None`` if args can't
+        be uploaded to this cluster."""
+        remote_dir = f"{_SFTP_BULK_ARGS_DIR}/{digest}"
+        remote_path = f"{remote_dir}/{name}"
+        with self._lock:
+            if digest not in self._uploaded:
+                try:
+                    sftp = self._connect()
+                except UnknownHostKeyError as e:
+                    logger.warning(f"{e}, so sending large args in the message instead")
+                    self._disabled = True
+                    return None
+                try:
+                    sftp.stat(remote_path)
+                    logger.info(f"Arg {digest} already uploaded, not sending it again")
+                except FileNotFoundError:
+                    self._makedirs(sftp, remote_dir)
+                    # Written to a temp file first, so a failed upload doesn't leave a partial arg behind
+                    tmp_path = f"{remote_path}.{uuid.uuid4().hex}.tmp"
+                    logger.info(f"Uploading arg {digest} to {self.address}")
+                    with sftp.open(tmp_path, "wb") as f:
+                        f.set_pipelined(True)
+                        write(f)
+                    sftp.posix_rename(tmp_path, remote_path)
+                self._uploaded.add(digest)
+        return BulkArg(digest, kind, name)
+
+    def _connect(self):
+        if self._sftp is None:
+            import paramiko
+
+            config = _ssh_host_config(self.address)
+            host = config.get("hostname", self.address)
+            port = int(config.get("port", 22))
+
+            ssh = paramiko.SSHClient()
+            known_hosts = config.get("userknownhostsfile", _DEFAULT_KNOWN_HOSTS)
+            for known_hosts_file in known_hosts.split() + [_GLOBAL_KNOWN_HOSTS]:
+                known_hosts_file = os.path.expanduser(known_hosts_file)
+                if os.path.isfile(known_hosts_file):
+                    ssh.load_host_keys(known_hosts_file)
+            if config.get("stricthostkeychecking", "").lower() == "no":
+                # The host's ssh config accepts any host key, so we do too
+                ssh.set_missing_host_key_policy(paramiko.WarningPolicy())
+            else:
+                host_key_name = host if port == 22 else f"[{host}]:{port}"
+                if ssh.get_host_keys().lookup(host_key_name) is None:
+                    raise UnknownHostKeyError(
+                        f"The host key of {host_key_name} isn't in known_hosts (e.g. add it with "
+                        f"`ssh-keyscan -p {port} {host} >> ~/.ssh/known_hosts`)"
+                    )
+                ssh.set_missing_host_key_policy(paramiko.RejectPolicy())
+
+            ssh.connect(
+                host,
+                port=port,
+                username=self.ssh_user,
+                key_filename=os.path.expanduser(self.ssh_private_key),
+                look_for_keys=False,
+            )
+            self._ssh, self._sftp = ssh, ssh.open_sftp()
+        return self._sftp
+
+    @staticmethod
+    def _makedirs(sftp, remote_dir):
+        path = ""
+        for part in remote_dir.split("/"):
+            path = f"{path}/{part}" if path else part
+            try:
+                sftp.mkdir(path)
+            except IOError:
+                # Already exists
+                pass
+
+    def forget_uploads(self):
+        """Forget which args have been uploaded, e.g. after they've been deleted from the cluster."""
+        with self._lock:
+            self._uploaded.clear()
+
+    def close(self):
+        with self._lock:
+            if self._ssh is not None:
+                self._ssh.close()
+            self._ssh = self._sftp = None
+
+
+def _write_bytes(f, data):
+    view = memoryview(data)
+    for start in range(0, len(view), CHUNK_SIZE):
+        f.write(view[start : start + CHUNK_SIZE])
+
+
+def _ssh_host_config(address):
+    """The options for ``address`` in ``~/.ssh/config``, as ``ssh`` would apply them."""
+    import paramiko
+
+    config = paramiko.SSHConfig()
+    path = os.path.expanduser("~/.ssh/config")
+    if os.path.isfile(path):
+        with open(path) as f:
+            config.parse(f)
+    return config.lookup(address)
+
+
+def bulk_arg_uploader(address, ssh_creds: dict, threshold: Optional[int]):
+    """The uploader for a cluster, or ``None`` if uploading args is disabled (``threshold`` is ``None`` or 0)."""
+    if not threshold or not ssh_creds:
+        return None
+    return BulkArgUploader(
+        address,
+        ssh_user=ssh_creds["ssh_user"],
+        ssh_private_key=ssh_creds["ssh_private_key"],
+        threshold=threshold,
+    )
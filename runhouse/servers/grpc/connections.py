@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class Connection(object):
+    """A connection to a cluster's Runhouse server: the gRPC client, and the SSH tunnel it goes through (if any)."""
+
+    def __init__(self, client, tunnel=None):
+        self.client = client
+        self.tunnel = tunnel
+        self.closed = False
+
+    def is_healthy(self) -> bool:
+        """Whether the connection can still be used. The gRPC channel reconnects to the server by itself (e.g.
+        after it restarts), so this only checks that the SSH tunnel is still up."""
+        if self.closed:
+            return False
+        if self.tunnel is not None:
+            self.tunnel.check_tunnels()
+            return all(self.tunnel.tunnel_is_up.values())
+        return True
+
+    def close(self):
+        self.closed = True
+        try:
+            self.client.shutdown()
+        finally:
+            if self.tunnel is not None:
+                self.tunnel.stop()
+
+
+class ConnectionManager(object):
+    """
+    Process-wide registry of connections to Runhouse servers, keyed by cluster address (or Unix socket address).
+    All the Cluster objects for the same cluster, in all threads, share one SSH tunnel and one gRPC channel,
+    which multiplexes their concurrent calls over a single HTTP/2 connection.
+
+    Connecting is done under a lock per address, so concurrent callers wait for one connection to be made rather
+    than each opening their own, and connecting to one cluster doesn't hold up calls to another. If a
+    connection goes unhealthy (e.g. its tunnel dropped), the next caller closes it and opens a new one.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._address_locks: Dict[str, threading.RLock] = {}
+        self._connections: Dict[str, Connection] = {}
+        self._async_clients: Dict[Tuple[str, Any, asyncio.AbstractEventLoop], Any] = {}
+
+    def lock(self, address: str) -> threading.RLock:
+        """The lock held while connecting to ``address``, e.g. to also hold while restarting its server."""
+        with self._lock:
+            return self._address_locks.setdefault(address, threading.RLock())
+
+    def connect(
+        self,
+        address: str,
+        open_connection: Callable[[], Connection],
+        force_reconnect: bool = False,
+    ) -> Connection:
+        """Get the connection to ``address``, opening it with ``open_connection`` if there's no healthy one."""
+        with self.lock(address):
+            connection = self._connections.get(address)
+            if (
+                connection is not None
+                and not force_reconnect
+                and connection.is_healthy()
+            ):
+                return connection
+
+            if connection is not None:
+                logger.info(f"Reconnecting to {address}")
+                self._close(connection)
+            connection = open_connection()
+            self._connections[address] = connection
+            return connection
+
+    def get(self, address: str) -> Optional[Connection]:
+        return self._connections.get(address)
+
+    def close(self, address: str):
+        """Close the connection to ``address``, e.g. when the cluster is torn down."""
+        with self.lock(address):
+            connection = self._connections.pop(address, None)
+            if connection is not None:
+                self._close(connection)
+
+    @staticmethod
+    def _close(connection):
+        try:
+            connection.close()
+        except Exception as e:
+            logger.debug(f"Error closing connection: {e}")
+
+    def async_client(self, host: str, port, create_client: Callable[[], Any]):
+        """Get the async client for ``host`` and ``port`` on the running event loop, creating it with
+        ``create_client`` if there isn't one yet. ``grpc.aio`` channels are tied to the loop they were created
+        on, so there's one per cluster per loop."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            # Drop the clients for loops which have since been closed, e.g. by previous calls to asyncio.run
+            for key in [key for key in self._async_clients if key[2].is_closed()]:
+                del self._async_clients[key]
+            client = self._async_clients.get((host, port, loop))
+            if client is None:
+                client = create_client()
+                self._async_clients[(host, port, loop)] = client
+            return client
@@ -0,0 +1,241 @@
+import logging
+import time
+from concurrent import futures
+from pathlib import Path
+
+import ray
+import ray.cloudpickle as pickle
+
+from runhouse.rh_config import obj_store
+from runhouse.rns.run_module_utils import call_fn_by_type
+from runhouse.servers.grpc.streams import KEY_STATUSES, log_chunk, read_new_logs
+from runhouse.servers.grpc.unary_client import KeyStatus
+
+logger = logging.getLogger(__name__)
+
+# The UnaryService running in this process, if any
+_service = None
+
+
+def register_service(service):
+    """Called by the UnaryService on startup, so that callers in the same process can skip gRPC entirely."""
+    global _service
+    _service = service
+
+
+def service_in_this_process():
+    return _service is not None
+
+
+class InProcessClient(object):
+    """
+    Drop-in replacement for :class:`UnaryClient` for callers in the same process as the Runhouse server, which
+    calls into the object store and Ray directly instead of serializing anything.
+    """
+
+    def __init__(self):
+        if _service is None:
+            raise RuntimeError("The Runhouse server is not running in this process")
+        self.service = _service
+
+    def install_packages(self, to_install, env=None):
+        self.service.register_activity()
+        return self.service._install_packages(to_install, env)
+
+    def add_secrets(self, secrets):
+        self.service.register_activity()
+        return self.service._add_secrets(pickle.loads(secrets))
+
+    def cancel_runs(self, keys, force=False, all=False):
+        self.service.register_activity()
+        self.service._cancel_runs(keys, force=force, all=all)
+        return "Cancelled"
+
+    def list_keys(
+        self, prefix=None, statuses=None, submitted_after=None, submitted_before=None
+    ):
+        records, _ = self.list_runs(prefix, statuses, submitted_after, submitted_before)
+        return [record["key"] for record in records]
+
+    def list_runs(
+        self,
+        prefix=None,
+        statuses=None,
+        submitted_after=None,
+        submitted_before=None,
+        limit=None,
+        page_token=None,
+    ):
+        return obj_store.query(
+            prefix=prefix,
+            statuses=[statuses] if isinstance(statuses, str) else statuses,
+            submitted_after=submitted_after,
+            submitted_before=submitted_before,
+            limit=limit,
+            page_token=page_token,
+        )
+
+    def server_status(self):
+        return {lane.name: lane.status() for lane in self.service.lanes}
+
+    def obj_store_stats(self):
+        return obj_store.stats()
+
+    def health(self):
+        import runhouse
+        from runhouse.servers.grpc.unary_server import _ray_ready
+
+        return {
+            "version": runhouse.__version__,
+            "ray_ready": _ray_ready(),
+            "uptime": time.time() - self.service.start_time,
+            "lanes": self.server_status(),
+        }
+
+    def wait_until_ready(self, timeout=None, started_after=None):
+        # The server is running in this process, so it's already up
+        return self.health()
+
+    def get_object(self, key, stream_logs=False, timeout=None):
+        self.service.register_activity()
+        # Logs are written to the same machine, so there's nothing to stream
+        try:
+            return obj_store.get(key, timeout=timeout)
+        except ray.exceptions.GetTimeoutError as e:
+            # Like the gRPC client, whose callers handle a TimeoutError
+            raise TimeoutError(
+                f"Getting {key} did not finish within {timeout} seconds"
+            ) from e
+
+    def get_objects(self, keys, timeout=None):
+        self.service.register_activity()
+        try:
+            values, errors = obj_store.get_many(keys, timeout=timeout)
+        except ray.exceptions.GetTimeoutError as e:
+            raise TimeoutError(
+                f"Getting {len(keys)} objects did not finish within {timeout} seconds"
+            ) from e
+        # Nothing to cache, the values are already local
+        return values, errors, {}
+
+    def stream_logs(self, run_key, offsets=None, follow=True, timeout=None):
+        """Like :meth:`UnaryClient.stream_logs`, but blocks the calling thread between reads while the run
+        is going, rather than waiting on the server's event loop. Don't call it from a coroutine running on
+        that loop (e.g. a handler), as it would stall the server."""
+        obj_ref = obj_store.get_obj_ref(run_key)
+        logs_path = Path(obj_store.RH_LOGFILE_PATH) / run_key
+        offsets = dict(offsets or {})
+        open_files = {}
+        finished = obj_ref is None or not follow
+        deadline = time.time() + timeout if timeout is not None else None
+        try:
+            while True:
+                chunks, more = read_new_logs(
+                    logs_path,
+                    open_files,
+                    offsets,
+                    self.service.LOG_CHUNK_SIZE,
+                    self.service.MAX_LOG_CHUNKS_PER_READ,
+                )
+                for name, data, offset in chunks:
+                    yield log_chunk(name, data, offset)
+                if more:
+                    continue
+                if finished:
+                    break
+                if deadline is not None and time.time() >= deadline:
+                    raise TimeoutError(
+                        f"Streaming logs of {run_key} did not finish within {timeout} seconds"
+                    )
+                ready, _ = ray.wait(
+                    [obj_ref],
+                    timeout=self.service.LOGGING_WAIT_TIME,
+                    fetch_local=False,
+                )
+                finished = bool(ready)
+        finally:
+            for f in open_files.values():
+                f.close()
+
+    def watch_keys(self, keys=None, prefix=None, timeout=None):
+        """Like :meth:`UnaryClient.watch_keys`, but blocks the calling thread until each key resolves. As
+        with :meth:`stream_logs`, don't call it from a coroutine running on the server's event loop."""
+        keys = list(keys or [])
+        if prefix:
+            keys += [
+                k for k in obj_store.keys() if k.startswith(prefix) and k not in keys
+            ]
+
+        pending = {}
+        for key in keys:
+            future = obj_store.run_finished(key)
+            if future is None:
+                yield key, KeyStatus.NOT_FOUND
+            else:
+                pending[future] = key
+
+        deadline = time.time() + timeout if timeout is not None else None
+        while pending:
+            ready, _ = futures.wait(
+                list(pending),
+                timeout=max(deadline - time.time(), 0) if deadline else None,
+                return_when=futures.FIRST_COMPLETED,
+            )
+            if not ready:
+                raise TimeoutError(f"Keys did not all resolve within {timeout} seconds")
+            for future in ready:
+                yield pending.pop(future), KEY_STATUSES[future.result()]
+
+    def put_object(self, key, value, never_evict=False):
+        self.service.register_activity()
+        obj_store.put(key, value, never_evict=never_evict)
+        return key
+
+    def put_objects(self, values, never_evict=False):
+        self.service.register_activity()
+        return obj_store.put_many(values, never_evict=never_evict)
+
+    def clear_pins(self, pins=None):
+        self.service.register_activity()
+        return self.service._clear_pins(pins)
+
+    def run_module(
+        self,
+        relative_path,
+        module_name,
+        fn_name,
+        fn_type,
+        resources,
+        conda_env,
+        args,
+        kwargs,
+        timeout=None,
+    ):
+        self.service.register_activity()
+        return call_fn_by_type(
+            fn_type=fn_type,
+            fn_name=fn_name,
+            relative_path=relative_path,
+            module_name=module_name,
+            resources=resources or {},
+            conda_env=conda_env,
+            args=args,
+            kwargs=kwargs or {},
+            serialize=False,
+            timeout=timeout,
+        )
+
+    def run_module_batch(self, calls, timeout=None):
+        outcomes = []
+        for call in calls:
+            try:
+                outcomes.append((self.run_module(*call, timeout=timeout), None))
+            except Exception as e:
+                outcomes.append((None, e))
+        return outcomes
+
+    def is_connected(self):
+        return True
+
+    def shutdown(self):
+        pass
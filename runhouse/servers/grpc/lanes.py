@@ -0,0 +1,58 @@
+import asyncio
+import functools
+import threading
+from concurrent import futures
+
+
+class ExecutorLane:
+    """A separately sized thread pool for one kind of blocking work on the server, so that e.g. a long pip
+    install or a large upload can't hold up cancelling a run. Keeps track of how much work is queued and running
+    for the server's status."""
+
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.executor = futures.ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=f"rh-{name}"
+        )
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+        self._lock = threading.Lock()
+
+    async def run(self, fn, *args, **kwargs):
+        """Run a blocking function in this lane's thread pool so it doesn't stall the event loop."""
+        with self._lock:
+            self.queued += 1
+        future = self.executor.submit(functools.partial(self._run, fn, *args, **kwargs))
+        future.add_done_callback(self._on_done)
+        return await asyncio.wrap_future(future)
+
+    def _on_done(self, future):
+        if future.cancelled():
+            # Cancelled (e.g. the client went away) before it got to run
+            with self._lock:
+                self.queued -= 1
+
+    def _run(self, fn, *args, **kwargs):
+        with self._lock:
+            self.queued -= 1
+            self.active += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.completed += 1
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "active": self.active,
+                "queued": self.queued,
+                "completed": self.completed,
+            }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,279 @@
+import asyncio
+import ctypes
+import ctypes.util
+import logging
+import os
+import struct
+import sys
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import ray
+
+logger = logging.getLogger(__name__)
+
+# From <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+_INOTIFY_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+_INOTIFY_EVENT = struct.Struct("iIII")
+
+
+class LogTailer:
+    """Watches log files and directories for all of the server's log streams at once, waking the streams
+    interested in a file as soon as it's written to.
+
+    Each stream gets an ``asyncio.Event`` from :meth:`subscribe`, and sets the paths it's interested in with
+    :meth:`watch`: files (e.g. the Ray worker log files a run's log symlinks point to) or directories (to find
+    out when new files are created in them). The event is set when any of them changes, and the stream clears
+    it before reading. Uses inotify on Linux, falling back to polling the paths every ``POLL_INTERVAL`` seconds
+    elsewhere or if inotify isn't available."""
+
+    POLL_INTERVAL = 0.25
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.loop = loop or asyncio.get_running_loop()
+        # (directory, file name or None for the directory itself) -> events of the streams interested in it
+        self._interests: Dict[Tuple[str, Optional[str]], Set[asyncio.Event]] = {}
+        self._subscriptions: Dict[asyncio.Event, Set[Tuple[str, Optional[str]]]] = {}
+        self._inotify = _Inotify.create(self.loop, self._on_change)
+        self._poll_task = None
+        self._poll_state = {}
+        if self._inotify is None:
+            logger.info(
+                f"inotify not available, polling log files every {self.POLL_INTERVAL}s"
+            )
+
+    def subscribe(self) -> asyncio.Event:
+        event = asyncio.Event()
+        self._subscriptions[event] = set()
+        return event
+
+    def watch(self, event: asyncio.Event, paths: Iterable[Path]) -> bool:
+        """Set the paths the subscriber with ``event`` is interested in, replacing any previous ones. Returns
+        whether any new paths are being watched, in which case the subscriber should check them once more in
+        case they changed before the watch started."""
+        keys = set()
+        for path in paths:
+            path = Path(path)
+            keys.add(
+                (str(path), None) if path.is_dir() else (str(path.parent), path.name)
+            )
+        old_keys = self._subscriptions[event]
+        for key in old_keys - keys:
+            self._remove_interest(event, key)
+        for key in keys - old_keys:
+            self._interests.setdefault(key, set()).add(event)
+            if self._inotify is not None:
+                self._inotify.add_watch(key[0])
+        self._subscriptions[event] = keys
+        if self._inotify is None and self._poll_task is None:
+            self._poll_task = self.loop.create_task(self._poll())
+        return bool(keys - old_keys)
+
+    def unsubscribe(self, event: asyncio.Event):
+        for key in self._subscriptions.pop(event, ()):
+            self._remove_interest(event, key)
+
+    def close(self):
+        """Stop watching, closing the inotify fd or stopping the polling. Wakes any remaining subscribers, which
+        shouldn't wait on their events after this."""
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+        if self._poll_task is not None:
+            self._poll_task.cancel()
+            self._poll_task = None
+        for event in self._subscriptions:
+            event.set()
+        self._subscriptions.clear()
+        self._interests.clear()
+
+    def _remove_interest(self, event, key):
+        events = self._interests.get(key)
+        if events is None:
+            return
+        events.discard(event)
+        if not events:
+            del self._interests[key]
+            if self._inotify is not None and not any(
+                directory == key[0] for directory, _ in self._interests
+            ):
+                self._inotify.remove_watch(key[0])
+
+    def _on_change(self, directory: Optional[str], name: Optional[str]):
+        if directory is None:
+            # Events were dropped, so wake everyone up to check
+            for events in self._interests.values():
+                for event in events:
+                    event.set()
+            return
+        for key in ((directory, name), (directory, None)):
+            for event in self._interests.get(key, ()):
+                event.set()
+
+    async def _poll(self):
+        while self._subscriptions:
+            for key in list(self._interests):
+                state = _poll_state(*key)
+                if self._poll_state.get(key) != state:
+                    self._poll_state[key] = state
+                    self._on_change(*key)
+            await asyncio.sleep(self.POLL_INTERVAL)
+        self._poll_state.clear()
+        self._poll_task = None
+
+
+def _poll_state(directory, name):
+    path = Path(directory) / name if name else Path(directory)
+    try:
+        if name is None:
+            return tuple(sorted(os.listdir(path)))
+        stat = path.stat()
+        return stat.st_size, stat.st_mtime_ns
+    except OSError:
+        return None
+
+
+class _Inotify:
+    """Minimal inotify binding over ctypes, read from the event loop without a thread."""
+
+    def __init__(self, libc, fd, loop, callback):
+        self.libc = libc
+        self.fd = fd
+        self.loop = loop
+        self.callback = callback
+        self._wds: Dict[str, int] = {}
+        self._dirs: Dict[int, str] = {}
+        loop.add_reader(fd, self._read)
+
+    @classmethod
+    def create(cls, loop, callback):
+        if not sys.platform.startswith("linux"):
+            return None
+        try:
+            libc = ctypes.CDLL(
+                ctypes.util.find_library("c") or "libc.so.6", use_errno=True
+            )
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+        if fd < 0:
+            return None
+        return cls(libc, fd, loop, callback)
+
+    def add_watch(self, directory: str):
+        if directory in self._wds:
+            return
+        wd = self.libc.inotify_add_watch(self.fd, directory.encode(), _INOTIFY_MASK)
+        if wd < 0:
+            # e.g. the directory doesn't exist yet, the subscriber will be woken by the parent directory
+            logger.debug(
+                f"Could not watch {directory}: {os.strerror(ctypes.get_errno())}"
+            )
+            return
+        self._wds[directory] = wd
+        self._dirs[wd] = directory
+
+    def remove_watch(self, directory: str):
+        wd = self._wds.pop(directory, None)
+        if wd is not None:
+            self._dirs.pop(wd, None)
+            self.libc.inotify_rm_watch(self.fd, wd)
+
+    def close(self):
+        # Closing the fd removes all of its watches
+        if self.fd is None:
+            return
+        self.loop.remove_reader(self.fd)
+        os.close(self.fd)
+        self.fd = None
+        self._wds.clear()
+        self._dirs.clear()
+
+    def _read(self):
+        try:
+            buf = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        changed = set()
+        pos = 0
+        while pos + _INOTIFY_EVENT.size <= len(buf):
+            wd, mask, _, length = _INOTIFY_EVENT.unpack_from(buf, pos)
+            name = buf[pos + _INOTIFY_EVENT.size : pos + _INOTIFY_EVENT.size + length]
+            pos += _INOTIFY_EVENT.size + length
+            if mask & IN_Q_OVERFLOW:
+                changed.add((None, None))
+            elif mask & IN_IGNORED:
+                # The directory was deleted
+                directory = self._dirs.pop(wd, None)
+                self._wds.pop(directory, None)
+            elif wd in self._dirs:
+                changed.add((self._dirs[wd], name.rstrip(b"\0").decode() or None))
+        for directory, name in changed:
+            self.callback(directory, name)
+
+
+class ObjectRefWaiter:
+    """Waits on the object refs for all of the server's streams from one background thread with ``ray.wait``,
+    without fetching their values, resolving an asyncio future for each as soon as its ref is ready."""
+
+    # How long new refs can wait to be picked up while the thread is already waiting on others
+    POLL_INTERVAL = 0.1
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.loop = loop or asyncio.get_running_loop()
+        self._pending: Dict[ray.ObjectRef, List[asyncio.Future]] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def wait(self, obj_ref) -> asyncio.Future:
+        future = self.loop.create_future()
+        with self._lock:
+            self._pending.setdefault(obj_ref, []).append(future)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+        return future
+
+    def _run(self):
+        while True:
+            with self._lock:
+                # Drop refs nobody is waiting on anymore, e.g. if the client went away
+                for obj_ref in [
+                    ref
+                    for ref, futures in self._pending.items()
+                    if all(f.done() for f in futures)
+                ]:
+                    del self._pending[obj_ref]
+                obj_refs = list(self._pending)
+            if not obj_refs:
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+
+            ready, _ = ray.wait(
+                obj_refs, num_returns=1, timeout=self.POLL_INTERVAL, fetch_local=False
+            )
+            if ready:
+                # Pick up any others which resolved in the meantime
+                ready, _ = ray.wait(
+                    obj_refs, num_returns=len(obj_refs), timeout=0, fetch_local=False
+                )
+            for obj_ref in ready:
+                with self._lock:
+                    futures = self._pending.pop(obj_ref, [])
+                for future in futures:
+                    self.loop.call_soon_threadsafe(_set_done, future)
+
+
+def _set_done(future):
+    if not future.done():
+        future.set_result(None)
@@ -0,0 +1,113 @@
+import asyncio
+import os
+import tempfile
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import ray.cloudpickle as pickle
+
+
+class SerializedResult:
+    """A pickled value from the object store, shared by all the GetObject streams sending it. Small values are
+    kept in memory, larger ones in an unnamed temp file which each stream reads at its own offsets, and which is
+    closed once nothing references the result anymore."""
+
+    # Values pickled to at most this many bytes are kept in memory
+    IN_MEMORY_THRESHOLD = 1024 * 1024
+
+    def __init__(
+        self,
+        ref_id: str,
+        data: Optional[bytes] = None,
+        f=None,
+        size: int = 0,
+        immutable: bool = False,
+    ):
+        self.ref_id = ref_id
+        self.data = data
+        self.f = f
+        self.size = len(data) if data is not None else size
+        # Whether the value is the result of a finished run, which can't change
+        self.immutable = immutable
+
+    @classmethod
+    def from_obj(cls, obj: Any, ref_id: str, immutable: bool = False):
+        f = tempfile.TemporaryFile()
+        pickle.dump(obj, f)
+        size = f.tell()
+        if size <= cls.IN_MEMORY_THRESHOLD:
+            f.seek(0)
+            with f:
+                return cls(ref_id, data=f.read(), immutable=immutable)
+        f.flush()
+        return cls(ref_id, f=f, size=size, immutable=immutable)
+
+    def read(self, offset: int, size: int) -> bytes:
+        if self.data is not None:
+            return self.data[offset : offset + size]
+        return os.pread(self.f.fileno(), size, offset)
+
+
+class ResultCache:
+    """Single-flight retrieval and serialization of object store values for GetObject, so that any number of
+    concurrent requests for the same key share one ``ray.get`` and one pickled copy of the value. Finished
+    results are kept in an LRU cache of up to ``max_bytes`` (in total pickled size) for later requests, and
+    are recomputed if the key is put again."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._cache: "OrderedDict[str, SerializedResult]" = OrderedDict()
+        self._in_flight: Dict[Tuple[str, str], asyncio.Future] = {}
+
+    def get(
+        self,
+        key: str,
+        ref_id: str,
+        serialize: Callable[[], Awaitable[SerializedResult]],
+    ) -> asyncio.Future:
+        """Get a future for the serialized value of ``key``, whose object ref has id ``ref_id``, from the cache,
+        or from the retrieval already in flight, or else by starting one with ``serialize``. Callers should await
+        it with ``asyncio.shield`` so that one stream going away doesn't cancel it for the others."""
+        cached = self._cache.get(key)
+        if cached is not None and cached.ref_id == ref_id:
+            self._cache.move_to_end(key)
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(cached)
+            return future
+
+        flight = self._in_flight.get((key, ref_id))
+        if flight is None:
+            flight = asyncio.ensure_future(serialize())
+            self._in_flight[(key, ref_id)] = flight
+            flight.add_done_callback(
+                lambda f, k=key, r=ref_id: self._on_serialized(k, r, f)
+            )
+        return flight
+
+    def _on_serialized(self, key, ref_id, flight):
+        self._in_flight.pop((key, ref_id), None)
+        if flight.cancelled() or flight.exception() is not None:
+            return
+        self.put(key, flight.result())
+
+    def put(self, key: str, result: SerializedResult):
+        self.invalidate(key)
+        if result.size > self.max_bytes:
+            return
+        self._cache[key] = result
+        self.size += result.size
+        while self.size > self.max_bytes:
+            _, evicted = self._cache.popitem(last=False)
+            self.size -= evicted.size
+
+    def invalidate(self, key: Optional[str] = None):
+        """Drop ``key`` from the cache, or everything if ``key`` is None. Streams still sending a dropped result
+        keep it alive until they're done."""
+        if key is None:
+            self._cache.clear()
+            self.size = 0
+            return
+        evicted = self._cache.pop(key, None)
+        if evicted is not None:
+            self.size -= evicted.size
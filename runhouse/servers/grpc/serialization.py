@@ -0,0 +1,219 @@
+import gzip
+import logging
+import tempfile
+from typing import Any, IO, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import ray.cloudpickle as pickle
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 32 * 1024 * 1024  # 32 MB
+OOB_BUFFER_THRESHOLD = 1024 * 1024  # 1 MB
+
+# Payloads smaller than this aren't worth compressing
+COMPRESSION_THRESHOLD = 64 * 1024  # 64 KB
+# Before compressing a payload, compress a few slices of it and skip it if they don't shrink by at least this ratio
+COMPRESSION_SAMPLE_SLICES = 4
+COMPRESSION_SAMPLE_SLICE_SIZE = 16 * 1024  # 16 KB
+MIN_COMPRESSION_RATIO = 1.1
+
+
+def _gzip_codec():
+    return (
+        lambda data: gzip.compress(data, compresslevel=1),
+        gzip.decompress,
+    )
+
+
+def _zstd_codec():
+    import zstandard
+
+    return (
+        zstandard.ZstdCompressor(level=3).compress,
+        zstandard.ZstdDecompressor().decompress,
+    )
+
+
+def _lz4_codec():
+    import lz4.frame
+
+    return lz4.frame.compress, lz4.frame.decompress
+
+
+# Codecs in order of preference. gzip is in the standard library, zstd and lz4 need the ``zstandard`` and ``lz4``
+# packages installed.
+_CODEC_LOADERS = {"zstd": _zstd_codec, "lz4": _lz4_codec, "gzip": _gzip_codec}
+_codecs = {}
+
+
+def _load_codec(codec: str):
+    if codec not in _codecs:
+        try:
+            _codecs[codec] = _CODEC_LOADERS[codec]()
+        except ImportError:
+            _codecs[codec] = None
+    return _codecs[codec]
+
+
+def available_codecs() -> List[str]:
+    """Compression codecs installed in this environment, in order of preference."""
+    return [codec for codec in _CODEC_LOADERS if _load_codec(codec)]
+
+
+def resolve_codec(codec: Optional[str]) -> Optional[str]:
+    """Validate a configured compression codec, falling back to gzip if it isn't installed. ``None`` or
+    ``"none"`` disables compression."""
+    if not codec or codec == "none":
+        return None
+    if codec not in _CODEC_LOADERS:
+        raise ValueError(
+            f"Compression codec {codec} not recognized, must be one of {list(_CODEC_LOADERS)} or 'none'"
+        )
+    if not _load_codec(codec):
+        logger.warning(
+            f"Compression codec {codec} is not installed, falling back to gzip"
+        )
+        return "gzip"
+    return codec
+
+
+def negotiate_codec(accepted: Sequence[str]) -> Optional[str]:
+    """Pick the first codec from the peer's ``accepted`` list (in its order of preference) which is installed
+    here, or ``None`` if there isn't one."""
+    for codec in accepted:
+        if codec in _CODEC_LOADERS and _load_codec(codec):
+            return codec
+    return None
+
+
+def _is_compressible(data: bytes, compress) -> bool:
+    view = memoryview(data)
+    step = max(len(view) // COMPRESSION_SAMPLE_SLICES, COMPRESSION_SAMPLE_SLICE_SIZE)
+    sample = b"".join(
+        view[start : start + COMPRESSION_SAMPLE_SLICE_SIZE]
+        for start in range(0, len(view), step)
+    )
+    return len(sample) >= MIN_COMPRESSION_RATIO * len(compress(sample))
+
+
+def compress(
+    data: bytes, codec: Optional[str], threshold: int = COMPRESSION_THRESHOLD
+) -> Tuple[bytes, str]:
+    """Compress ``data`` with ``codec``, unless it's smaller than ``threshold`` or a sample of it doesn't compress
+    well (e.g. already compressed media or random floats).
+
+    Returns the payload and the codec it was compressed with, or ``""`` if it was left as is, to be passed to
+    :func:`decompress` on the other side."""
+    if not codec or len(data) < threshold:
+        return data, ""
+    compress_fn = _load_codec(codec)[0]
+    if not _is_compressible(data, compress_fn):
+        return data, ""
+    return compress_fn(data), codec
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    """Reverse :func:`compress`."""
+    if not codec:
+        return data
+    loaded = _load_codec(codec) if codec in _CODEC_LOADERS else None
+    if not loaded:
+        raise ValueError(
+            f"Received a payload compressed with {codec}, which is not installed here"
+        )
+    return loaded[1](data)
+
+
+def compress_buffers(
+    buffers: Iterable[bytes], codec: Optional[str]
+) -> Tuple[List[bytes], List[str]]:
+    """Compress each of a list of out-of-band buffers separately, returning the payloads and their codecs."""
+    compressed = [compress(buf, codec) for buf in buffers]
+    return [buf for buf, _ in compressed], [c for _, c in compressed]
+
+
+def decompress_buffers(buffers: Sequence[bytes], codecs: Sequence[str]) -> List[bytes]:
+    return [
+        decompress(buf, codecs[i] if i < len(codecs) else "")
+        for i, buf in enumerate(buffers)
+    ]
+
+
+def serialize_to_chunks(obj: Any, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Pickle ``obj`` and yield the result in pieces of at most ``chunk_size`` bytes.
+
+    The pickled bytes are spooled to a temporary file once they outgrow ``chunk_size``, so the full
+    serialized copy is never held in memory at once."""
+    with serialize_to_file(obj, chunk_size=chunk_size) as f:
+        yield from iter_file_chunks(f, chunk_size=chunk_size)
+
+
+def serialize_to_file(obj: Any, chunk_size: int = CHUNK_SIZE) -> IO[bytes]:
+    """Pickle ``obj`` into a spooled temporary file, rewound to the start. The caller is responsible for
+    closing it."""
+    f = tempfile.SpooledTemporaryFile(max_size=chunk_size)
+    pickle.dump(obj, f)
+    f.seek(0)
+    return f
+
+
+def iter_file_chunks(f: IO[bytes], chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+def deserialize_from_chunks(chunks: Iterable[bytes], chunk_size: int = CHUNK_SIZE):
+    """Reassemble and unpickle an object from the chunks produced by :func:`serialize_to_chunks`."""
+    with tempfile.SpooledTemporaryFile(max_size=chunk_size) as f:
+        for chunk in chunks:
+            f.write(chunk)
+        f.seek(0)
+        return pickle.load(f)
+
+
+def serialize_with_buffers(
+    obj: Any, threshold: int = OOB_BUFFER_THRESHOLD
+) -> Tuple[bytes, List[bytes]]:
+    """Pickle ``obj`` with protocol 5, sending buffers of at least ``threshold`` bytes (e.g. numpy arrays, Arrow
+    buffers, torch CPU tensors) out-of-band instead of copying them into the pickle stream.
+
+    Returns the pickle stream and the list of raw buffers it references, to be passed to
+    :func:`deserialize_with_buffers` on the other side."""
+    buffers = []
+
+    def buffer_callback(buf):
+        raw = buf.raw()
+        if raw.nbytes < threshold:
+            # Small buffers are cheaper to keep in-band than to send as separate frames
+            return True
+        buffers.append(raw)
+        return False
+
+    data = pickle.dumps(obj, protocol=5, buffer_callback=buffer_callback)
+    return data, [bytes(buf) for buf in buffers]
+
+
+def deserialize_with_buffers(data: bytes, buffers: Iterable[bytes] = ()):
+    """Unpickle an object produced by :func:`serialize_with_buffers`. Arrays are rebuilt directly on top of
+    ``buffers`` without copying, so they are read-only."""
+    return pickle.loads(data, buffers=buffers)
+
+
+def serialize_result(obj: Any, oob_buffers: bool = False):
+    """Serialize a result to send back to the client, either as plain pickled bytes or, if the client accepts
+    out-of-band buffers, as a ``(data, buffers)`` tuple."""
+    if oob_buffers:
+        return serialize_with_buffers(obj)
+    return pickle.dumps(obj)
+
+
+def nbytes(obj: Any) -> int:
+    """Best-effort size in bytes of a buffer-like object (bytes, numpy arrays, Arrow arrays, torch tensors),
+    or 0 if the size isn't known cheaply."""
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        return memoryview(obj).nbytes
+    size = getattr(obj, "nbytes", 0)
+    return size if isinstance(size, int) else 0
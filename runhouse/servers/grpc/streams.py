@@ -0,0 +1,60 @@
+import os
+from pathlib import Path
+
+import runhouse.servers.grpc.unary_pb2 as pb2
+from runhouse.servers.grpc.serialization import compress
+from runhouse.servers.grpc.unary_client import KeyStatus, OutputType
+
+# How runs ended in the object store, as sent by WatchKeys
+KEY_STATUSES = {
+    "done": KeyStatus.COMPLETED,
+    "failed": KeyStatus.FAILED,
+    "cancelled": KeyStatus.CANCELLED,
+}
+
+
+def read_new_logs(logs_path, open_files, offsets, chunk_size, max_chunks):
+    """Read what's been written to a run's log files since the given byte offsets, which are updated in place,
+    keeping the files open in ``open_files`` between calls.
+
+    Returns a list of ``(file name, data, offset after the data)``, and whether there's more to read after
+    reading ``max_chunks`` chunks."""
+    chunks = []
+    for path in sorted(logs_path.glob("worker*")):
+        if path.name not in open_files:
+            f = open(path, "rb")
+            f.seek(offsets.get(path.name, 0))
+            open_files[path.name] = f
+        f = open_files[path.name]
+        while len(chunks) < max_chunks:
+            data = f.read(chunk_size)
+            if not data:
+                break
+            offsets[path.name] = f.tell()
+            chunks.append((path.name, data, offsets[path.name]))
+        if len(chunks) >= max_chunks:
+            return chunks, True
+    return chunks, False
+
+
+def log_watch_paths(logs_path, open_files):
+    """The paths to watch for a run's logs: its logs directory (or the directory it'll be created in) for new
+    log files, and the Ray worker log files its open logs are symlinked to."""
+    paths = [logs_path if logs_path.exists() else logs_path.parent]
+    paths += [Path(os.path.realpath(f.name)) for f in open_files.values()]
+    return paths
+
+
+def log_chunk(file_name, data, offset, codec=None):
+    """A ``LogChunk`` message for ``data`` read from a run's log file, compressed with ``codec`` if given."""
+    data, compression = compress(data, codec)
+    # Ray worker logs are named like worker-[worker_id]-[job_id]-[pid].[out|err]
+    parts = file_name.split("-")
+    return pb2.LogChunk(
+        file=file_name,
+        worker_id=parts[1] if len(parts) > 1 else "",
+        stream=OutputType.STDERR if file_name.endswith(".err") else OutputType.STDOUT,
+        data=data,
+        offset=offset,
+        compression=compression,
+    )
@@ -1,6 +1,10 @@
+import asyncio
+import contextlib
+import functools
 import logging
 import re
 import sys
+import tempfile
 import time
 
 import grpc
@@ -10,6 +14,19 @@ import ray.cloudpickle as pickle
 import runhouse.servers.grpc.unary_pb2 as pb2
 
 import runhouse.servers.grpc.unary_pb2_grpc as pb2_grpc
+from runhouse.servers.grpc.serialization import (
+    available_codecs,
+    CHUNK_SIZE,
+    compress,
+    compress_buffers,
+    decompress,
+    decompress_buffers,
+    deserialize_from_chunks,
+    deserialize_with_buffers,
+    resolve_codec,
+    serialize_to_chunks,
+    serialize_with_buffers,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +37,50 @@ class OutputType:
     RESULT = "result"
 
 
+class KeyStatus:
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+    NOT_FOUND = "not_found"
+
+
+def print_log_chunk(chunk):
+    """Print a ``LogChunk`` streamed from the server to stdout or stderr."""
+    out = sys.stderr if chunk.stream == OutputType.STDERR else sys.stdout
+    if hasattr(out, "buffer"):
+        # Write the raw bytes, so partial lines and tqdm's carriage returns come out as they were written
+        out.flush()
+        out.buffer.write(chunk.data)
+        out.buffer.flush()
+    else:
+        # e.g. in a notebook
+        out.write(chunk.data.decode(errors="replace"))
+        out.flush()
+
+
+@contextlib.contextmanager
+def _deadline(timeout, description):
+    """Raise a ``TimeoutError`` if the RPCs made inside the block hit their deadline."""
+    try:
+        yield
+    except grpc.RpcError as e:
+        if e.code() == grpc.StatusCode.DEADLINE_EXCEEDED:
+            raise TimeoutError(
+                f"{description} did not finish within {timeout} seconds"
+            ) from e
+        raise
+
+
+def _string_keys(prefix, items):
+    """Map the (optionally prefixed) position or name of each string arg to the string, so the server can check
+    which of them are keys in its object store."""
+    return {
+        f"{prefix}.{name}" if prefix else str(name): arg
+        for name, arg in items
+        if isinstance(arg, str)
+    }
+
+
 class UnaryClient(object):
     """
     Client for gRPC functionality
@@ -28,24 +89,53 @@ class UnaryClient(object):
 
     DEFAULT_PORT = 50052
     MAX_MESSAGE_LENGTH = 1 * 1024 * 1024 * 1024  # 1 GB
-    TIMEOUT_SEC = 3
+    # Deadline for the quick control RPCs (listing keys, cancelling runs, etc.)
+    TIMEOUT_SEC = 10
+    # Deadline for installing packages, which can take a while (e.g. building wheels or solving a conda env)
+    INSTALL_TIMEOUT_SEC = 60 * 60
+    # How often to check again while waiting for a server which is up but not ready (e.g. Ray is starting)
+    READY_POLL_INTERVAL = 0.1
+    CHUNK_SIZE = CHUNK_SIZE
 
-    def __init__(self, host, port=DEFAULT_PORT):
+    def __init__(
+        self,
+        host,
+        port=DEFAULT_PORT,
+        oob_buffers=True,
+        compression="gzip",
+        bulk_arg_uploader=None,
+        user=None,
+    ):
+        """
+        Args:
+            host (str): Host the server is reachable at (usually localhost, through the SSH tunnel), or a
+                ``unix://`` socket address.
+            port (int): Port the server is reachable at, or ``None`` for a Unix socket.
+            oob_buffers (bool): Whether to send large buffers in RunModule args and results (numpy arrays, Arrow
+                buffers, torch CPU tensors) out-of-band with pickle protocol 5, rather than copying them into the
+                pickled message. (Default: ``True``)
+            compression (str, optional): Codec to compress large payloads with (``"zstd"``, ``"lz4"`` or
+                ``"gzip"``), or ``None`` to disable compression. Payloads which don't compress well are sent as
+                is. zstd and lz4 must also be installed on the cluster. The server compresses its responses
+                with the best codec installed on both sides. (Default: ``"gzip"``)
+            bulk_arg_uploader (BulkArgUploader, optional): Uploads large RunModule args (bytes, numpy arrays,
+                paths to local files) to the cluster over SFTP, deduplicated by their content hash, rather than
+                sending them in the message.
+            user (str, optional): User to record as the owner of the runs submitted through this client.
+        """
         self.host = host
         self.port = port
-        self.channel = grpc.insecure_channel(
-            f"{self.host}:{self.port}",
-            options=[
-                ("grpc.max_send_message_length", self.MAX_MESSAGE_LENGTH),
-                ("grpc.max_receive_message_length", self.MAX_MESSAGE_LENGTH),
-            ],
+        self.oob_buffers = oob_buffers
+        self.bulk_arg_uploader = bulk_arg_uploader
+        self.user = user
+        self.compression = resolve_codec(compression)
+        self.accept_compression = (
+            [self.compression]
+            + [c for c in available_codecs() if c != self.compression]
+            if self.compression
+            else []
         )
-        self._connectivity_state = None
-
-        def on_state_change(state):
-            self._connectivity_state = state
-
-        self.channel.subscribe(on_state_change, False)
+        self.channel = self._create_channel()
 
         # bind the client and the server
         self.stub = pb2_grpc.UnaryStub(self.channel)
@@ -54,9 +144,39 @@ class UnaryClient(object):
         # os.environ['GRPC_TRACE'] = 'all'
         # os.environ['GRPC_VERBOSITY'] = 'DEBUG'
 
-    def install_packages(self, to_install, env=None):
+    @property
+    def _target(self):
+        return f"{self.host}:{self.port}" if self.port else self.host
+
+    @property
+    def _channel_options(self):
+        return [
+            ("grpc.max_send_message_length", self.MAX_MESSAGE_LENGTH),
+            ("grpc.max_receive_message_length", self.MAX_MESSAGE_LENGTH),
+            # Retry connecting quickly, so reconnecting to a restarted server takes about as long as the server
+            # takes to start, rather than growing up to gRPC's default of 2 minutes between attempts
+            ("grpc.initial_reconnect_backoff_ms", 100),
+            ("grpc.max_reconnect_backoff_ms", 2000),
+        ]
+
+    def _create_channel(self):
+        channel = grpc.insecure_channel(self._target, options=self._channel_options)
+        self._connectivity_state = None
+
+        def on_state_change(state):
+            self._connectivity_state = state
+
+        channel.subscribe(on_state_change, False)
+        return channel
+
+    def install_packages(self, to_install, env=None, timeout=INSTALL_TIMEOUT_SEC):
         message = pb2.Message(message=pickle.dumps((to_install, env)))
-        server_res = self.stub.InstallPackages(message)
+        with _deadline(timeout, "Installing packages"):
+            server_res = self.stub.InstallPackages(message, timeout=timeout)
+        return self._install_packages_result(server_res, to_install)
+
+    @staticmethod
+    def _install_packages_result(server_res, to_install):
         [res, fn_exception, fn_traceback] = pickle.loads(server_res.message)
         if fn_exception is not None:
             logger.error(f"Error installing packages {to_install}: {fn_exception}")
@@ -64,57 +184,397 @@ class UnaryClient(object):
             raise fn_exception
         return res
 
-    def add_secrets(self, secrets):
+    def add_secrets(self, secrets, timeout=TIMEOUT_SEC):
         message = pb2.Message(message=secrets)
-        server_res = self.stub.AddSecrets(message)
+        with _deadline(timeout, "Adding secrets"):
+            server_res = self.stub.AddSecrets(message, timeout=timeout)
         return pickle.loads(server_res.message)
 
-    def cancel_runs(self, keys, force=False, all=False):
+    def cancel_runs(self, keys, force=False, all=False, timeout=TIMEOUT_SEC):
         message = pb2.Message(message=pickle.dumps((keys, force, all)))
-        res = self.stub.CancelRun(message)
+        with _deadline(timeout, "Cancelling runs"):
+            res = self.stub.CancelRun(message, timeout=timeout)
         return pickle.loads(res.message)
 
-    def list_keys(self):
-        res = self.stub.ListKeys(pb2.Message())
-        return pickle.loads(res.message)
+    def list_keys(
+        self,
+        prefix=None,
+        statuses=None,
+        submitted_after=None,
+        submitted_before=None,
+        timeout=TIMEOUT_SEC,
+    ):
+        """Keys in the server's object store, filtered as in :func:`list_runs`."""
+        if not (prefix or statuses or submitted_after or submitted_before):
+            # Unfiltered, which servers from before QueryKeys can answer too
+            with _deadline(timeout, "Listing keys"):
+                res = self.stub.ListKeys(pb2.Message(), timeout=timeout)
+            return pickle.loads(res.message)
+        request = self._query_keys_request(
+            prefix, statuses, submitted_after, submitted_before
+        )
+        with _deadline(timeout, "Listing keys"):
+            res = self.stub.QueryKeys(request, timeout=timeout)
+        return list(res.keys)
+
+    def list_runs(
+        self,
+        prefix=None,
+        statuses=None,
+        submitted_after=None,
+        submitted_before=None,
+        limit=None,
+        page_token=None,
+        timeout=TIMEOUT_SEC,
+    ):
+        """
+        Metadata of the keys in the server's object store, oldest first, filtered on the server to keys starting
+        with ``prefix``, runs with one of ``statuses`` and keys submitted in ``[submitted_after,
+        submitted_before)`` (in seconds since the epoch). Returns at most ``limit`` records and the page token
+        to pass for the next page, or ``None`` if there are no more.
+        """
+        request = self._query_keys_request(
+            prefix,
+            statuses,
+            submitted_after,
+            submitted_before,
+            limit,
+            page_token,
+            with_metadata=True,
+        )
+        with _deadline(timeout, "Listing runs"):
+            res = self.stub.QueryKeys(request, timeout=timeout)
+        return self._list_runs_result(res)
+
+    @staticmethod
+    def _query_keys_request(
+        prefix=None,
+        statuses=None,
+        submitted_after=None,
+        submitted_before=None,
+        limit=None,
+        page_token=None,
+        with_metadata=False,
+    ):
+        return pb2.QueryKeysRequest(
+            prefix=prefix or "",
+            statuses=[statuses] if isinstance(statuses, str) else statuses or [],
+            submitted_after=submitted_after or 0,
+            submitted_before=submitted_before or 0,
+            limit=limit or 0,
+            page_token=page_token or "",
+            with_metadata=with_metadata,
+        )
+
+    @staticmethod
+    def _list_runs_result(res):
+        records = [
+            {
+                "key": metadata.key,
+                "run_id": metadata.run_id or None,
+                "fn_name": metadata.fn_name or None,
+                "submitted": metadata.submitted,
+                "finished": metadata.finished or None,
+                "status": metadata.status or None,
+                "size": metadata.size if metadata.HasField("size") else None,
+                "user": metadata.user or None,
+            }
+            for metadata in res.metadata
+        ]
+        return records, res.next_page_token or None
+
+    def server_status(self, timeout=TIMEOUT_SEC):
+        """Load on each of the server's thread pools, e.g. ``{"control": {"max_workers": 4, "active": 0,
+        "queued": 0, "completed": 12}, ...}``."""
+        with _deadline(timeout, "Getting the server status"):
+            res = self.stub.Status(pb2.StatusRequest(), timeout=timeout)
+        return self._lane_statuses(res)
+
+    def obj_store_stats(self, timeout=TIMEOUT_SEC):
+        """Entries and bytes in the server's object store, its memory budget and TTL, how many entries have
+        been evicted by each, and how many are spilled to disk, e.g.
+        ``{"entries": 12, "bytes": 1048576, "max_bytes": 4294967296, ...}``."""
+        with _deadline(timeout, "Getting the object store stats"):
+            res = self.stub.Status(pb2.StatusRequest(), timeout=timeout)
+        return self._obj_store_stats(res)
+
+    @staticmethod
+    def _obj_store_stats(res):
+        stats = res.obj_store
+        return {
+            "entries": stats.entries,
+            "bytes": stats.bytes,
+            "never_evict": stats.never_evict,
+            "max_bytes": stats.max_bytes or None,
+            "ttl": stats.ttl or None,
+            "evicted_lru": stats.evicted_lru,
+            "evicted_ttl": stats.evicted_ttl,
+            "evicted_bytes": stats.evicted_bytes,
+            "spilled": stats.spilled,
+            "spilled_bytes": stats.spilled_bytes,
+            "spill_max_bytes": stats.spill_max_bytes or None,
+            "spills": stats.spills,
+            "promotions": stats.promotions,
+        }
+
+    def health(self, timeout=TIMEOUT_SEC):
+        """The server's Runhouse version, whether it's connected to Ray, its uptime in seconds and the load on
+        its thread pools, e.g. ``{"version": "0.0.5", "ray_ready": True, "uptime": 42.0, "lanes": {...}}``."""
+        with _deadline(timeout, "Health check"):
+            res = self.stub.Health(pb2.HealthRequest(), timeout=timeout)
+        return self._health(res)
+
+    def wait_until_ready(self, timeout, started_after=None):
+        """
+        Wait for the server to be up and ready to run functions, instead of polling the channel's state.
+
+        Args:
+            timeout (float): Most seconds to wait.
+            started_after (float, optional): Also wait for the server to have been started after this time,
+                e.g. when it's being restarted.
+
+        Returns:
+            The server's :func:`health`, or ``None`` if it wasn't ready in time.
+        """
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            try:
+                grpc.channel_ready_future(self.channel).result(
+                    timeout=deadline - time.time()
+                )
+                health = self.health(timeout=max(deadline - time.time(), 0.01))
+            except (grpc.FutureTimeoutError, TimeoutError):
+                return None
+            except grpc.RpcError as e:
+                # e.g. the server went down again between connecting and the health check
+                logger.debug(f"Health check failed: {e}")
+                time.sleep(self.READY_POLL_INTERVAL)
+                continue
+            if self._is_ready(health, started_after):
+                self._connectivity_state = grpc.ChannelConnectivity.READY
+                return health
+            time.sleep(self.READY_POLL_INTERVAL)
+        return None
+
+    @staticmethod
+    def _is_ready(health, started_after):
+        if started_after is not None and health["uptime"] > time.time() - started_after:
+            # Still the server from before the restart
+            return False
+        return health["ray_ready"]
+
+    @classmethod
+    def _health(cls, res):
+        return {
+            "version": res.version,
+            "ray_ready": res.ray_ready,
+            "uptime": res.uptime,
+            "lanes": cls._lane_statuses(res),
+        }
+
+    @staticmethod
+    def _lane_statuses(res):
+        return {
+            lane.name: {
+                "max_workers": lane.max_workers,
+                "active": lane.active,
+                "queued": lane.queued,
+                "completed": lane.completed,
+            }
+            for lane in res.lanes
+        }
 
     # TODO [DG]: maybe just merge cancel into this so we can get log streaming back as we cancel a job
-    def get_object(self, key, stream_logs=False):
-        """
-        Get a value from the server
-        """
-        message = pb2.Message(message=pickle.dumps((key, stream_logs)))
-        for resp in self.stub.GetObject(message):
-            output_type = resp.output_type
-            server_res = pickle.loads(resp.message)
-            if output_type == OutputType.STDOUT:
-                # Regex to match tqdm progress bars
-                tqdm_regex = re.compile(r"(.+)%\|(.+)\|\s+(.+)/(.+)")
-                for line in server_res:
-                    if tqdm_regex.match(line):
-                        # tqdm lines are always preceded by a \n, so we can use \x1b[1A to move the cursor up one line
-                        # For some reason, doesn't work in PyCharm's console, but works in the terminal
-                        print("\x1b[1A\r" + line, end="", flush=True)
-                    else:
-                        print(line, end="", flush=True)
-            elif output_type == OutputType.STDERR:
-                for line in server_res:
-                    print(line, file=sys.stderr)
-            else:
-                [res, fn_exception, fn_traceback] = server_res
-                if fn_exception is not None:
-                    logger.error(
-                        f"Error running or getting run_key {key}: {fn_exception}."
-                    )
-                    logger.error(f"Traceback: {fn_traceback}")
-                    raise fn_exception
-                return res
-
-    def put_object(self, key, value):
-        message = pb2.Message(message=pickle.dumps((key, value)))
-        resp = self.stub.PutObject(message)
-        server_res = pickle.loads(resp.message)
+    def get_object(self, key, stream_logs=False, timeout=None):
+        """
+        Get a value from the server. The result is streamed back in chunks after any log lines, and reassembled
+        here without holding more than one chunk of the serialized result in memory. Raises a ``TimeoutError``
+        if it takes longer than ``timeout`` seconds (e.g. waiting for a remote run to finish), though the run
+        itself carries on.
+        """
+        return self.get_object_info(key, stream_logs=stream_logs, timeout=timeout)[0]
+
+    def get_object_info(self, key, stream_logs=False, timeout=None):
+        """Like :func:`get_object`, but returns a tuple of the value, whether it's the result of a finished run
+        (so will never change, and can be cached), and its size in bytes pickled."""
+        message = pb2.Message(
+            message=pickle.dumps((key, stream_logs)),
+            accept_compression=self.accept_compression,
+        )
+        info = {"immutable": False, "size": 0}
+
+        def result_chunks():
+            for resp in self.stub.GetObject(message, timeout=timeout):
+                data = decompress(resp.message, resp.compression)
+                if resp.output_type == OutputType.RESULT:
+                    info["immutable"] = resp.immutable
+                    info["size"] += len(data)
+                    yield data
+                else:
+                    self._print_logs(resp.output_type, pickle.loads(data))
+
+        with _deadline(timeout, f"Getting {key}"):
+            server_res = deserialize_from_chunks(
+                result_chunks(), chunk_size=self.CHUNK_SIZE
+            )
+        return self._get_object_result(server_res, key), info["immutable"], info["size"]
+
+    def get_objects(self, keys, timeout=None):
+        """
+        Get many values from the server in one round trip. Returns a dict of the values which could be got, a
+        dict of the errors for the rest (a ``KeyError`` if the key isn't in the object store, otherwise e.g. the
+        exception the run raised), and the sizes pickled of the values which are results of finished runs (so
+        can be cached), all by key.
+        """
+        message = pb2.Message(
+            message=pickle.dumps(list(keys)),
+            accept_compression=self.accept_compression,
+        )
+
+        def result_chunks():
+            for resp in self.stub.GetObjects(message, timeout=timeout):
+                yield decompress(resp.message, resp.compression)
+
+        with _deadline(timeout, f"Getting {len(keys)} objects"):
+            server_res = deserialize_from_chunks(
+                result_chunks(), chunk_size=self.CHUNK_SIZE
+            )
+        return self._get_objects_result(server_res)
+
+    @staticmethod
+    def _get_objects_result(server_res):
+        pickled, errors, immutable = server_res
+        values = {key: pickle.loads(data) for key, data in pickled.items()}
+        sizes = {key: len(pickled[key]) for key in immutable}
+        return values, errors, sizes
+
+    @staticmethod
+    def _get_object_result(server_res, key):
         [res, fn_exception, fn_traceback] = server_res
+        if fn_exception is not None:
+            logger.error(f"Error running or getting run_key {key}: {fn_exception}.")
+            logger.error(f"Traceback: {fn_traceback}")
+            raise fn_exception
+        return res
+
+    def watch_keys(self, keys=None, prefix=None, timeout=None):
+        """
+        Watch keys in the server's object store over a single stream, yielding a ``(key, status)`` tuple as each
+        one resolves (see :class:`KeyStatus`), in the order they resolve.
+
+        Args:
+            keys (List[str], optional): Keys to watch, e.g. the run keys of remote calls.
+            prefix (str, optional): Also watch all keys starting with this prefix when the watch starts.
+            timeout (float, optional): Raise a ``TimeoutError`` if the keys haven't all resolved after this many
+                seconds.
+        """
+        events = self.stub.WatchKeys(
+            pb2.WatchKeysRequest(keys=keys or [], prefix=prefix or ""),
+            timeout=timeout,
+        )
+        try:
+            for event in events:
+                yield event.key, event.status
+        except grpc.RpcError as e:
+            if e.code() == grpc.StatusCode.DEADLINE_EXCEEDED:
+                raise TimeoutError(
+                    f"Keys did not all resolve within {timeout} seconds"
+                ) from e
+            raise
+        finally:
+            # Stop the stream on the server if we're closed before it's done
+            events.cancel()
+
+    def stream_logs(self, run_key, offsets=None, follow=True, timeout=None):
+        """
+        Stream the raw stdout and stderr of a run as ``LogChunk`` messages, each tagged with its log file, Ray
+        worker and stream (``"stdout"`` or ``"stderr"``).
+
+        Args:
+            run_key (str): Run key of the run.
+            offsets (Dict[str, int], optional): Bytes already received from each log file, i.e. the ``offset``
+                of the last chunk received for each ``file``, to resume where a previous stream left off.
+            follow (bool): Keep streaming until the run finishes, rather than only sending the logs written so
+                far. (Default: ``True``)
+            timeout (float, optional): Raise a ``TimeoutError`` if the stream hasn't finished after this many
+                seconds.
+        """
+        chunks = self.stub.StreamLogs(
+            self._stream_logs_request(run_key, offsets, follow), timeout=timeout
+        )
+        try:
+            with _deadline(timeout, f"Streaming logs of {run_key}"):
+                for chunk in chunks:
+                    yield self._decompress_log_chunk(chunk)
+        finally:
+            # Stop the stream on the server if we're closed before it's done
+            chunks.cancel()
+
+    def _stream_logs_request(self, run_key, offsets, follow):
+        return pb2.StreamLogsRequest(
+            run_key=run_key,
+            offsets=offsets or {},
+            follow=follow,
+            accept_compression=self.accept_compression,
+        )
+
+    @staticmethod
+    def _decompress_log_chunk(chunk):
+        if chunk.compression:
+            chunk.data = decompress(chunk.data, chunk.compression)
+            chunk.compression = ""
+        return chunk
+
+    @staticmethod
+    def _print_logs(output_type, lines):
+        if output_type == OutputType.STDOUT:
+            # Regex to match tqdm progress bars
+            tqdm_regex = re.compile(r"(.+)%\|(.+)\|\s+(.+)/(.+)")
+            for line in lines:
+                if tqdm_regex.match(line):
+                    # tqdm lines are always preceded by a \n, so we can use \x1b[1A to move the cursor up one line
+                    # For some reason, doesn't work in PyCharm's console, but works in the terminal
+                    print("\x1b[1A\r" + line, end="", flush=True)
+                else:
+                    print(line, end="", flush=True)
+        elif output_type == OutputType.STDERR:
+            for line in lines:
+                print(line, file=sys.stderr)
+
+    def put_object(self, key, value, timeout=None, never_evict=False):
+        """Put a value on the server, streaming it up in chunks so that objects larger than
+        ``MAX_MESSAGE_LENGTH`` can be sent. With ``never_evict``, the object is kept in the server's object
+        store even when the store is over its memory budget or TTL."""
+        with _deadline(timeout, f"Putting {key}"):
+            resp = self.stub.PutObjectStream(
+                self._object_chunks(key, value, never_evict), timeout=timeout
+            )
+        return self._put_object_result(resp, key)
+
+    def _object_chunks(self, key, value, never_evict=False):
+        for chunk in serialize_to_chunks(value, chunk_size=self.CHUNK_SIZE):
+            data, codec = compress(chunk, self.compression)
+            yield pb2.ObjectChunk(
+                key=key, data=data, compression=codec, never_evict=never_evict
+            )
+
+    def put_objects(self, values, timeout=None, never_evict=False):
+        """Put many values on the server in one round trip, streamed up in chunks like :func:`put_object`.
+        Returns the errors for any values which couldn't be put, by key."""
+        with _deadline(timeout, f"Putting {len(values)} objects"):
+            resp = self.stub.PutObjects(
+                self._objects_chunks(values, never_evict), timeout=timeout
+            )
+        return self._put_object_result(resp, f"{len(values)} objects")
+
+    def _objects_chunks(self, values, never_evict=False):
+        # Each value is pickled separately, so the server knows the size of each
+        pickled = {key: pickle.dumps(value) for key, value in values.items()}
+        return self._object_chunks("", pickled, never_evict)
+
+    @staticmethod
+    def _put_object_result(resp, key):
+        [res, fn_exception, fn_traceback] = pickle.loads(resp.message)
         if fn_exception is not None:
             logger.error(
                 f"Error putting object with key {key} on cluster: {fn_exception}."
@@ -123,9 +583,12 @@ class UnaryClient(object):
             raise fn_exception
         return res
 
-    def clear_pins(self, pins=None):
+    def clear_pins(self, pins=None, timeout=TIMEOUT_SEC):
+        """Remove the given pins (or all of them, if ``None``), returning the ones which were there."""
         message = pb2.Message(message=pickle.dumps(pins or []))
-        self.stub.ClearPins(message)
+        with _deadline(timeout, "Clearing pins"):
+            resp = self.stub.ClearPins(message, timeout=timeout)
+        return pickle.loads(resp.message)
 
     def run_module(
         self,
@@ -137,30 +600,134 @@ class UnaryClient(object):
         conda_env,
         args,
         kwargs,
+        timeout=None,
     ):
         """
-        Client function to call the rpc for RunModule
+        Client function to call the rpc for RunModule. The routing metadata is sent as typed fields, and the
+        args and kwargs are pickled separately per Ray task, so the server can dispatch the call without
+        unpickling any user objects.
+
+        If the call doesn't finish within ``timeout`` seconds, a ``TimeoutError`` is raised and the server
+        cancels its Ray tasks (all of them, for map, starmap and repeat).
         """
-        # Measure the time it takes to send the message
-        serialized_module = pickle.dumps(
-            [
-                relative_path,
-                module_name,
-                fn_name,
-                fn_type,
-                resources,
-                conda_env,
-                args,
-                kwargs,
-            ]
+        message = self._run_module_message(
+            relative_path,
+            module_name,
+            fn_name,
+            fn_type,
+            resources,
+            conda_env,
+            args,
+            kwargs,
         )
+        # Measure the time it takes to send the message
         start = time.time()
-        message = pb2.Message(message=serialized_module)
-        server_res = self.stub.RunModule(message)
+        with _deadline(timeout, f"Call to {fn_name}"):
+            server_res = self.stub.RunModule(message, timeout=timeout)
         end = time.time()
         logging.info(f"Time to send message: {round(end - start, 2)} seconds")
+        return self._run_module_result(server_res, fn_type)
+
+    def run_module_batch(self, calls, timeout=None):
+        """
+        Client function to call the rpc for RunModuleBatch, sending many calls in one round trip.
+
+        Args:
+            calls (List[Tuple]): The arguments to :func:`run_module` for each call. The calls can be for different
+                functions, fn_types and resources.
+            timeout (float, optional): Deadline for the whole batch, after which the calls' Ray tasks are
+                cancelled.
+
+        Returns:
+            A ``(result, exception)`` tuple for each call, in the same order, where ``result`` is e.g. the run
+            key for remote calls, and ``exception`` is None unless the call failed (in which case ``result``
+            is None).
+        """
+        messages = [self._run_module_message(*call) for call in calls]
+        start = time.time()
+        with _deadline(timeout, f"Batch of {len(messages)} calls"):
+            server_res = self.stub.RunModuleBatch(
+                pb2.MessageBatch(messages=messages), timeout=timeout
+            )
+        end = time.time()
+        logging.info(
+            f"Time to send batch of {len(messages)} messages: {round(end - start, 2)} seconds"
+        )
+        return [
+            self._run_module_outcome(res, call[3])
+            for res, call in zip(server_res.responses, calls)
+        ]
+
+    def _run_module_message(
+        self,
+        relative_path,
+        module_name,
+        fn_name,
+        fn_type,
+        resources,
+        conda_env,
+        args,
+        kwargs,
+    ):
+        serialized_fn = b""
+        if callable(fn_name):
+            # Notebook functions can't be imported on the cluster, so send them cloudpickled
+            serialized_fn = pickle.dumps(fn_name)
+            fn_name = fn_name.__name__
+
+        num_repeats = 0
+        if fn_type == "batch":
+            # Each call has its own args and kwargs, pickled together
+            serialized_args = [
+                self._serialize_args(
+                    (
+                        self._upload_bulk_args(tuple(call_args)),
+                        self._upload_bulk_args(call_kwargs),
+                    ),
+                    keys={
+                        **_string_keys("args", enumerate(call_args)),
+                        **_string_keys("kwargs", call_kwargs.items()),
+                    },
+                )
+                for call_args, call_kwargs in args
+            ]
+        elif fn_type == "map":
+            task_args = [(arg,) for arg in args]
+        elif fn_type == "starmap":
+            task_args = [tuple(arg) for arg in args]
+        elif fn_type == "repeat":
+            num_repeats, args = args
+            task_args = [tuple(args)]
+        else:
+            task_args = [tuple(args)]
+        if fn_type != "batch":
+            serialized_args = [
+                self._serialize_args(self._upload_bulk_args(arg)) for arg in task_args
+            ]
+
+        return pb2.Message(
+            relative_path=relative_path or "",
+            module_name=module_name,
+            func_name=fn_name,
+            fn_type=fn_type,
+            resources={k: v for k, v in (resources or {}).items() if v is not None},
+            conda_env=conda_env or "",
+            serialized_fn=serialized_fn,
+            args=serialized_args,
+            kwargs=self._serialize_args(self._upload_bulk_args(kwargs or {})),
+            num_repeats=num_repeats,
+            oob_buffers=self.oob_buffers,
+            accept_compression=self.accept_compression,
+            user=self.user or "",
+        )
+
+    @staticmethod
+    def _run_module_result(server_res, fn_type):
         if server_res.result != b"":
-            res = pickle.loads(server_res.result)
+            res = deserialize_with_buffers(
+                decompress(server_res.result, server_res.compression),
+                decompress_buffers(server_res.buffers, server_res.buffer_compression),
+            )
             return res
         if server_res.exception != b"":
             exception = pickle.loads(server_res.exception)
@@ -168,6 +735,38 @@ class UnaryClient(object):
             logger.error(f"Traceback: {server_res.traceback}")
             raise exception
 
+    @classmethod
+    def _run_module_outcome(cls, server_res, fn_type):
+        try:
+            return cls._run_module_result(server_res, fn_type), None
+        except Exception as e:
+            return None, e
+
+    def _upload_bulk_args(self, args):
+        if self.bulk_arg_uploader is None:
+            return args
+        return self.bulk_arg_uploader.swap(args)
+
+    def _serialize_args(self, args, keys=None):
+        """Pickle a tuple of args or dict of kwargs into a ``SerializedArgs`` message, noting the top-level
+        strings (or the given ``keys``) so the server can swap in objects from its object store."""
+        if keys is None:
+            items = args.items() if isinstance(args, dict) else enumerate(args)
+            keys = _string_keys(None, items)
+        if self.oob_buffers:
+            data, buffers = serialize_with_buffers(args)
+        else:
+            data, buffers = pickle.dumps(args), []
+        data, compression = compress(data, self.compression)
+        buffers, buffer_compression = compress_buffers(buffers, self.compression)
+        return pb2.SerializedArgs(
+            data=data,
+            buffers=buffers,
+            keys=keys,
+            compression=compression,
+            buffer_compression=buffer_compression,
+        )
+
     def is_connected(self):
         return self._connectivity_state in [
             grpc.ChannelConnectivity.READY,
@@ -177,3 +776,282 @@ class UnaryClient(object):
     def shutdown(self):
         if self.channel:
             self.channel.close()
+            # The channel doesn't report its own shutdown to subscribers
+            self._connectivity_state = grpc.ChannelConnectivity.SHUTDOWN
+        if self.bulk_arg_uploader is not None:
+            self.bulk_arg_uploader.close()
+
+
+class AsyncUnaryClient(UnaryClient):
+    """
+    asyncio counterpart of :class:`UnaryClient` on ``grpc.aio``, so a single event loop can drive many concurrent
+    calls to many clusters without a thread per call. Takes the same arguments, and its methods are coroutines
+    (or async generators, for the streaming ones). Pickling and unpickling of args and results runs in the
+    loop's default executor so it doesn't stall the loop.
+
+    Like any ``grpc.aio`` channel, it can only be used from the event loop it was created on.
+    """
+
+    def _create_channel(self):
+        return grpc.aio.insecure_channel(self._target, options=self._channel_options)
+
+    @staticmethod
+    async def _run_in_executor(fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(fn, *args)
+        )
+
+    async def install_packages(
+        self, to_install, env=None, timeout=UnaryClient.INSTALL_TIMEOUT_SEC
+    ):
+        message = pb2.Message(message=pickle.dumps((to_install, env)))
+        with _deadline(timeout, "Installing packages"):
+            server_res = await self.stub.InstallPackages(message, timeout=timeout)
+        return self._install_packages_result(server_res, to_install)
+
+    async def add_secrets(self, secrets, timeout=UnaryClient.TIMEOUT_SEC):
+        with _deadline(timeout, "Adding secrets"):
+            server_res = await self.stub.AddSecrets(
+                pb2.Message(message=secrets), timeout=timeout
+            )
+        return pickle.loads(server_res.message)
+
+    async def cancel_runs(
+        self, keys, force=False, all=False, timeout=UnaryClient.TIMEOUT_SEC
+    ):
+        message = pb2.Message(message=pickle.dumps((keys, force, all)))
+        with _deadline(timeout, "Cancelling runs"):
+            res = await self.stub.CancelRun(message, timeout=timeout)
+        return pickle.loads(res.message)
+
+    async def list_keys(
+        self,
+        prefix=None,
+        statuses=None,
+        submitted_after=None,
+        submitted_before=None,
+        timeout=UnaryClient.TIMEOUT_SEC,
+    ):
+        if not (prefix or statuses or submitted_after or submitted_before):
+            with _deadline(timeout, "Listing keys"):
+                res = await self.stub.ListKeys(pb2.Message(), timeout=timeout)
+            return pickle.loads(res.message)
+        request = self._query_keys_request(
+            prefix, statuses, submitted_after, submitted_before
+        )
+        with _deadline(timeout, "Listing keys"):
+            res = await self.stub.QueryKeys(request, timeout=timeout)
+        return list(res.keys)
+
+    async def list_runs(
+        self,
+        prefix=None,
+        statuses=None,
+        submitted_after=None,
+        submitted_before=None,
+        limit=None,
+        page_token=None,
+        timeout=UnaryClient.TIMEOUT_SEC,
+    ):
+        request = self._query_keys_request(
+            prefix,
+            statuses,
+            submitted_after,
+            submitted_before,
+            limit,
+            page_token,
+            with_metadata=True,
+        )
+        with _deadline(timeout, "Listing runs"):
+            res = await self.stub.QueryKeys(request, timeout=timeout)
+        return self._list_runs_result(res)
+
+    async def health(self, timeout=UnaryClient.TIMEOUT_SEC):
+        with _deadline(timeout, "Health check"):
+            res = await self.stub.Health(pb2.HealthRequest(), timeout=timeout)
+        return self._health(res)
+
+    async def wait_until_ready(self, timeout, started_after=None):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while loop.time() < deadline:
+            try:
+                await asyncio.wait_for(
+                    self.channel.channel_ready(), deadline - loop.time()
+                )
+                health = await self.health(timeout=max(deadline - loop.time(), 0.01))
+            except (asyncio.TimeoutError, TimeoutError):
+                return None
+            except grpc.RpcError as e:
+                logger.debug(f"Health check failed: {e}")
+                await asyncio.sleep(self.READY_POLL_INTERVAL)
+                continue
+            if self._is_ready(health, started_after):
+                return health
+            await asyncio.sleep(self.READY_POLL_INTERVAL)
+        return None
+
+    async def server_status(self, timeout=UnaryClient.TIMEOUT_SEC):
+        with _deadline(timeout, "Getting the server status"):
+            res = await self.stub.Status(pb2.StatusRequest(), timeout=timeout)
+        return self._lane_statuses(res)
+
+    async def obj_store_stats(self, timeout=UnaryClient.TIMEOUT_SEC):
+        with _deadline(timeout, "Getting the object store stats"):
+            res = await self.stub.Status(pb2.StatusRequest(), timeout=timeout)
+        return self._obj_store_stats(res)
+
+    async def get_object(self, key, stream_logs=False, timeout=None):
+        return (
+            await self.get_object_info(key, stream_logs=stream_logs, timeout=timeout)
+        )[0]
+
+    async def get_object_info(self, key, stream_logs=False, timeout=None):
+        message = pb2.Message(
+            message=pickle.dumps((key, stream_logs)),
+            accept_compression=self.accept_compression,
+        )
+        immutable = False
+        with tempfile.SpooledTemporaryFile(max_size=self.CHUNK_SIZE) as f:
+            with _deadline(timeout, f"Getting {key}"):
+                async for resp in self.stub.GetObject(message, timeout=timeout):
+                    data = await self._run_in_executor(
+                        decompress, resp.message, resp.compression
+                    )
+                    if resp.output_type == OutputType.RESULT:
+                        immutable = resp.immutable
+                        f.write(data)
+                    else:
+                        self._print_logs(resp.output_type, pickle.loads(data))
+            size = f.tell()
+            f.seek(0)
+            server_res = await self._run_in_executor(pickle.load, f)
+        return self._get_object_result(server_res, key), immutable, size
+
+    async def get_objects(self, keys, timeout=None):
+        message = pb2.Message(
+            message=pickle.dumps(list(keys)),
+            accept_compression=self.accept_compression,
+        )
+        with tempfile.SpooledTemporaryFile(max_size=self.CHUNK_SIZE) as f:
+            with _deadline(timeout, f"Getting {len(keys)} objects"):
+                async for resp in self.stub.GetObjects(message, timeout=timeout):
+                    f.write(
+                        await self._run_in_executor(
+                            decompress, resp.message, resp.compression
+                        )
+                    )
+            f.seek(0)
+            server_res = await self._run_in_executor(pickle.load, f)
+        return await self._run_in_executor(self._get_objects_result, server_res)
+
+    async def watch_keys(self, keys=None, prefix=None, timeout=None):
+        events = self.stub.WatchKeys(
+            pb2.WatchKeysRequest(keys=keys or [], prefix=prefix or ""),
+            timeout=timeout,
+        )
+        try:
+            async for event in events:
+                yield event.key, event.status
+        except grpc.RpcError as e:
+            if e.code() == grpc.StatusCode.DEADLINE_EXCEEDED:
+                raise TimeoutError(
+                    f"Keys did not all resolve within {timeout} seconds"
+                ) from e
+            raise
+        finally:
+            events.cancel()
+
+    async def stream_logs(self, run_key, offsets=None, follow=True, timeout=None):
+        chunks = self.stub.StreamLogs(
+            self._stream_logs_request(run_key, offsets, follow), timeout=timeout
+        )
+        try:
+            with _deadline(timeout, f"Streaming logs of {run_key}"):
+                async for chunk in chunks:
+                    yield self._decompress_log_chunk(chunk)
+        finally:
+            chunks.cancel()
+
+    async def put_object(self, key, value, timeout=None, never_evict=False):
+        chunks = self._object_chunks(key, value, never_evict)
+        with _deadline(timeout, f"Putting {key}"):
+            resp = await self.stub.PutObjectStream(
+                self._request_chunks(chunks), timeout=timeout
+            )
+        return self._put_object_result(resp, key)
+
+    async def put_objects(self, values, timeout=None, never_evict=False):
+        chunks = await self._run_in_executor(self._objects_chunks, values, never_evict)
+        with _deadline(timeout, f"Putting {len(values)} objects"):
+            resp = await self.stub.PutObjects(
+                self._request_chunks(chunks), timeout=timeout
+            )
+        return self._put_object_result(resp, f"{len(values)} objects")
+
+    async def _request_chunks(self, chunks):
+        # Pickle and compress each chunk in the executor as it's sent
+        while True:
+            chunk = await self._run_in_executor(next, chunks, None)
+            if chunk is None:
+                break
+            yield chunk
+
+    async def clear_pins(self, pins=None, timeout=UnaryClient.TIMEOUT_SEC):
+        with _deadline(timeout, "Clearing pins"):
+            resp = await self.stub.ClearPins(
+                pb2.Message(message=pickle.dumps(pins or [])), timeout=timeout
+            )
+        return pickle.loads(resp.message)
+
+    async def run_module(
+        self,
+        relative_path,
+        module_name,
+        fn_name,
+        fn_type,
+        resources,
+        conda_env,
+        args,
+        kwargs,
+        timeout=None,
+    ):
+        message = await self._run_in_executor(
+            self._run_module_message,
+            relative_path,
+            module_name,
+            fn_name,
+            fn_type,
+            resources,
+            conda_env,
+            args,
+            kwargs,
+        )
+        with _deadline(timeout, f"Call to {fn_name}"):
+            server_res = await self.stub.RunModule(message, timeout=timeout)
+        return await self._run_in_executor(self._run_module_result, server_res, fn_type)
+
+    async def run_module_batch(self, calls, timeout=None):
+        messages = await self._run_in_executor(
+            lambda: [self._run_module_message(*call) for call in calls]
+        )
+        with _deadline(timeout, f"Batch of {len(messages)} calls"):
+            server_res = await self.stub.RunModuleBatch(
+                pb2.MessageBatch(messages=messages), timeout=timeout
+            )
+        return await self._run_in_executor(
+            lambda: [
+                self._run_module_outcome(res, call[3])
+                for res, call in zip(server_res.responses, calls)
+            ]
+        )
+
+    def is_connected(self):
+        return self.channel.get_state() in [
+            grpc.ChannelConnectivity.READY,
+            grpc.ChannelConnectivity.IDLE,
+        ]
+
+    async def shutdown(self):
+        if self.channel:
+            await self.channel.close()
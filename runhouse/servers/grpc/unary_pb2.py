@@ -13,19 +13,65 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0bunary.proto\x12\x05unary\"B\n\x07Message\x12\x0f\n\x07message\x18\x01 \x01(\x0c\x12\x13\n\x0bmodule_name\x18\x02 \x01(\t\x12\x11\n\tfunc_name\x18\x03 \x01(\t\"J\n\x12RunMessageResponse\x12\x0e\n\x06result\x18\x01 \x01(\x0c\x12\x11\n\texception\x18\x02 \x01(\x0c\x12\x11\n\ttraceback\x18\x03 \x01(\t\"I\n\x0fMessageResponse\x12\x0f\n\x07message\x18\x01 \x01(\x0c\x12\x10\n\x08received\x18\x02 \x01(\x08\x12\x13\n\x0boutput_type\x18\x03 \x01(\t2\xca\x03\n\x05Unary\x12\x38\n\tRunModule\x12\x0e.unary.Message\x1a\x19.unary.RunMessageResponse\"\x00\x12;\n\x0fInstallPackages\x12\x0e.unary.Message\x1a\x16.unary.MessageResponse\"\x00\x12\x35\n\tClearPins\x12\x0e.unary.Message\x1a\x16.unary.MessageResponse\"\x00\x12\x35\n\tCancelRun\x12\x0e.unary.Message\x1a\x16.unary.MessageResponse\"\x00\x12\x34\n\x08ListKeys\x12\x0e.unary.Message\x1a\x16.unary.MessageResponse\"\x00\x12\x35\n\tPutObject\x12\x0e.unary.Message\x1a\x16.unary.MessageResponse\"\x00\x12\x36\n\nAddSecrets\x12\x0e.unary.Message\x1a\x16.unary.MessageResponse\"\x00\x12\x37\n\tGetObject\x12\x0e.unary.Message\x1a\x16.unary.MessageResponse\"\x00\x30\x01\x62\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0bunary.proto\x12\x05unary\"\xb3\x03\n\x07Message\x12\x0f\n\x07message\x18\x01 \x01(\x0c\x12\x13\n\x0bmodule_name\x18\x02 \x01(\t\x12\x11\n\tfunc_name\x18\x03 \x01(\t\x12\x13\n\x0boob_buffers\x18\x05 \x01(\x08\x12\x15\n\rrelative_path\x18\x06 \x01(\t\x12\x0f\n\x07\x66n_type\x18\x07 \x01(\t\x12\x11\n\tconda_env\x18\x08 \x01(\t\x12\x30\n\tresources\x18\t \x03(\x0b\x32\x1d.unary.Message.ResourcesEntry\x12\x15\n\rserialized_fn\x18\n \x01(\x0c\x12#\n\x04\x61rgs\x18\x0b \x03(\x0b\x32\x15.unary.SerializedArgs\x12%\n\x06kwargs\x18\x0c \x01(\x0b\x32\x15.unary.SerializedArgs\x12\x13\n\x0bnum_repeats\x18\r \x01(\x05\x12\x13\n\x0b\x63ompression\x18\x0e \x01(\t\x12\x1a\n\x12\x61\x63\x63\x65pt_compression\x18\x0f \x03(\t\x12\x0c\n\x04user\x18\x10 \x01(\t\x1a\x30\n\x0eResourcesEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\x01:\x02\x38\x01J\x04\x08\x04\x10\x05\"0\n\x0cMessageBatch\x12 \n\x08messages\x18\x01 \x03(\x0b\x32\x0e.unary.Message\"\xbc\x01\n\x0eSerializedArgs\x12\x0c\n\x04\x64\x61ta\x18\x01 \x01(\x0c\x12\x0f\n\x07\x62uffers\x18\x02 \x03(\x0c\x12-\n\x04keys\x18\x03 \x03(\x0b\x32\x1f.unary.SerializedArgs.KeysEntry\x12\x13\n\x0b\x63ompression\x18\x04 \x01(\t\x12\x1a\n\x12\x62uffer_compression\x18\x05 \x03(\t\x1a+\n\tKeysEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\"R\n\x0bObjectChunk\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\x0c\n\x04\x64\x61ta\x18\x02 \x01(\x0c\x12\x13\n\x0b\x63ompression\x18\x03 \x01(\t\x12\x13\n\x0bnever_evict\x18\x04 \x01(\x08\"\x8c\x01\n\x12RunMessageResponse\x12\x0e\n\x06result\x18\x01 \x01(\x0c\x12\x11\n\texception\x18\x02 \x01(\x0c\x12\x11\n\ttraceback\x18\x03 \x01(\t\x12\x0f\n\x07\x62uffers\x18\x04 \x03(\x0c\x12\x13\n\x0b\x63ompression\x18\x05 \x01(\t\x12\x1a\n\x12\x62uffer_compression\x18\x06 \x03(\t\"G\n\x17RunMessageBatchResponse\x12,\n\tresponses\x18\x01 \x03(\x0b\x32\x19.unary.RunMessageResponse\"0\n\x10WatchKeysRequest\x12\x0c\n\x04keys\x18\x01 \x03(\t\x12\x0e\n\x06prefix\x18\x02 \x01(\t\"\'\n\x08KeyEvent\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\x0e\n\x06status\x18\x02 \x01(\t\"\xb8\x01\n\x11StreamLogsRequest\x12\x0f\n\x07run_key\x18\x01 \x01(\t\x12\x36\n\x07offsets\x18\x02 \x03(\x0b\x32%.unary.StreamLogsRequest.OffsetsEntry\x12\x0e\n\x06\x66ollow\x18\x03 \x01(\x08\x12\x1a\n\x12\x61\x63\x63\x65pt_compression\x18\x04 \x03(\t\x1a.\n\x0cOffsetsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\x03:\x02\x38\x01\"n\n\x08LogChunk\x12\x0c\n\x04\x66ile\x18\x01 \x01(\t\x12\x11\n\tworker_id\x18\x02 \x01(\t\x12\x0e\n\x06stream\x18\x03 \x01(\t\x12\x0c\n\x04\x64\x61ta\x18\x04 \x01(\x0c\x12\x0e\n\x06offset\x18\x05 \x01(\x03\x12\x13\n\x0b\x63ompression\x18\x06 \x01(\t\"\xa1\x01\n\x10QueryKeysRequest\x12\x0e\n\x06prefix\x18\x01 \x01(\t\x12\x10\n\x08statuses\x18\x02 \x03(\t\x12\x17\n\x0fsubmitted_after\x18\x03 \x01(\x01\x12\x18\n\x10submitted_before\x18\x04 \x01(\x01\x12\r\n\x05limit\x18\x05 \x01(\x05\x12\x12\n\npage_token\x18\x06 \x01(\t\x12\x15\n\rwith_metadata\x18\x07 \x01(\x08\"\x9a\x01\n\x0bKeyMetadata\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\x0e\n\x06run_id\x18\x02 \x01(\t\x12\x0f\n\x07\x66n_name\x18\x03 \x01(\t\x12\x11\n\tsubmitted\x18\x04 \x01(\x01\x12\x10\n\x08\x66inished\x18\x05 \x01(\x01\x12\x0e\n\x06status\x18\x06 \x01(\t\x12\x11\n\x04size\x18\x07 \x01(\x03H\x00\x88\x01\x01\x12\x0c\n\x04user\x18\x08 \x01(\tB\x07\n\x05_size\"`\n\x11QueryKeysResponse\x12\x0c\n\x04keys\x18\x01 \x03(\t\x12$\n\x08metadata\x18\x02 \x03(\x0b\x32\x12.unary.KeyMetadata\x12\x17\n\x0fnext_page_token\x18\x03 \x01(\t\"\x0f\n\rStatusRequest\"b\n\nLaneStatus\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x13\n\x0bmax_workers\x18\x02 \x01(\x05\x12\x0e\n\x06\x61\x63tive\x18\x03 \x01(\x05\x12\x0e\n\x06queued\x18\x04 \x01(\x05\x12\x11\n\tcompleted\x18\x05 \x01(\x03\"\x8a\x02\n\rObjStoreStats\x12\x0f\n\x07\x65ntries\x18\x01 \x01(\x03\x12\r\n\x05\x62ytes\x18\x02 \x01(\x03\x12\x13\n\x0bnever_evict\x18\x03 \x01(\x03\x12\x11\n\tmax_bytes\x18\x04 \x01(\x03\x12\x0b\n\x03ttl\x18\x05 \x01(\x01\x12\x13\n\x0b\x65victed_lru\x18\x06 \x01(\x03\x12\x13\n\x0b\x65victed_ttl\x18\x07 \x01(\x03\x12\x15\n\revicted_bytes\x18\x08 \x01(\x03\x12\x0f\n\x07spilled\x18\t \x01(\x03\x12\x15\n\rspilled_bytes\x18\n \x01(\x03\x12\x17\n\x0fspill_max_bytes\x18\x0b \x01(\x03\x12\x0e\n\x06spills\x18\x0c \x01(\x03\x12\x12\n\npromotions\x18\r \x01(\x03\"Y\n\x0cServerStatus\x12 \n\x05lanes\x18\x01 \x03(\x0b\x32\x11.unary.LaneStatus\x12\'\n\tobj_store\x18\x02 \x01(\x0b\x32\x14.unary.ObjStoreStats\"\x0f\n\rHealthRequest\"f\n\x0eHealthResponse\x12\x0f\n\x07version\x18\x01 \x01(\t\x12\x11\n\tray_ready\x18\x02 \x01(\x08\x12\x0e\n\x06uptime\x18\x03 \x01(\x01\x12 \n\x05lanes\x18\x04 \x03(\x0b\x32\x11.unary.LaneStatus\"q\n\x0fMessageResponse\x12\x0f\n\x07message\x18\x01 \x01(\x0c\x12\x10\n\x08received\x18\x02 \x01(\x08\x12\x13\n\x0boutput_type\x18\x03 \x01(\t\x12\x13\n\x0b\x63ompression\x18\x04 \x01(\t\x12\x11\n\timmutable\x18\x05 \x01(\x08\x32\xf8\x07\n\x05Unary\x12\x38\n\tRunModule\x12\x0e.unary.Message\x1a\x19.unary.RunMessageResponse\"\x00\x12G\n\x0eRunModuleBatch\x12\x13.unary.MessageBatch\x1a\x1e.unary.RunMessageBatchResponse\"\x00\x12;\n\x0fInstallPackages\x12\x0e.unary.Message\x1a\x16.unary.MessageResponse\"\x00\x12\x35\n\tClearPins\x12\x0e.unary.Message\x1a\x16.unary.MessageResponse\"\x00\x12\x35\n\tCancelRun\x12\x0e.unary.Message\x1a\x16.unary.MessageResponse\"\x00\x12\x34\n\x08ListKeys\x12\x0e.unary.Message\x1a\x16.unary.MessageResponse\"\x00\x12@\n\tQueryKeys\x12\x17.unary.QueryKeysRequest\x1a\x18.unary.QueryKeysResponse\"\x00\x12\x35\n\tPutObject\x12\x0e.unary.Message\x1a\x16.unary.MessageResponse\"\x00\x12\x41\n\x0fPutObjectStream\x12\x12.unary.ObjectChunk\x1a\x16.unary.MessageResponse\"\x00(\x01\x12<\n\nPutObjects\x12\x12.unary.ObjectChunk\x1a\x16.unary.MessageResponse\"\x00(\x01\x12\x36\n\nAddSecrets\x12\x0e.unary.Message\x1a\x16.unary.MessageResponse\"\x00\x12\x35\n\x06Status\x12\x14.unary.StatusRequest\x1a\x13.unary.ServerStatus\"\x00\x12\x37\n\x06Health\x12\x14.unary.HealthRequest\x1a\x15.unary.HealthResponse\"\x00\x12\x37\n\tGetObject\x12\x0e.unary.Message\x1a\x16.unary.MessageResponse\"\x00\x30\x01\x12\x38\n\nGetObjects\x12\x0e.unary.Message\x1a\x16.unary.MessageResponse\"\x00\x30\x01\x12\x39\n\tWatchKeys\x12\x17.unary.WatchKeysRequest\x1a\x0f.unary.KeyEvent\"\x00\x30\x01\x12;\n\nStreamLogs\x12\x18.unary.StreamLogsRequest\x1a\x0f.unary.LogChunk\"\x00\x30\x01\x62\x06proto3')
 
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, globals())
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'unary_pb2', globals())
 if _descriptor._USE_C_DESCRIPTORS == False:
 
   DESCRIPTOR._options = None
-  _MESSAGE._serialized_start=22
-  _MESSAGE._serialized_end=88
-  _RUNMESSAGERESPONSE._serialized_start=90
-  _RUNMESSAGERESPONSE._serialized_end=164
-  _MESSAGERESPONSE._serialized_start=166
-  _MESSAGERESPONSE._serialized_end=239
-  _UNARY._serialized_start=242
-  _UNARY._serialized_end=700
+  _MESSAGE_RESOURCESENTRY._options = None
+  _MESSAGE_RESOURCESENTRY._serialized_options = b'8\001'
+  _SERIALIZEDARGS_KEYSENTRY._options = None
+  _SERIALIZEDARGS_KEYSENTRY._serialized_options = b'8\001'
+  _STREAMLOGSREQUEST_OFFSETSENTRY._options = None
+  _STREAMLOGSREQUEST_OFFSETSENTRY._serialized_options = b'8\001'
+  _MESSAGE._serialized_start=23
+  _MESSAGE._serialized_end=458
+  _MESSAGE_RESOURCESENTRY._serialized_start=404
+  _MESSAGE_RESOURCESENTRY._serialized_end=452
+  _MESSAGEBATCH._serialized_start=460
+  _MESSAGEBATCH._serialized_end=508
+  _SERIALIZEDARGS._serialized_start=511
+  _SERIALIZEDARGS._serialized_end=699
+  _SERIALIZEDARGS_KEYSENTRY._serialized_start=656
+  _SERIALIZEDARGS_KEYSENTRY._serialized_end=699
+  _OBJECTCHUNK._serialized_start=701
+  _OBJECTCHUNK._serialized_end=783
+  _RUNMESSAGERESPONSE._serialized_start=786
+  _RUNMESSAGERESPONSE._serialized_end=926
+  _RUNMESSAGEBATCHRESPONSE._serialized_start=928
+  _RUNMESSAGEBATCHRESPONSE._serialized_end=999
+  _WATCHKEYSREQUEST._serialized_start=1001
+  _WATCHKEYSREQUEST._serialized_end=1049
+  _KEYEVENT._serialized_start=1051
+  _KEYEVENT._serialized_end=1090
+  _STREAMLOGSREQUEST._serialized_start=1093
+  _STREAMLOGSREQUEST._serialized_end=1277
+  _STREAMLOGSREQUEST_OFFSETSENTRY._serialized_start=1231
+  _STREAMLOGSREQUEST_OFFSETSENTRY._serialized_end=1277
+  _LOGCHUNK._serialized_start=1279
+  _LOGCHUNK._serialized_end=1389
+  _QUERYKEYSREQUEST._serialized_start=1392
+  _QUERYKEYSREQUEST._serialized_end=1553
+  _KEYMETADATA._serialized_start=1556
+  _KEYMETADATA._serialized_end=1710
+  _QUERYKEYSRESPONSE._serialized_start=1712
+  _QUERYKEYSRESPONSE._serialized_end=1808
+  _STATUSREQUEST._serialized_start=1810
+  _STATUSREQUEST._serialized_end=1825
+  _LANESTATUS._serialized_start=1827
+  _LANESTATUS._serialized_end=1925
+  _OBJSTORESTATS._serialized_start=1928
+  _OBJSTORESTATS._serialized_end=2194
+  _SERVERSTATUS._serialized_start=2196
+  _SERVERSTATUS._serialized_end=2285
+  _HEALTHREQUEST._serialized_start=2287
+  _HEALTHREQUEST._serialized_end=2302
+  _HEALTHRESPONSE._serialized_start=2304
+  _HEALTHRESPONSE._serialized_end=2406
+  _MESSAGERESPONSE._serialized_start=2408
+  _MESSAGERESPONSE._serialized_end=2521
+  _UNARY._serialized_start=2524
+  _UNARY._serialized_end=3540
 # @@protoc_insertion_point(module_scope)
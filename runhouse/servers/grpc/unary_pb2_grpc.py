@@ -19,6 +19,11 @@ class UnaryStub(object):
                 request_serializer=unary__pb2.Message.SerializeToString,
                 response_deserializer=unary__pb2.RunMessageResponse.FromString,
                 )
+        self.RunModuleBatch = channel.unary_unary(
+                '/unary.Unary/RunModuleBatch',
+                request_serializer=unary__pb2.MessageBatch.SerializeToString,
+                response_deserializer=unary__pb2.RunMessageBatchResponse.FromString,
+                )
         self.InstallPackages = channel.unary_unary(
                 '/unary.Unary/InstallPackages',
                 request_serializer=unary__pb2.Message.SerializeToString,
@@ -39,21 +44,61 @@ class UnaryStub(object):
                 request_serializer=unary__pb2.Message.SerializeToString,
                 response_deserializer=unary__pb2.MessageResponse.FromString,
                 )
+        self.QueryKeys = channel.unary_unary(
+                '/unary.Unary/QueryKeys',
+                request_serializer=unary__pb2.QueryKeysRequest.SerializeToString,
+                response_deserializer=unary__pb2.QueryKeysResponse.FromString,
+                )
         self.PutObject = channel.unary_unary(
                 '/unary.Unary/PutObject',
                 request_serializer=unary__pb2.Message.SerializeToString,
                 response_deserializer=unary__pb2.MessageResponse.FromString,
                 )
+        self.PutObjectStream = channel.stream_unary(
+                '/unary.Unary/PutObjectStream',
+                request_serializer=unary__pb2.ObjectChunk.SerializeToString,
+                response_deserializer=unary__pb2.MessageResponse.FromString,
+                )
+        self.PutObjects = channel.stream_unary(
+                '/unary.Unary/PutObjects',
+                request_serializer=unary__pb2.ObjectChunk.SerializeToString,
+                response_deserializer=unary__pb2.MessageResponse.FromString,
+                )
         self.AddSecrets = channel.unary_unary(
                 '/unary.Unary/AddSecrets',
                 request_serializer=unary__pb2.Message.SerializeToString,
                 response_deserializer=unary__pb2.MessageResponse.FromString,
                 )
+        self.Status = channel.unary_unary(
+                '/unary.Unary/Status',
+                request_serializer=unary__pb2.StatusRequest.SerializeToString,
+                response_deserializer=unary__pb2.ServerStatus.FromString,
+                )
+        self.Health = channel.unary_unary(
+                '/unary.Unary/Health',
+                request_serializer=unary__pb2.HealthRequest.SerializeToString,
+                response_deserializer=unary__pb2.HealthResponse.FromString,
+                )
         self.GetObject = channel.unary_stream(
                 '/unary.Unary/GetObject',
                 request_serializer=unary__pb2.Message.SerializeToString,
                 response_deserializer=unary__pb2.MessageResponse.FromString,
                 )
+        self.GetObjects = channel.unary_stream(
+                '/unary.Unary/GetObjects',
+                request_serializer=unary__pb2.Message.SerializeToString,
+                response_deserializer=unary__pb2.MessageResponse.FromString,
+                )
+        self.WatchKeys = channel.unary_stream(
+                '/unary.Unary/WatchKeys',
+                request_serializer=unary__pb2.WatchKeysRequest.SerializeToString,
+                response_deserializer=unary__pb2.KeyEvent.FromString,
+                )
+        self.StreamLogs = channel.unary_stream(
+                '/unary.Unary/StreamLogs',
+                request_serializer=unary__pb2.StreamLogsRequest.SerializeToString,
+                response_deserializer=unary__pb2.LogChunk.FromString,
+                )
 
 
 class UnaryServicer(object):
@@ -68,6 +113,13 @@ class UnaryServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def RunModuleBatch(self, request, context):
+        """Run many (possibly different) functions in one round trip, e.g. to submit many remote calls at once
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def InstallPackages(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
@@ -92,18 +144,52 @@ class UnaryServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def QueryKeys(self, request, context):
+        """Keys in the object store, filtered and paginated on the server, optionally with each key's metadata
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def PutObject(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def PutObjectStream(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def PutObjects(self, request_iterator, context):
+        """Put many objects in one round trip, streamed up like PutObjectStream as one pickled dict
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def AddSecrets(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def Status(self, request, context):
+        """Load on each of the server's thread pools, and the object store's memory use and evictions
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Health(self, request, context):
+        """Whether the server is ready to run functions, for connecting and restarting to wait on
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def GetObject(self, request, context):
         """streaming RPC
         """
@@ -111,6 +197,27 @@ class UnaryServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def GetObjects(self, request, context):
+        """Get many objects in one round trip, streamed back like GetObject as one pickled result
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def WatchKeys(self, request, context):
+        """Stream an event as each of the given keys in the object store resolves, e.g. when a remote run finishes
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def StreamLogs(self, request, context):
+        """Stream the raw stdout and stderr of a run, resuming from the given byte offsets
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_UnaryServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -119,6 +226,11 @@ def add_UnaryServicer_to_server(servicer, server):
                     request_deserializer=unary__pb2.Message.FromString,
                     response_serializer=unary__pb2.RunMessageResponse.SerializeToString,
             ),
+            'RunModuleBatch': grpc.unary_unary_rpc_method_handler(
+                    servicer.RunModuleBatch,
+                    request_deserializer=unary__pb2.MessageBatch.FromString,
+                    response_serializer=unary__pb2.RunMessageBatchResponse.SerializeToString,
+            ),
             'InstallPackages': grpc.unary_unary_rpc_method_handler(
                     servicer.InstallPackages,
                     request_deserializer=unary__pb2.Message.FromString,
@@ -139,21 +251,61 @@ def add_UnaryServicer_to_server(servicer, server):
                     request_deserializer=unary__pb2.Message.FromString,
                     response_serializer=unary__pb2.MessageResponse.SerializeToString,
             ),
+            'QueryKeys': grpc.unary_unary_rpc_method_handler(
+                    servicer.QueryKeys,
+                    request_deserializer=unary__pb2.QueryKeysRequest.FromString,
+                    response_serializer=unary__pb2.QueryKeysResponse.SerializeToString,
+            ),
             'PutObject': grpc.unary_unary_rpc_method_handler(
                     servicer.PutObject,
                     request_deserializer=unary__pb2.Message.FromString,
                     response_serializer=unary__pb2.MessageResponse.SerializeToString,
             ),
+            'PutObjectStream': grpc.stream_unary_rpc_method_handler(
+                    servicer.PutObjectStream,
+                    request_deserializer=unary__pb2.ObjectChunk.FromString,
+                    response_serializer=unary__pb2.MessageResponse.SerializeToString,
+            ),
+            'PutObjects': grpc.stream_unary_rpc_method_handler(
+                    servicer.PutObjects,
+                    request_deserializer=unary__pb2.ObjectChunk.FromString,
+                    response_serializer=unary__pb2.MessageResponse.SerializeToString,
+            ),
             'AddSecrets': grpc.unary_unary_rpc_method_handler(
                     servicer.AddSecrets,
                     request_deserializer=unary__pb2.Message.FromString,
                     response_serializer=unary__pb2.MessageResponse.SerializeToString,
             ),
+            'Status': grpc.unary_unary_rpc_method_handler(
+                    servicer.Status,
+                    request_deserializer=unary__pb2.StatusRequest.FromString,
+                    response_serializer=unary__pb2.ServerStatus.SerializeToString,
+            ),
+            'Health': grpc.unary_unary_rpc_method_handler(
+                    servicer.Health,
+                    request_deserializer=unary__pb2.HealthRequest.FromString,
+                    response_serializer=unary__pb2.HealthResponse.SerializeToString,
+            ),
             'GetObject': grpc.unary_stream_rpc_method_handler(
                     servicer.GetObject,
                     request_deserializer=unary__pb2.Message.FromString,
                     response_serializer=unary__pb2.MessageResponse.SerializeToString,
             ),
+            'GetObjects': grpc.unary_stream_rpc_method_handler(
+                    servicer.GetObjects,
+                    request_deserializer=unary__pb2.Message.FromString,
+                    response_serializer=unary__pb2.MessageResponse.SerializeToString,
+            ),
+            'WatchKeys': grpc.unary_stream_rpc_method_handler(
+                    servicer.WatchKeys,
+                    request_deserializer=unary__pb2.WatchKeysRequest.FromString,
+                    response_serializer=unary__pb2.KeyEvent.SerializeToString,
+            ),
+            'StreamLogs': grpc.unary_stream_rpc_method_handler(
+                    servicer.StreamLogs,
+                    request_deserializer=unary__pb2.StreamLogsRequest.FromString,
+                    response_serializer=unary__pb2.LogChunk.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'unary.Unary', rpc_method_handlers)
@@ -181,6 +333,23 @@ class Unary(object):
             options, channel_credentials,
             insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
 
+    @staticmethod
+    def RunModuleBatch(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/unary.Unary/RunModuleBatch',
+            unary__pb2.MessageBatch.SerializeToString,
+            unary__pb2.RunMessageBatchResponse.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
     @staticmethod
     def InstallPackages(request,
             target,
@@ -249,6 +418,23 @@ class Unary(object):
             options, channel_credentials,
             insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
 
+    @staticmethod
+    def QueryKeys(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/unary.Unary/QueryKeys',
+            unary__pb2.QueryKeysRequest.SerializeToString,
+            unary__pb2.QueryKeysResponse.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
     @staticmethod
     def PutObject(request,
             target,
@@ -266,6 +452,40 @@ class Unary(object):
             options, channel_credentials,
             insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
 
+    @staticmethod
+    def PutObjectStream(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(request_iterator, target, '/unary.Unary/PutObjectStream',
+            unary__pb2.ObjectChunk.SerializeToString,
+            unary__pb2.MessageResponse.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def PutObjects(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(request_iterator, target, '/unary.Unary/PutObjects',
+            unary__pb2.ObjectChunk.SerializeToString,
+            unary__pb2.MessageResponse.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
     @staticmethod
     def AddSecrets(request,
             target,
@@ -283,6 +503,40 @@ class Unary(object):
             options, channel_credentials,
             insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
 
+    @staticmethod
+    def Status(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/unary.Unary/Status',
+            unary__pb2.StatusRequest.SerializeToString,
+            unary__pb2.ServerStatus.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def Health(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/unary.Unary/Health',
+            unary__pb2.HealthRequest.SerializeToString,
+            unary__pb2.HealthResponse.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
     @staticmethod
     def GetObject(request,
             target,
@@ -299,3 +553,54 @@ class Unary(object):
             unary__pb2.MessageResponse.FromString,
             options, channel_credentials,
             insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def GetObjects(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(request, target, '/unary.Unary/GetObjects',
+            unary__pb2.Message.SerializeToString,
+            unary__pb2.MessageResponse.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def WatchKeys(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(request, target, '/unary.Unary/WatchKeys',
+            unary__pb2.WatchKeysRequest.SerializeToString,
+            unary__pb2.KeyEvent.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def StreamLogs(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(request, target, '/unary.Unary/StreamLogs',
+            unary__pb2.StreamLogsRequest.SerializeToString,
+            unary__pb2.LogChunk.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
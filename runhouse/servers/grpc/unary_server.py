@@ -1,7 +1,11 @@
+import argparse
+import asyncio
 import json
 import logging
+import shutil
+import tempfile
+import time
 import traceback
-from concurrent import futures
 from pathlib import Path
 
 import grpc
@@ -14,50 +18,142 @@ import runhouse.servers.grpc.unary_pb2 as pb2
 
 import runhouse.servers.grpc.unary_pb2_grpc as pb2_grpc
 from runhouse.rh_config import configs, obj_store
+from runhouse.rns.obj_store import ObjStore
 from runhouse.rns.packages.package import Package
-from runhouse.rns.run_module_utils import call_fn_by_type
-from runhouse.rns.top_level_rns_fns import (
-    clear_pinned_memory,
-    pinned_keys,
-    remove_pinned_object,
+from runhouse.rns.run_module_utils import acall_serialized_fn_by_type
+from runhouse.rns.top_level_rns_fns import clear_pinned_memory, pinned_keys
+from runhouse.servers.grpc.in_process_client import register_service
+from runhouse.servers.grpc.lanes import ExecutorLane
+from runhouse.servers.grpc.log_tailer import LogTailer, ObjectRefWaiter
+from runhouse.servers.grpc.result_cache import ResultCache, SerializedResult
+from runhouse.servers.grpc.serialization import (
+    CHUNK_SIZE,
+    compress,
+    compress_buffers,
+    COMPRESSION_THRESHOLD,
+    decompress,
+    decompress_buffers,
+    negotiate_codec,
 )
-from runhouse.servers.grpc.unary_client import OutputType
+from runhouse.servers.grpc.streams import (
+    KEY_STATUSES,
+    log_chunk,
+    log_watch_paths,
+    read_new_logs,
+)
+from runhouse.servers.grpc.unary_client import KeyStatus, OutputType
 
 logger = logging.getLogger(__name__)
 
 
 class UnaryService(pb2_grpc.UnaryServicer):
+    """Async gRPC service for the Runhouse server. Handlers run on the event loop and await Ray object refs
+    instead of blocking on them, while blocking work runs in separately sized thread pools ("lanes"): one for
+    cheap control calls (e.g. cancelling runs, listing keys), one for data (e.g. unpickling large payloads)
+    and one for installing packages, so control calls stay responsive however busy the others are."""
+
     DEFAULT_PORT = 50052
+    # Callers on the cluster itself (e.g. nested Functions) connect here, skipping the TCP stack
+    UNIX_SOCKET_PATH = str(Path("~/.rh/grpc.sock").expanduser())
     MAX_MESSAGE_LENGTH = 1 * 1024 * 1024 * 1024  # 1 GB
     LOGGING_WAIT_TIME = 1.0
+    # Max size of each log chunk sent by StreamLogs, and max number of chunks to read before sending them
+    LOG_CHUNK_SIZE = 1024 * 1024
+    MAX_LOG_CHUNKS_PER_READ = 16
+    CHUNK_SIZE = CHUNK_SIZE
+    # Above this many in-flight RPCs the server rejects new calls with RESOURCE_EXHAUSTED instead of queueing
+    DEFAULT_MAX_CONCURRENT_RPCS = 1000
+    # Sizes of the thread pools for data, control and package install work
+    DEFAULT_MAX_WORKERS = 32
+    DEFAULT_CONTROL_WORKERS = 4
+    DEFAULT_INSTALL_WORKERS = 2
+    # Max total size of serialized results kept around for GetObject
+    DEFAULT_RESULT_CACHE_SIZE = 1024 * 1024 * 1024  # 1 GB
+    # Share of Ray's object store memory which the objects and run results in the Runhouse object store can use
+    # before the least recently used ones are evicted, unless ``obj_store_max_bytes`` is set in the config
+    DEFAULT_OBJ_STORE_FRACTION = 0.5
     SKY_YAML = str(Path("~/.sky/sky_ray.yml").expanduser())
 
-    def __init__(self, *args, **kwargs):
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        control_workers: int = DEFAULT_CONTROL_WORKERS,
+        install_workers: int = DEFAULT_INSTALL_WORKERS,
+        *args,
+        **kwargs,
+    ):
         ray.init(address="auto")
+        self.start_time = time.time()
+        obj_store.set_limits(
+            max_bytes=configs.get(
+                "obj_store_max_bytes",
+                _default_obj_store_budget(self.DEFAULT_OBJ_STORE_FRACTION),
+            ),
+            ttl=configs.get("obj_store_ttl", None),
+        )
+        spill_dir = configs.get("obj_store_spill_dir", ObjStore.DEFAULT_SPILL_DIR)
+        obj_store.set_spill(
+            spill_dir,
+            configs.get(
+                "obj_store_spill_max_bytes",
+                _default_spill_budget(spill_dir, self.DEFAULT_OBJ_STORE_FRACTION),
+            ),
+        )
+        # Pick up the objects and results held from before this server (re)started
+        obj_store.attach()
+        obj_store.remove_orphaned_spill_files()
+
+        self.data_lane = ExecutorLane("data", max_workers)
+        self.control_lane = ExecutorLane("control", control_workers)
+        self.install_lane = ExecutorLane("install", install_workers)
+        self.lanes = [self.control_lane, self.data_lane, self.install_lane]
+        # Shared by all log streams, created on the event loop when first needed
+        self._log_tailer = None
+        self._ref_waiter = None
+        # Serialized results shared by concurrent GetObject calls for the same key, and kept for later ones
+        self.result_cache = ResultCache(
+            configs.get("grpc_result_cache_size", self.DEFAULT_RESULT_CACHE_SIZE)
+        )
 
         # Collect metadata for the cluster immediately on init
         self._collect_cluster_stats()
 
+        # Let callers in this process skip gRPC
+        register_service(self)
+
         self.register_activity()
 
     def register_activity(self):
         set_last_active_time_to_now()
 
-    def InstallPackages(self, request, context):
+    @property
+    def log_tailer(self) -> LogTailer:
+        if self._log_tailer is None:
+            self._log_tailer = LogTailer()
+        return self._log_tailer
+
+    @property
+    def ref_waiter(self) -> ObjectRefWaiter:
+        if self._ref_waiter is None:
+            self._ref_waiter = ObjectRefWaiter()
+        return self._ref_waiter
+
+    def close(self):
+        """Release what the service holds open (e.g. the log tailer's inotify fd), once the server has stopped."""
+        if self._log_tailer is not None:
+            self._log_tailer.close()
+            self._log_tailer = None
+
+    async def _run_blocking(self, fn, *args, **kwargs):
+        """Run a blocking function in the data lane so it doesn't stall the event loop."""
+        return await self.data_lane.run(fn, *args, **kwargs)
+
+    async def InstallPackages(self, request, context):
         self.register_activity()
         try:
             packages, env = pickle.loads(request.message)
             logger.info(f"Message received from client to install packages: {packages}")
-            for package in packages:
-                if isinstance(package, str):
-                    pkg = Package.from_string(package)
-                elif hasattr(package, "install"):
-                    pkg = package
-                else:
-                    raise ValueError(f"package {package} not recognized")
-
-                logger.info(f"Installing package: {str(pkg)}")
-                pkg.install(env)
+            await self.install_lane.run(self._install_packages, packages, env)
 
             self.register_activity()
             message = [None, None, None]
@@ -68,156 +164,475 @@ class UnaryService(pb2_grpc.UnaryServicer):
 
         return pb2.MessageResponse(message=pickle.dumps(message), received=False)
 
-    def GetObject(self, request, context):
+    @staticmethod
+    def _install_packages(packages, env):
+        for package in packages:
+            if isinstance(package, str):
+                pkg = Package.from_string(package)
+            elif hasattr(package, "install"):
+                pkg = package
+            else:
+                raise ValueError(f"package {package} not recognized")
+
+            logger.info(f"Installing package: {str(pkg)}")
+            pkg.install(env)
+
+    async def GetObject(self, request, context):
         self.register_activity()
         key, stream_logs = pickle.loads(request.message)
         logger.info(f"Message received from client to get object: {key}")
+        codec = negotiate_codec(request.accept_compression)
+
+        # Looking the key up can read it back from the store's actor or from disk, so not on the event loop
+        obj_ref, is_run_result = await self._run_blocking(
+            lambda: (obj_store.get_obj_ref(key), obj_store.is_run_result(key))
+        )
+        if obj_ref is not None:
+            # Fetch and serialize the object in the background (once, for all concurrent requests for it) so we
+            # can keep streaming logs while it resolves
+            result_future = self.result_cache.get(
+                key,
+                obj_ref.hex(),
+                lambda: self._serialize_result(key, obj_ref, is_run_result),
+            )
+        else:
+            result_future = asyncio.ensure_future(
+                self._run_blocking(SerializedResult.from_obj, [None, None, None], "")
+            )
+
+        if stream_logs and obj_ref is not None:
+            logger.info(f"Streaming logs for {key}")
+            async for _, data, _ in self._tail_logs(key, {}, result_future):
+                # TODO [DG] handle .out vs .err, and multiple workers
+                ret_lines = data.decode(errors="replace").splitlines(keepends=True)
+                lines, compression = compress(pickle.dumps(ret_lines), codec)
+                yield pb2.MessageResponse(
+                    message=lines,
+                    received=True,
+                    output_type=OutputType.STDOUT,
+                    compression=compression,
+                )
+
+        # Stream the result back in chunks, the client reassembles everything with output type RESULT
+        result = await asyncio.shield(result_future)
+        async for resp in self._result_chunks(result, codec):
+            yield resp
+
+    async def _result_chunks(self, result, codec):
+        for offset in range(0, result.size, self.CHUNK_SIZE):
+            chunk = await self._run_blocking(result.read, offset, self.CHUNK_SIZE)
+            chunk, compression = await self._run_blocking(compress, chunk, codec)
+            yield pb2.MessageResponse(
+                message=chunk,
+                received=True,
+                output_type=OutputType.RESULT,
+                compression=compression,
+                immutable=result.immutable,
+            )
 
-        logfiles = None
-        open_files = None
-        ret_obj = None
-        returned = False
-        while not returned:
+    async def GetObjects(self, request, context):
+        self.register_activity()
+        keys = pickle.loads(request.message)
+        logger.info(f"Message received from client to get {len(keys)} objects")
+        codec = negotiate_codec(request.accept_compression)
+        result = await self._run_blocking(self._get_objects, keys)
+        async for resp in self._result_chunks(result, codec):
+            yield resp
+
+    @staticmethod
+    def _get_objects(keys):
+        """Get the values of ``keys`` with one ``ray.get``, serialized as a tuple of each value pickled (so the
+        client knows the size of each for caching), the errors for the keys which couldn't be got, and the keys
+        which are results of finished runs."""
+        values, errors = obj_store.get_many(keys)
+        pickled = {}
+        for key, value in values.items():
             try:
-                res = obj_store.get(key, timeout=self.LOGGING_WAIT_TIME)
-                logger.info(f"Got object of type {type(res)} back from object store")
-                ret_obj = [res, None, None]
-                returned = True
-                # Don't return yet, go through the loop once more to get any remaining log lines
-            except ray.exceptions.GetTimeoutError:
-                pass
-            except ray.exceptions.TaskCancelledError as e:
-                logger.info(f"Attempted to get task {key} that was cancelled.")
-                returned = True
-                ret_obj = [None, e, traceback.format_exc()]
-
-            if stream_logs:
-                if not logfiles:
-                    logfiles = obj_store.get_logfiles(key)
-                    open_files = [open(i, "r") for i in logfiles]
-                    logger.info(f"Streaming logs for {key} from {logfiles}")
-
-                # Grab all the lines written to all the log files since the last time we checked
-                ret_lines = []
-                for i, f in enumerate(open_files):
-                    file_lines = f.readlines()
-                    if file_lines:
-                        # TODO [DG] handle .out vs .err, and multiple workers
-                        # if len(logfiles) > 1:
-                        #     ret_lines.append(f"Process {i}:")
-                        ret_lines += file_lines
-                if ret_lines:
-                    yield pb2.MessageResponse(
-                        message=pickle.dumps(ret_lines),
-                        received=True,
-                        output_type=OutputType.STDOUT,
-                    )
+                pickled[key] = pickle.dumps(value)
+            except Exception as e:
+                errors[key] = e
+        immutable = [key for key in pickled if obj_store.is_run_result(key)]
+        return SerializedResult.from_obj(
+            (pickled, _picklable_errors(errors), immutable), ""
+        )
 
-        if stream_logs:
-            # We got the object back from the object store, so we're done (but we went through the loop once
-            # more to get any remaining log lines)
-            [f.close() for f in open_files]
-        yield pb2.MessageResponse(
-            message=pickle.dumps(ret_obj), received=True, output_type=OutputType.RESULT
+    async def _serialize_result(self, key, obj_ref, is_run_result=False):
+        immutable = False
+        try:
+            res = await obj_ref
+            logger.info(f"Got object of type {type(res)} back from object store")
+            ret_obj = [res, None, None]
+            immutable = is_run_result
+        except ray.exceptions.TaskCancelledError as e:
+            logger.info(f"Attempted to get task {key} that was cancelled.")
+            ret_obj = [None, e, traceback.format_exc()]
+        return await self._run_blocking(
+            SerializedResult.from_obj, ret_obj, obj_ref.hex(), immutable
         )
 
-    def PutObject(self, request, context):
+    async def WatchKeys(self, request, context):
         self.register_activity()
-        key, obj = pickle.loads(request.message)
+        keys = list(request.keys)
+        if request.prefix:
+            keys += [
+                key
+                for key in await self.control_lane.run(obj_store.keys)
+                if key.startswith(request.prefix) and key not in keys
+            ]
+        logger.info(f"Message received from client to watch {len(keys)} keys")
+
+        # Resolved with how each run ended once the object store's sweep sees it finish, without fetching results
+        finished = await self.control_lane.run(
+            lambda: [obj_store.run_finished(key) for key in keys]
+        )
+        waits = {}
+        for key, future in zip(keys, finished):
+            if future is None:
+                yield pb2.KeyEvent(key=key, status=KeyStatus.NOT_FOUND)
+            else:
+                waits[asyncio.wrap_future(future)] = key
+
+        try:
+            while waits:
+                ready, _ = await asyncio.wait(
+                    waits, return_when=asyncio.FIRST_COMPLETED
+                )
+                self.register_activity()
+                for future in ready:
+                    key = waits.pop(future)
+                    yield pb2.KeyEvent(key=key, status=KEY_STATUSES[future.result()])
+        finally:
+            for future in waits:
+                future.cancel()
+
+    async def StreamLogs(self, request, context):
+        self.register_activity()
+        run_key = request.run_key
+        logger.info(f"Message received from client to stream logs for {run_key}")
+        obj_ref = await self._run_blocking(obj_store.get_obj_ref, run_key)
+        logs_path = Path(obj_store.RH_LOGFILE_PATH) / run_key
+        if obj_ref is None and not logs_path.exists():
+            await context.abort(
+                grpc.StatusCode.NOT_FOUND, f"No run or logs found for key {run_key}"
+            )
+
+        codec = negotiate_codec(request.accept_compression)
+        # If the run is already gone from the object store, just send what's in its log files
+        done = (
+            self.ref_waiter.wait(obj_ref)
+            if obj_ref is not None and request.follow
+            else None
+        )
+        try:
+            async for name, data, offset in self._tail_logs(
+                run_key, dict(request.offsets), done
+            ):
+                yield log_chunk(name, data, offset, codec)
+        finally:
+            if done is not None:
+                done.cancel()
+
+    async def _tail_logs(self, run_key, offsets, done=None):
+        """Yield ``(file name, data, offset)`` for everything written to a run's log files after the given
+        offsets, which are updated in place. Keeps following the files until ``done`` resolves (sending anything
+        written before it did), or if ``done`` is None just sends what's been written so far.
+
+        Rather than polling, waits on the server's :class:`LogTailer` to say the files have been written to."""
+        logs_path = Path(obj_store.RH_LOGFILE_PATH) / run_key
+        open_files = {}
+        wakeup = self.log_tailer.subscribe()
+        try:
+            while True:
+                # Clear before reading, so we're woken for anything written while we read
+                wakeup.clear()
+                finished = done is None or done.done()
+                chunks, more = await self._run_blocking(
+                    read_new_logs,
+                    logs_path,
+                    open_files,
+                    offsets,
+                    self.LOG_CHUNK_SIZE,
+                    self.MAX_LOG_CHUNKS_PER_READ,
+                )
+                for chunk in chunks:
+                    yield chunk
+                if more:
+                    continue
+                if finished:
+                    break
+                if self.log_tailer.watch(
+                    wakeup, log_watch_paths(logs_path, open_files)
+                ):
+                    continue
+                await _wait_for_wakeup(wakeup, done)
+                self.register_activity()
+        finally:
+            self.log_tailer.unsubscribe(wakeup)
+            for f in open_files.values():
+                f.close()
+
+    async def PutObject(self, request, context):
+        self.register_activity()
+        key, obj = await self._run_blocking(pickle.loads, request.message)
         logger.info(f"Message received from client to put object: {key}")
         try:
-            obj_store.put(key, obj)
+            await self._run_blocking(obj_store.put, key, obj, size=len(request.message))
             ret_obj = [key, None, None]
         except Exception as e:
             logger.error(f"Error putting object {key} in object store: {e}")
             ret_obj = [None, e, traceback.format_exc()]
         return pb2.MessageResponse(message=pickle.dumps(ret_obj), received=True)
 
-    def ClearPins(self, request, context):
+    async def PutObjectStream(self, request_iterator, context):
+        self.register_activity()
+        key = None
+        try:
+            key, obj, size, never_evict = await self._receive_object(request_iterator)
+            logger.info(f"Message received from client to put object: {key}")
+            await self._run_blocking(
+                obj_store.put, key, obj, size=size, never_evict=never_evict
+            )
+            ret_obj = [key, None, None]
+        except Exception as e:
+            logger.error(f"Error putting object {key} in object store: {e}")
+            ret_obj = [None, e, traceback.format_exc()]
+        return pb2.MessageResponse(message=pickle.dumps(ret_obj), received=True)
+
+    async def PutObjects(self, request_iterator, context):
+        self.register_activity()
+        try:
+            _, pickled, _, never_evict = await self._receive_object(request_iterator)
+            logger.info(f"Message received from client to put {len(pickled)} objects")
+            errors = await self._run_blocking(self._put_objects, pickled, never_evict)
+            ret_obj = [_picklable_errors(errors), None, None]
+        except Exception as e:
+            logger.error(f"Error putting objects in object store: {e}")
+            ret_obj = [None, e, traceback.format_exc()]
+        return pb2.MessageResponse(message=pickle.dumps(ret_obj), received=True)
+
+    @staticmethod
+    def _put_objects(pickled, never_evict=False):
+        values, errors = {}, {}
+        for key, data in pickled.items():
+            try:
+                values[key] = pickle.loads(data)
+            except Exception as e:
+                errors[key] = e
+        sizes = {key: len(pickled[key]) for key in values}
+        errors.update(obj_store.put_many(values, sizes=sizes, never_evict=never_evict))
+        return errors
+
+    async def _receive_object(self, request_iterator):
+        """Reassemble a streamed object, returning its key, the object, its size serialized, and whether it
+        should never be evicted."""
+        key = None
+        never_evict = False
+        # Reassemble the chunks into a spooled temp file so we don't need the full serialized copy in memory
+        with tempfile.SpooledTemporaryFile(max_size=self.CHUNK_SIZE) as f:
+            async for chunk in request_iterator:
+                key = key or chunk.key
+                never_evict = never_evict or chunk.never_evict
+                if chunk.compression:
+                    f.write(
+                        await self._run_blocking(
+                            decompress, chunk.data, chunk.compression
+                        )
+                    )
+                else:
+                    f.write(chunk.data)
+            size = f.tell()
+            f.seek(0)
+            obj = await self._run_blocking(pickle.load, f)
+        return key, obj, size, never_evict
+
+    async def ClearPins(self, request, context):
         self.register_activity()
         pins_to_clear = pickle.loads(request.message)
         logger.info(
             f"Message received from client to clear pins: {pins_to_clear or 'all'}"
         )
-        cleared = []
+        cleared = await self.control_lane.run(self._clear_pins, pins_to_clear)
+
+        self.register_activity()
+        return pb2.MessageResponse(message=pickle.dumps(cleared), received=True)
+
+    @staticmethod
+    def _clear_pins(pins_to_clear):
         if pins_to_clear:
-            for pin in pins_to_clear:
-                remove_pinned_object(pin)
-                cleared.append(pin)
+            # Only the pins which were there
+            cleared = obj_store.delete_many(pins_to_clear)
         else:
             cleared = list(pinned_keys())
             clear_pinned_memory()
+        return cleared
 
-        self.register_activity()
-        return pb2.MessageResponse(message=pickle.dumps(cleared), received=True)
-
-    def CancelRun(self, request, context):
+    async def CancelRun(self, request, context):
         self.register_activity()
         run_keys, force, all = pickle.loads(request.message)
+        await self.control_lane.run(self._cancel_runs, run_keys, force, all)
+        if all:
+            self.result_cache.invalidate()
+        else:
+            for run_key in [run_keys] if isinstance(run_keys, str) else run_keys:
+                self.result_cache.invalidate(run_key)
+        return pb2.MessageResponse(
+            message=pickle.dumps("Cancelled"),
+            received=True,
+            output_type=OutputType.RESULT,
+        )
+
+    @staticmethod
+    def _cancel_runs(run_keys, force=False, all=False):
         if all:
             # Cancel all runs
             run_keys = obj_store.keys()
-        elif not hasattr(run_keys, "len"):
+        elif isinstance(run_keys, str):
             run_keys = [run_keys]
 
-        for obj_ref in obj_store.get_obj_refs_list(run_keys):
-            obj_store.cancel(obj_ref)
+        for run_key in run_keys:
+            obj_store.cancel(run_key, force=force)
 
         if all:
             obj_store.clear()
 
+    async def ListKeys(self, request, context):
+        self.register_activity()
+        keys: list = await self.control_lane.run(obj_store.keys)
         return pb2.MessageResponse(
-            message=pickle.dumps("Cancelled"),
-            received=True,
-            output_type=OutputType.RESULT,
+            message=pickle.dumps(keys), received=True, output_type=OutputType.RESULT
         )
 
-    def ListKeys(self, request, context):
+    async def QueryKeys(self, request, context):
         self.register_activity()
-        keys: list = obj_store.keys()
-        return pb2.MessageResponse(
-            message=pickle.dumps(keys), received=True, output_type=OutputType.RESULT
+        try:
+            records, next_page_token = await self.control_lane.run(
+                obj_store.query,
+                prefix=request.prefix or None,
+                statuses=list(request.statuses) or None,
+                submitted_after=request.submitted_after or None,
+                submitted_before=request.submitted_before or None,
+                limit=request.limit or None,
+                page_token=request.page_token or None,
+            )
+        except ValueError as e:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+        return pb2.QueryKeysResponse(
+            keys=[record["key"] for record in records],
+            metadata=[
+                pb2.KeyMetadata(
+                    **{
+                        name: value
+                        for name, value in record.items()
+                        if value is not None
+                    }
+                )
+                for record in records
+            ]
+            if request.with_metadata
+            else [],
+            next_page_token=next_page_token or "",
         )
 
-    def RunModule(self, request, context):
+    async def Status(self, request, context):
+        stats = await self.control_lane.run(obj_store.stats)
+        return pb2.ServerStatus(
+            lanes=self._lane_statuses(),
+            # No limit is sent as 0
+            obj_store=pb2.ObjStoreStats(
+                **{name: value or 0 for name, value in stats.items()}
+            ),
+        )
+
+    async def Health(self, request, context):
+        import runhouse
+
+        return pb2.HealthResponse(
+            version=runhouse.__version__,
+            ray_ready=await self.control_lane.run(_ray_ready),
+            uptime=time.time() - self.start_time,
+            lanes=self._lane_statuses(),
+        )
+
+    def _lane_statuses(self):
+        return [pb2.LaneStatus(name=lane.name, **lane.status()) for lane in self.lanes]
+
+    async def RunModule(self, request, context):
+        self.register_activity()
+        return await self._run_module(request)
+
+    async def RunModuleBatch(self, request, context):
         self.register_activity()
-        # get the function result from the incoming request
-        [
-            relative_path,
-            module_name,
-            fn_name,
-            fn_type,
-            resources,
-            conda_env,
-            args,
-            kwargs,
-        ] = pickle.loads(request.message)
+        logger.info(
+            f"Message received from client to run a batch of {len(request.messages)} functions"
+        )
+        responses = await asyncio.gather(
+            *[self._run_module(message) for message in request.messages]
+        )
+        return pb2.RunMessageBatchResponse(responses=responses)
 
+    async def _run_module(self, request):
         try:
-            result = call_fn_by_type(
-                fn_type=fn_type,
-                fn_name=fn_name,
-                relative_path=relative_path,
-                module_name=module_name,
-                resources=resources,
-                conda_env=conda_env,
+            # Args and kwargs are decompressed but left pickled, to be unpickled only inside the Ray worker
+            if _has_compressed_args(request):
+                args, kwargs = await self._run_blocking(
+                    lambda: (
+                        [_args_tuple(arg) for arg in request.args],
+                        _args_tuple(request.kwargs),
+                    )
+                )
+            else:
+                args = [_args_tuple(arg) for arg in request.args]
+                kwargs = _args_tuple(request.kwargs)
+            result = await acall_serialized_fn_by_type(
+                fn_type=request.fn_type,
+                fn_name=request.func_name,
+                relative_path=request.relative_path or None,
+                module_name=request.module_name,
+                resources=dict(request.resources),
+                conda_env=request.conda_env or None,
                 args=args,
                 kwargs=kwargs,
+                num_repeats=request.num_repeats,
+                serialized_fn=request.serialized_fn,
+                oob_buffers=request.oob_buffers,
+                user=request.user or None,
             )
             self.register_activity()
-            return pb2.RunMessageResponse(result=result, exception=None, traceback=None)
+            data, buffers = result if request.oob_buffers else (result, [])
+            codec = negotiate_codec(request.accept_compression)
+            if codec and len(data) + sum(map(len, buffers)) >= COMPRESSION_THRESHOLD:
+                return await self._run_blocking(_result_response, data, buffers, codec)
+            # Too small to compress, e.g. run keys, so skip the hop to the thread pool
+            return _result_response(data, buffers, None)
+        except asyncio.CancelledError:
+            # The client's deadline passed or it went away, and its Ray tasks have been cancelled
+            logger.info(f"Call to {request.func_name} was cancelled by the client")
+            raise
         except Exception as e:
             logger.exception(e)
             self.register_activity()
             return pb2.RunMessageResponse(
-                result=None, exception=e, traceback=traceback.format_exc()
+                result=None,
+                exception=pickle.dumps(e),
+                traceback=traceback.format_exc(),
             )
 
-    def AddSecrets(self, request, context):
-        from runhouse import Secrets
-
+    async def AddSecrets(self, request, context):
         self.register_activity()
         secrets_to_add: dict = pickle.loads(request.message)
+        failed_providers = await self.control_lane.run(
+            self._add_secrets, secrets_to_add
+        )
+        return pb2.MessageResponse(
+            message=pickle.dumps(failed_providers),
+            received=True,
+            output_type=OutputType.RESULT,
+        )
+
+    @staticmethod
+    def _add_secrets(secrets_to_add: dict):
+        from runhouse import Secrets
+
         failed_providers = (
             {}
         )  # Track which providers fail and send them back to the user
@@ -239,12 +654,7 @@ class UnaryService(pb2_grpc.UnaryServicer):
             # update config on the cluster with the default creds path for each provider
             configs.set_nested("secrets", {provider_name: credentials_path})
             logger.info(f"Added secrets for {provider_name} to: {credentials_path}")
-
-        return pb2.MessageResponse(
-            message=pickle.dumps(failed_providers),
-            received=True,
-            output_type=OutputType.RESULT,
-        )
+        return failed_providers
 
     def _collect_cluster_stats(self):
         """Collect cluster metadata and send to Grafana Loki"""
@@ -320,20 +730,161 @@ class UnaryService(pb2_grpc.UnaryServicer):
             )
 
 
-def serve():
-    server = grpc.server(
-        futures.ThreadPoolExecutor(max_workers=10),
+def _args_tuple(serialized_args):
+    return (
+        decompress(serialized_args.data, serialized_args.compression),
+        decompress_buffers(serialized_args.buffers, serialized_args.buffer_compression),
+        dict(serialized_args.keys),
+    )
+
+
+async def _wait_for_wakeup(wakeup, done):
+    """Wait until the log tailer wakes us up, or ``done`` resolves."""
+    waiter = asyncio.ensure_future(wakeup.wait())
+    try:
+        await asyncio.wait({waiter, done}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        waiter.cancel()
+
+
+def _picklable_errors(errors):
+    """Errors to send back to the client, replacing any which can't be pickled with a ``RuntimeError``."""
+    picklable = {}
+    for key, error in errors.items():
+        try:
+            pickle.dumps(error)
+            picklable[key] = error
+        except Exception:
+            picklable[key] = RuntimeError(repr(error))
+    return picklable
+
+
+def _default_spill_budget(spill_dir, fraction):
+    """``fraction`` of the free disk space where the object store spills to."""
+    path = Path(spill_dir).expanduser()
+    path.mkdir(parents=True, exist_ok=True)
+    return int(shutil.disk_usage(path).free * fraction)
+
+
+def _default_obj_store_budget(fraction):
+    """``fraction`` of the memory in Ray's object store, or ``None`` (no limit) if Ray doesn't say."""
+    try:
+        object_store_memory = ray.cluster_resources().get("object_store_memory")
+    except Exception as e:
+        logger.warning(f"Could not get Ray's object store memory: {e}")
+        return None
+    return int(object_store_memory * fraction) if object_store_memory else None
+
+
+def _ray_ready():
+    """Whether this process is connected to a Ray cluster which has CPUs to run tasks on."""
+    try:
+        return ray.is_initialized() and ray.cluster_resources().get("CPU", 0) > 0
+    except Exception as e:
+        logger.warning(f"Ray is not ready: {e}")
+        return False
+
+
+def _has_compressed_args(request):
+    return any(
+        arg.compression or any(arg.buffer_compression)
+        for arg in [*request.args, request.kwargs]
+    )
+
+
+def _result_response(data, buffers, codec):
+    data, compression = compress(data, codec)
+    buffers, buffer_compression = compress_buffers(buffers, codec)
+    return pb2.RunMessageResponse(
+        result=data,
+        buffers=buffers,
+        compression=compression,
+        buffer_compression=buffer_compression,
+    )
+
+
+async def serve(
+    max_concurrent_rpcs: int = None,
+    max_workers: int = None,
+    control_workers: int = None,
+    install_workers: int = None,
+):
+    max_concurrent_rpcs = max_concurrent_rpcs or configs.get(
+        "grpc_max_concurrent_rpcs", UnaryService.DEFAULT_MAX_CONCURRENT_RPCS
+    )
+    max_workers = max_workers or configs.get(
+        "grpc_max_workers", UnaryService.DEFAULT_MAX_WORKERS
+    )
+    control_workers = control_workers or configs.get(
+        "grpc_control_workers", UnaryService.DEFAULT_CONTROL_WORKERS
+    )
+    install_workers = install_workers or configs.get(
+        "grpc_install_workers", UnaryService.DEFAULT_INSTALL_WORKERS
+    )
+    server = grpc.aio.server(
         options=[
             ("grpc.max_send_message_length", UnaryService.MAX_MESSAGE_LENGTH),
             ("grpc.max_receive_message_length", UnaryService.MAX_MESSAGE_LENGTH),
         ],
+        maximum_concurrent_rpcs=max_concurrent_rpcs,
     )
-    pb2_grpc.add_UnaryServicer_to_server(UnaryService(), server)
-    server.add_insecure_port("[::]:50052")
-    server.start()
-    logger.info("Server up and running")
-    server.wait_for_termination()
+    service = UnaryService(
+        max_workers=max_workers,
+        control_workers=control_workers,
+        install_workers=install_workers,
+    )
+    pb2_grpc.add_UnaryServicer_to_server(service, server)
+    server.add_insecure_port(f"[::]:{UnaryService.DEFAULT_PORT}")
+    # Remove the socket left behind by a previous server, otherwise binding to it fails
+    socket_path = Path(UnaryService.UNIX_SOCKET_PATH)
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+    if socket_path.exists():
+        socket_path.unlink()
+    server.add_insecure_port(f"unix://{socket_path}")
+    await server.start()
+    logger.info(
+        f"Server up and running on port {UnaryService.DEFAULT_PORT} and {socket_path}, with max "
+        f"{max_concurrent_rpcs} concurrent RPCs and {max_workers} data, {control_workers} control and "
+        f"{install_workers} install workers"
+    )
+    try:
+        await server.wait_for_termination()
+    finally:
+        service.close()
 
 
 if __name__ == "__main__":
-    serve()
+    parser = argparse.ArgumentParser(description="Runhouse gRPC server")
+    parser.add_argument(
+        "--max-concurrent-rpcs",
+        type=int,
+        default=None,
+        help="Max number of in-flight RPCs before rejecting with RESOURCE_EXHAUSTED",
+    )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=None,
+        help="Size of the thread pool for blocking data work",
+    )
+    parser.add_argument(
+        "--control-workers",
+        type=int,
+        default=None,
+        help="Size of the thread pool for control calls, e.g. cancelling runs",
+    )
+    parser.add_argument(
+        "--install-workers",
+        type=int,
+        default=None,
+        help="Size of the thread pool for installing packages",
+    )
+    args = parser.parse_args()
+    asyncio.run(
+        serve(
+            max_concurrent_rpcs=args.max_concurrent_rpcs,
+            max_workers=args.max_workers,
+            control_workers=args.control_workers,
+            install_workers=args.install_workers,
+        )
+    )
@@ -0,0 +1,372 @@
+"""
+Per-user background daemon which holds the SSH tunnels to clusters' Runhouse servers, so that new Python processes
+and CLI calls can attach to an existing tunnel instead of each loading SSH keys and doing the SSH handshake again.
+
+Each tunnel is exposed on a Unix socket in ``~/.rh/tunnels``, which clients open a (cheap, local) gRPC channel to.
+The daemon restarts tunnels which drop, closes the ones no process has asked for in a while, and exits once it
+has no tunnels left. It's started on demand by the first process which needs it (see :func:`tunnel_socket`),
+and can be run in the foreground with ``python -m runhouse.servers.tunnel_daemon``.
+
+The daemon is controlled over ``~/.rh/tunnels/daemon.sock`` with one JSON request and response per connection,
+e.g. ``{"op": "open", "address": ..., "ssh_user": ..., "ssh_private_key": ..., "remote_port": ...}``.
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+TUNNELS_DIR = Path.home() / ".rh/tunnels"
+DAEMON_SOCKET_PATH = TUNNELS_DIR / "daemon.sock"
+DAEMON_LOCK_PATH = TUNNELS_DIR / "daemon.lock"
+DAEMON_LOG_PATH = TUNNELS_DIR / "daemon.log"
+
+# How often the daemon checks its tunnels, restarting the dropped ones and closing the idle ones
+KEEPALIVE_INTERVAL = 5
+# Close tunnels which no process has asked for in this long
+DEFAULT_IDLE_TIMEOUT = 6 * 60 * 60
+# How long clients wait for a newly spawned daemon to start listening
+STARTUP_TIMEOUT = 10
+# Opening a tunnel does the SSH handshake, so give it a while
+REQUEST_TIMEOUT = 60
+
+
+class TunnelDaemonError(Exception):
+    pass
+
+
+class _Tunnel(object):
+    def __init__(self, address: str, forwarder, socket_path: str):
+        self.address = address
+        self.forwarder = forwarder
+        self.socket_path = socket_path
+        self.last_used = time.time()
+        self.started = False
+        self.lock = threading.Lock()
+
+
+class TunnelDaemon(object):
+    def __init__(self, idle_timeout: float = DEFAULT_IDLE_TIMEOUT):
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._tunnels: Dict[str, _Tunnel] = {}
+        self._last_request = time.time()
+        self._server: Optional[socketserver.BaseServer] = None
+
+    @staticmethod
+    def socket_path_for(address: str, remote_port: int) -> str:
+        safe_address = re.sub(r"[^A-Za-z0-9_.-]", "_", address)
+        return str(TUNNELS_DIR / f"{safe_address}-{remote_port}.sock")
+
+    def open(
+        self, address: str, ssh_user: str, ssh_private_key: str, remote_port: int
+    ) -> str:
+        """Get the Unix socket tunneled to ``remote_port`` on ``address``, opening the tunnel if needed."""
+        from sshtunnel import SSHTunnelForwarder
+
+        socket_path = self.socket_path_for(address, remote_port)
+        with self._lock:
+            tunnel = self._tunnels.get(socket_path)
+            if tunnel is None:
+                forwarder = SSHTunnelForwarder(
+                    address,
+                    ssh_username=ssh_user,
+                    ssh_pkey=ssh_private_key,
+                    local_bind_address=socket_path,
+                    remote_bind_address=("127.0.0.1", remote_port),
+                    set_keepalive=1,
+                )
+                tunnel = self._tunnels[socket_path] = _Tunnel(
+                    address, forwarder, socket_path
+                )
+
+        # Only hold up requests for this tunnel while it's (re)connecting
+        with tunnel.lock:
+            tunnel.last_used = time.time()
+            if not tunnel.forwarder.is_active:
+                try:
+                    self._start(tunnel)
+                except TunnelDaemonError:
+                    # Leave it to the client to retry, rather than retrying in the background
+                    with self._lock:
+                        self._tunnels.pop(socket_path, None)
+                    raise
+        return socket_path
+
+    @staticmethod
+    def _start(tunnel: _Tunnel):
+        logger.info(f"Opening tunnel on {tunnel.socket_path}")
+        try:
+            if tunnel.started:
+                tunnel.forwarder.restart()
+            else:
+                if Path(tunnel.socket_path).exists():
+                    # Left behind by a previous daemon
+                    os.unlink(tunnel.socket_path)
+                tunnel.forwarder.start()
+                tunnel.started = True
+        except Exception as e:
+            raise TunnelDaemonError(
+                f"Could not open tunnel on {tunnel.socket_path}: {e}"
+            )
+
+    def close(self, address: Optional[str] = None):
+        """Close the tunnels to ``address``, or all of them."""
+        with self._lock:
+            tunnels = [
+                self._tunnels.pop(tunnel.socket_path)
+                for tunnel in list(self._tunnels.values())
+                if address is None or tunnel.address == address
+            ]
+        for tunnel in tunnels:
+            self._stop(tunnel)
+
+    @staticmethod
+    def _stop(tunnel: _Tunnel):
+        logger.info(f"Closing tunnel on {tunnel.socket_path}")
+        with tunnel.lock:
+            try:
+                tunnel.forwarder.stop(force=True)
+            except Exception as e:
+                logger.debug(f"Error closing tunnel on {tunnel.socket_path}: {e}")
+
+    def status(self) -> Dict:
+        now = time.time()
+        with self._lock:
+            tunnels = list(self._tunnels.values())
+        return {
+            "pid": os.getpid(),
+            "tunnels": {
+                tunnel.socket_path: {
+                    "active": tunnel.forwarder.is_active,
+                    "idle_secs": round(now - tunnel.last_used),
+                }
+                for tunnel in tunnels
+            },
+        }
+
+    def handle(self, request: Dict) -> Dict:
+        self._last_request = time.time()
+        op = request.get("op")
+        if op == "open":
+            return {
+                "socket_path": self.open(
+                    request["address"],
+                    ssh_user=request["ssh_user"],
+                    ssh_private_key=request["ssh_private_key"],
+                    remote_port=request["remote_port"],
+                )
+            }
+        elif op == "close":
+            self.close(request.get("address"))
+            return {}
+        elif op == "status":
+            return self.status()
+        elif op == "shutdown":
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return {}
+        raise TunnelDaemonError(f"Unknown op {op}")
+
+    def keepalive(self):
+        """Restart tunnels which dropped, close idle ones, and shut down the daemon once there are none left."""
+        while True:
+            time.sleep(KEEPALIVE_INTERVAL)
+            now = time.time()
+            with self._lock:
+                tunnels = list(self._tunnels.values())
+            for tunnel in tunnels:
+                if now - tunnel.last_used > self.idle_timeout:
+                    with self._lock:
+                        self._tunnels.pop(tunnel.socket_path, None)
+                    self._stop(tunnel)
+                    continue
+                with tunnel.lock:
+                    if tunnel.forwarder.is_active:
+                        continue
+                    try:
+                        self._start(tunnel)
+                    except TunnelDaemonError as e:
+                        # Try again next time, or when a client next asks for it
+                        logger.warning(str(e))
+
+            with self._lock:
+                idle = (
+                    not self._tunnels and now - self._last_request > self.idle_timeout
+                )
+            if idle:
+                logger.info("No tunnels left, shutting down")
+                self.shutdown()
+                return
+
+    def shutdown(self):
+        self.close()
+        if self._server is not None:
+            self._server.shutdown()
+
+    def serve(self):
+        import fcntl
+
+        TUNNELS_DIR.mkdir(parents=True, exist_ok=True)
+        # Held for as long as the daemon runs, so only one daemon runs per user even if several processes start
+        # one at the same time
+        lock_file = open(DAEMON_LOCK_PATH, "w")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            logger.info("Tunnel daemon is already running")
+            return
+
+        if DAEMON_SOCKET_PATH.exists():
+            DAEMON_SOCKET_PATH.unlink()
+
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                try:
+                    response = daemon.handle(json.loads(self.rfile.readline()))
+                except Exception as e:
+                    response = {"error": str(e)}
+                self.wfile.write(json.dumps(response).encode() + b"\n")
+
+        with socketserver.ThreadingUnixStreamServer(
+            str(DAEMON_SOCKET_PATH), Handler
+        ) as server:
+            server.daemon_threads = True
+            os.chmod(DAEMON_SOCKET_PATH, 0o600)
+            self._server = server
+            threading.Thread(target=self.keepalive, daemon=True).start()
+            logger.info(f"Tunnel daemon listening on {DAEMON_SOCKET_PATH}")
+            server.serve_forever()
+
+        if DAEMON_SOCKET_PATH.exists():
+            DAEMON_SOCKET_PATH.unlink()
+        lock_file.close()
+
+
+def daemon_request(op: str, timeout: float = REQUEST_TIMEOUT, **kwargs) -> Dict:
+    """Send a request to the running tunnel daemon. Raises ``ConnectionError`` if it isn't running."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(str(DAEMON_SOCKET_PATH))
+        sock.sendall(json.dumps({"op": op, **kwargs}).encode() + b"\n")
+        with sock.makefile("rb") as f:
+            line = f.readline()
+    if not line:
+        raise ConnectionError("Tunnel daemon closed the connection")
+    response = json.loads(line)
+    if "error" in response:
+        raise TunnelDaemonError(response["error"])
+    return response
+
+
+def start_daemon(idle_timeout: Optional[float] = None):
+    """Start the tunnel daemon in the background (if it isn't already running) and wait for it to listen."""
+    try:
+        return daemon_request("status", timeout=1)
+    except (ConnectionError, FileNotFoundError, socket.timeout):
+        pass
+
+    TUNNELS_DIR.mkdir(parents=True, exist_ok=True)
+    cmd = [sys.executable, "-m", "runhouse.servers.tunnel_daemon"]
+    if idle_timeout is not None:
+        cmd += ["--idle-timeout", str(idle_timeout)]
+    with open(DAEMON_LOG_PATH, "a") as log:
+        # In its own session, so it outlives this process and doesn't get its signals (e.g. Ctrl-C)
+        subprocess.Popen(
+            cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+            start_new_session=True,
+        )
+
+    waited = 0
+    while waited <= STARTUP_TIMEOUT:
+        try:
+            return daemon_request("status", timeout=1)
+        except (ConnectionError, FileNotFoundError, socket.timeout):
+            time.sleep(0.05)
+            waited += 0.05
+    raise TunnelDaemonError(
+        f"Tunnel daemon didn't start, see the logs in {DAEMON_LOG_PATH}"
+    )
+
+
+def tunnel_socket(
+    address: str,
+    ssh_user: str,
+    ssh_private_key: str,
+    remote_port: int,
+    idle_timeout: Optional[float] = None,
+) -> str:
+    """Get the path of a Unix socket tunneled to ``remote_port`` on ``address`` by the tunnel daemon, starting
+    the daemon if it isn't running yet."""
+    request = dict(
+        address=address,
+        ssh_user=ssh_user,
+        ssh_private_key=str(Path(ssh_private_key).expanduser())
+        if ssh_private_key
+        else None,
+        remote_port=remote_port,
+    )
+    try:
+        return daemon_request("open", **request)["socket_path"]
+    except (ConnectionError, FileNotFoundError):
+        start_daemon(idle_timeout)
+        return daemon_request("open", **request)["socket_path"]
+
+
+def close_tunnels(address: str):
+    """Close the daemon's tunnels to ``address`` (e.g. when the cluster is torn down), if it's running."""
+    try:
+        daemon_request("close", address=address)
+    except (ConnectionError, FileNotFoundError):
+        pass
+
+
+class DaemonTunnel(object):
+    """Stands in for an ``SSHTunnelForwarder`` in a :class:`Connection` whose tunnel is held by the daemon.
+    Checking it asks the daemon for the tunnel again, which reopens it if it dropped and keeps it from being
+    closed as idle. Stopping it does nothing, since other processes may be using the tunnel too."""
+
+    def __init__(self, address: str, socket_path: str, reopen):
+        self.address = address
+        self.socket_path = socket_path
+        self._reopen = reopen
+        self.tunnel_is_up = {socket_path: True}
+
+    def check_tunnels(self):
+        try:
+            self.tunnel_is_up = {self._reopen(): True}
+        except Exception as e:
+            logger.debug(f"Tunnel daemon couldn't reopen tunnel to {self.address}: {e}")
+            self.tunnel_is_up = {self.socket_path: False}
+
+    def stop(self, force=False):
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Runhouse SSH tunnel daemon")
+    parser.add_argument(
+        "--idle-timeout",
+        type=float,
+        default=DEFAULT_IDLE_TIMEOUT,
+        help="Close tunnels (and then the daemon) after they've been unused for this many seconds",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s"
+    )
+    TunnelDaemon(idle_timeout=args.idle_timeout).serve()
@@ -90,6 +90,8 @@ extras_require = {
     "azure": ["azure-cli==2.31.0", "azure-core"],
     "gcp": ["google-api-python-client", "google-cloud-storage", "gcsfs"],
     "docker": ["docker"],
+    # Faster codecs for compressing gRPC payloads, gzip is used otherwise
+    "compression": ["zstandard", "lz4"],
 }
 
 extras_require["all"] = sum(extras_require.values(), [])
@@ -62,6 +62,385 @@ def test_restart_grpc(cpu_cluster):
     codes = cpu_cluster.restart_grpc_server(resync_rh=False)
     assert codes
 
+    # Restarting waits for the new server to be ready rather than sleeping
+    health = cpu_cluster.health()
+    assert health["ray_ready"]
+    assert health["version"] == rh.__version__
+    assert health["uptime"] < 60
+
+
+def sleep_and_return(x, secs=1):
+    import time
+
+    time.sleep(secs)
+    return x
+
+
+@pytest.mark.clustertest
+def test_concurrent_calls(cpu_cluster):
+    from concurrent.futures import ThreadPoolExecutor
+
+    sleep_fn = rh.function(sleep_and_return, system=cpu_cluster)
+    # More concurrent calls than the old 10-thread server could serve at once
+    with ThreadPoolExecutor(max_workers=50) as pool:
+        res = list(pool.map(sleep_fn, range(50)))
+    assert res == list(range(50))
+
+
+@pytest.mark.clustertest
+def test_wait_and_as_completed(cpu_cluster):
+    sleep_fn = rh.function(sleep_and_return, system=cpu_cluster)
+    run_keys = cpu_cluster.submit_many(
+        [(sleep_fn, [i], {"secs": 3 - i}) for i in range(3)]
+    )
+    # Finish in the reverse order they were submitted
+    assert list(rh.as_completed(run_keys, cpu_cluster)) == run_keys[::-1]
+
+    run_keys = sleep_fn.remote_many([0, 1], secs=10)
+    done, not_done = rh.wait(run_keys, cpu_cluster, timeout=1)
+    assert done == [] and not_done == run_keys
+    cpu_cluster.cancel(run_keys)
+
+    events = dict(cpu_cluster.watch_keys(["no_such_key"]))
+    assert events == {"no_such_key": "not_found"}
+
+
+@pytest.mark.clustertest
+def test_result_cache(cpu_cluster):
+    import time
+
+    sleep_fn = rh.function(sleep_and_return, system=cpu_cluster)
+    run_key = sleep_fn.remote(list(range(100_000)), secs=1)
+    assert cpu_cluster.get(run_key) == list(range(100_000))
+
+    # The finished run's result is served from the local cache, even without a connection
+    cpu_cluster.disconnect()
+    start = time.time()
+    assert cpu_cluster.get(run_key) == list(range(100_000))
+    assert time.time() - start < 0.1
+    assert not cpu_cluster.is_connected()
+
+    # Objects which were put aren't cached, and cancelling drops the cached results
+    cpu_cluster.put("cached_list", [1])
+    cpu_cluster.get("cached_list")
+    cpu_cluster.put("cached_list", [2])
+    assert cpu_cluster.get("cached_list") == [2]
+    cpu_cluster.cancel(all=True)
+    assert cpu_cluster.get(run_key) is None
+
+
+@pytest.mark.localtest
+def test_run_result_cache_eviction():
+    from runhouse.rns.run_result_cache import RunResultCache
+
+    cache = RunResultCache({"result_cache_size": 300})
+    for i in range(3):
+        cache.put("cluster", f"run_{i}", i, size=100)
+    # Getting a result makes it the most recently used, so run_1 is evicted to make room
+    assert cache.get("cluster", "run_0") == (True, 0)
+    cache.put("cluster", "run_3", 3, size=100)
+    assert cache.get("cluster", "run_1") == (False, None)
+    assert cache.get("cluster", "run_0") == (True, 0)
+    assert cache.size == 300
+
+    # Results bigger than the whole cache aren't cached
+    cache.put("cluster", "huge", "huge", size=301)
+    assert cache.get("cluster", "huge") == (False, None)
+
+    cache.put("other_cluster", "run_0", "other", size=1)
+    cache.invalidate("cluster", ["run_0"])
+    assert cache.get("cluster", "run_0") == (False, None)
+    cache.invalidate("cluster")
+    assert cache.get("cluster", "run_3") == (False, None)
+    assert cache.get("other_cluster", "run_0") == (True, "other")
+    assert cache.size == 1
+
+
+@pytest.mark.localtest
+def test_run_result_cache_on_disk(tmp_path):
+    from runhouse.rns.run_result_cache import RunResultCache
+
+    configs = {
+        "result_cache_size": 1000,
+        "result_cache_disk_size": 1000,
+        "result_cache_dir": str(tmp_path),
+    }
+    RunResultCache(configs).put("cluster", "run", [1, 2, 3], size=100)
+    # A new process finds the result on disk
+    cache = RunResultCache(configs)
+    assert cache.get("cluster", "run") == (True, [1, 2, 3])
+
+    cache.invalidate("cluster", ["run"])
+    assert RunResultCache(configs).get("cluster", "run") == (False, None)
+    assert cache.disk_size == 0
+
+    # The least recently used results are removed from disk once they don't all fit
+    for i in range(3):
+        cache.put("cluster", f"run_{i}", b"x" * 400, size=400)
+    assert RunResultCache(configs).get("cluster", "run_0") == (False, None)
+    assert 0 < cache.disk_size <= 1000
+    assert RunResultCache(configs)._load_disk_index() == cache._disk_index
+
+
+@pytest.mark.clustertest
+def test_get_put_delete_many(cpu_cluster):
+    shards = {f"shard_{i}": list(range(i)) for i in range(100)}
+    assert cpu_cluster.put_many(shards) == {}
+
+    sleep_fn = rh.function(sleep_and_return, system=cpu_cluster)
+    run_keys = sleep_fn.remote_many(list(range(10)), secs=0)
+    # One round trip for all of them, with the keys which couldn't be got reported separately
+    values, errors = cpu_cluster.get_many(list(shards) + run_keys + ["no_such_key"])
+    assert values == {**shards, **dict(zip(run_keys, range(10)))}
+    assert list(errors) == ["no_such_key"]
+
+    errors = cpu_cluster.delete_many(list(shards) + ["no_such_key"])
+    assert list(errors) == ["no_such_key"]
+    assert not set(shards) & set(cpu_cluster.list_keys())
+
+
+@pytest.mark.clustertest
+def test_list_runs(cpu_cluster):
+    sleep_fn = rh.function(sleep_and_return, system=cpu_cluster)
+    run_keys = sleep_fn.remote_many(list(range(5)), secs=0)
+    assert len(set(run_keys)) == 5
+    cpu_cluster.get_many(run_keys)
+
+    # Filtered and paginated on the server, oldest first
+    runs, page_token = cpu_cluster.list_runs(prefix="sleep_and_return", limit=3)
+    while page_token:
+        page, page_token = cpu_cluster.list_runs(
+            prefix="sleep_and_return", limit=3, page_token=page_token
+        )
+        runs += page
+    assert set(run_keys) <= {run["key"] for run in runs}
+    run = next(run for run in runs if run["key"] == run_keys[0])
+    assert run["run_id"] and run["fn_name"] == "sleep_and_return"
+    assert run["status"] == "done"
+
+    assert set(run_keys) <= set(cpu_cluster.list_keys(status="done"))
+    assert not set(run_keys) & set(cpu_cluster.list_keys(status="pending"))
+
+
+@pytest.mark.clustertest
+def test_obj_store_budget(cpu_cluster):
+    cpu_cluster.put("never_evicted", list(range(1000)), never_evict=True)
+    stats = cpu_cluster.obj_store_stats()
+    # By default the budget is half of Ray's object store memory
+    assert stats["max_bytes"] > 0
+    assert stats["never_evict"] >= 1
+    assert 0 < stats["bytes"] <= stats["max_bytes"]
+    assert "never_evicted" in cpu_cluster.list_keys()
+
+
+@pytest.fixture
+def local_obj_store(monkeypatch):
+    from runhouse.rns.obj_store import ObjStore
+
+    # Keep values in the process rather than Ray's object store, so only the store's bookkeeping is under test
+    monkeypatch.setattr(ObjStore, "_ray_put", lambda self, value: value)
+    return ObjStore
+
+
+@pytest.mark.localtest
+def test_obj_store_lru_eviction(local_obj_store):
+    obj_store = local_obj_store(max_bytes=300)
+    for i in range(3):
+        obj_store.put(f"obj_{i}", i, size=100)
+    obj_store.put("pinned", "pinned", size=100, never_evict=True)
+    # Over budget, so the least recently used entry is evicted, but not the pinned one
+    assert obj_store.keys() == ["obj_1", "obj_2", "pinned"]
+
+    # Using an entry makes it the most recently used
+    assert obj_store.get_obj_ref("obj_1") == 1
+    obj_store.put("obj_3", 3, size=100)
+    assert obj_store.keys() == ["pinned", "obj_1", "obj_3"]
+
+    stats = obj_store.stats()
+    assert stats["evicted_lru"] == 2 and stats["evicted_bytes"] == 200
+    assert stats["bytes"] == 300 and stats["never_evict"] == 1
+
+    # Lowering the budget evicts straight away, leaving only what can't be evicted
+    obj_store.set_limits(max_bytes=0)
+    assert obj_store.keys() == ["pinned"]
+
+
+@pytest.mark.localtest
+def test_obj_store_ttl_eviction(local_obj_store):
+    import time
+
+    obj_store = local_obj_store(ttl=0.1)
+    obj_store.put("expiring", 1, size=1)
+    obj_store.put("pinned", 2, size=1, never_evict=True)
+    assert obj_store.get_obj_ref("expiring") == 1
+
+    # Expired however recently they were used
+    time.sleep(0.2)
+    assert obj_store.get_obj_ref("expiring") is None
+    assert obj_store.keys() == ["pinned"]
+    assert obj_store.stats()["evicted_ttl"] == 1
+
+
+@pytest.mark.localtest
+def test_obj_store_cache(local_obj_store):
+    obj_store = local_obj_store()
+    obj_store.put("obj", 1, size=1)
+
+    # A live mapping of the store's object refs, which writes go through to the store
+    obj_store_cache = obj_store.obj_store_cache
+    assert dict(obj_store_cache) == {"obj": 1}
+    obj_store_cache["other"] = 2
+    del obj_store_cache["obj"]
+    assert obj_store.keys() == ["other"]
+    assert obj_store.get_obj_ref("other") == 2
+    with pytest.raises(KeyError):
+        del obj_store_cache["obj"]
+
+
+def spill_and_read_back(spill_dir):
+    import numpy as np
+
+    from runhouse.rns.obj_store import ObjStore
+
+    obj_store = ObjStore(max_bytes=1_000_000)
+    obj_store.set_spill(spill_dir)
+    arrays = [np.arange(100_000) + i for i in range(3)]
+    for i, arr in enumerate(arrays):
+        obj_store.put(f"arr_{i}", arr)
+    stats = obj_store.stats()
+    read_back = all(
+        (obj_store.get(f"arr_{i}") == arr).all() for i, arr in enumerate(arrays)
+    )
+    obj_store.clear()
+    return stats["spilled"], read_back
+
+
+@pytest.mark.clustertest
+def test_obj_store_spill(cpu_cluster):
+    # Entries over the memory budget are spilled to disk, and read back when they're used
+    spill_fn = rh.function(spill_and_read_back).to(cpu_cluster)
+    spilled, read_back = spill_fn("~/.rh/spill_test")
+    assert spilled == 2
+    assert read_back
+
+
+@pytest.mark.localtest
+def test_spill_write_and_read(tmp_path):
+    import numpy as np
+
+    from runhouse.rns import spill
+
+    arr = np.arange(100_000)
+    path, size = spill.write(str(tmp_path), "arr", arr)
+    assert path.endswith(spill.NUMPY_SUFFIX) and size >= arr.nbytes
+    # Memory-mapped rather than loaded into memory
+    read_back = spill.read(path)
+    assert isinstance(read_back, np.memmap) and not read_back.flags.writeable
+    assert (read_back == arr).all()
+
+    # Anything else is pickled, and writing the same key again replaces its file
+    path, _ = spill.write(str(tmp_path), "obj", {"a": [1, 2]})
+    path, _ = spill.write(str(tmp_path), "obj", {"a": [1, 2, 3]})
+    assert path.endswith(spill.PICKLE_SUFFIX)
+    assert spill.read(path) == {"a": [1, 2, 3]}
+    assert len(list(tmp_path.iterdir())) == 2
+
+    spill.remove(path)
+    # Removing a file that's already gone is fine
+    spill.remove(path)
+    assert len(list(tmp_path.iterdir())) == 1
+
+
+@pytest.mark.localtest
+def test_spill_arrow(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+
+    from runhouse.rns import spill
+
+    table = pa.table({"x": list(range(1000)), "y": [str(i) for i in range(1000)]})
+    path, _ = spill.write(str(tmp_path), "table", table)
+    assert path.endswith(spill.ARROW_TABLE_SUFFIX)
+    assert spill.read(path).equals(table)
+
+    batch = table.to_batches()[0]
+    path, _ = spill.write(str(tmp_path), "batch", batch)
+    assert path.endswith(spill.ARROW_BATCH_SUFFIX)
+    assert spill.read(path).equals(batch)
+
+
+@pytest.mark.clustertest
+def test_obj_store_survives_restart(cpu_cluster):
+    sleep_fn = rh.function(sleep_and_return, system=cpu_cluster)
+    run_key = sleep_fn.remote(5, secs=0)
+    assert cpu_cluster.get(run_key) == 5
+    cpu_cluster.put("survivor", [1, 2, 3])
+
+    # The store lives in a detached actor the new server reattaches to
+    cpu_cluster.restart_grpc_server(resync_rh=False)
+    assert cpu_cluster.get("survivor") == [1, 2, 3]
+    # Runs are still listed, though their results were owned by the old server process
+    assert run_key in cpu_cluster.list_keys(status="done")
+
+
+@pytest.mark.clustertest
+def test_shared_connection(cpu_cluster):
+    from concurrent.futures import ThreadPoolExecutor
+
+    cpu_cluster.check_grpc()
+    copies = [
+        OnDemandCluster.from_config(cpu_cluster.config_for_rns) for _ in range(10)
+    ]
+    # Many threads using many copies of the same cluster share one channel
+    with ThreadPoolExecutor(max_workers=10) as pool:
+        list(pool.map(lambda c: c.list_keys(), copies * 5))
+    assert all(c.client is cpu_cluster.client for c in copies)
+
+
+@pytest.mark.clustertest
+def test_tunnel_daemon(cpu_cluster):
+    import time
+
+    from runhouse.servers import tunnel_daemon
+
+    rh.configs.defaults_cache["use_tunnel_daemon"] = True
+    try:
+        cpu_cluster.disconnect()
+        cpu_cluster.check_grpc()
+        assert cpu_cluster.list_keys() is not None
+        status = tunnel_daemon.daemon_request("status")
+        assert any(tunnel["active"] for tunnel in status["tunnels"].values())
+
+        # Reconnecting (like a new process would) attaches to the daemon's tunnel rather than opening a new one
+        start = time.time()
+        cpu_cluster.disconnect()
+        cpu_cluster.check_grpc()
+        assert time.time() - start < 5
+        assert tunnel_daemon.daemon_request("status")["pid"] == status["pid"]
+    finally:
+        rh.configs.defaults_cache["use_tunnel_daemon"] = False
+        cpu_cluster.disconnect()
+        tunnel_daemon.daemon_request("shutdown")
+
+
+@pytest.mark.clustertest
+def test_control_calls_during_install(cpu_cluster):
+    import threading
+    import time
+
+    # A slow pip install shouldn't hold up control calls
+    install = threading.Thread(
+        target=cpu_cluster.install_packages, args=(["pip:scikit-learn"],)
+    )
+    install.start()
+    start = time.time()
+    cpu_cluster.list_keys()
+    assert time.time() - start < 2
+    install.join()
+
+    status = cpu_cluster.server_status()
+    assert set(status) == {"control", "data", "install"}
+    assert status["install"]["completed"] >= 1
+
 
 @pytest.mark.clustertest
 def test_on_same_cluster(cpu_cluster):
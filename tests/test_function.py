@@ -17,6 +17,11 @@ def call_function(fn, **kwargs):
     return fn(**kwargs)
 
 
+def call_function_remote(fn, **kwargs):
+    run_key = fn.remote(**kwargs)
+    return fn.system.get(run_key), fn.system.client.host
+
+
 def torch_summer(a, b):
     # import inside so tests that don't use torch don't fail because torch isn't in their reqs
     import torch
@@ -164,6 +169,177 @@ def test_maps(cpu_cluster):
     assert res == [4, 6, 8, 10, 12]
 
 
+@pytest.mark.clustertest
+def test_large_array_args(cpu_cluster):
+    import numpy as np
+
+    # Large enough that the arrays are sent as out-of-band buffers
+    a = np.arange(10_000_000, dtype=np.float64)
+    re_fn = rh.function(summer, system=cpu_cluster, env=["./", "numpy"])
+    res = re_fn(a, b=a)
+    assert np.array_equal(res, 2 * a)
+
+    res = re_fn.map([1, 2], b=a)
+    assert np.array_equal(res[1], a + 2)
+
+
+@pytest.mark.clustertest
+def test_remote_many(cpu_cluster):
+    re_fn = rh.function(summer, system=cpu_cluster)
+    run_keys = re_fn.remote_many(list(range(100)), b=1)
+    assert len(set(run_keys)) == 100
+    assert [cpu_cluster.get(run_key) for run_key in run_keys[:5]] == [1, 2, 3, 4, 5]
+
+    # Different Functions and resources in the same batch
+    pid_fn = rh.function(getpid, system=cpu_cluster)
+    run_keys = cpu_cluster.submit_many(
+        [(re_fn, [1, 2]), (re_fn, [1], {"b": 3}), (pid_fn, [], {}, {"num_cpus": 1})]
+    )
+    assert cpu_cluster.get(run_keys[0]) == 3
+    assert cpu_cluster.get(run_keys[1]) == 4
+    assert cpu_cluster.get(run_keys[2]) > 0
+
+    # A call which can't be submitted doesn't lose the run keys of the ones which were
+    outcomes = cpu_cluster.submit_many(
+        [(re_fn, [1, 2]), (pid_fn, [], {}, {"num_cpus": -1})], return_errors=True
+    )
+    assert outcomes[0][1] is None and cpu_cluster.get(outcomes[0][0]) == 3
+    assert outcomes[1][0] is None and outcomes[1][1] is not None
+
+
+@pytest.mark.clustertest
+def test_async_calls(cpu_cluster):
+    import asyncio
+
+    re_fn = rh.function(summer, system=cpu_cluster)
+
+    async def run():
+        results = await asyncio.gather(*[re_fn.acall(i, b=1) for i in range(100)])
+        run_key = await re_fn.aremote(1, 2)
+        await cpu_cluster.aput("async_list", [1, 2, 3])
+        return (
+            results,
+            await cpu_cluster.aget(run_key),
+            await cpu_cluster.aget("async_list"),
+        )
+
+    results, remote_res, put_res = asyncio.run(run())
+    assert results == list(range(1, 101))
+    assert remote_res == 3
+    assert put_res == [1, 2, 3]
+
+
+@pytest.mark.clustertest
+def test_batched_calls(cpu_cluster):
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+
+    batched_fn = rh.function(summer, system=cpu_cluster, batch_window_ms=5)
+    with ThreadPoolExecutor(max_workers=50) as pool:
+        results = list(pool.map(lambda i: batched_fn(i, b=1), range(500)))
+    assert results == list(range(1, 501))
+
+    async def run():
+        # A failing call only fails its own caller
+        return await asyncio.gather(
+            *[batched_fn.acall(i, b=1) for i in range(10)],
+            batched_fn.acall(1, b="a"),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(run())
+    assert results[:10] == list(range(1, 11))
+    assert isinstance(results[10], TypeError)
+
+
+@pytest.mark.localtest
+def test_get_requires_access():
+    from runhouse.rns.function import Function
+
+    # Run keys are checked too, not just object refs
+    proxy_fn = Function(access=ResourceAccess.PROXY, dryrun=True)
+    for obj_ref in ["my_run_key", ["my_run_key"]]:
+        with pytest.raises(NotImplementedError):
+            proxy_fn.get(obj_ref)
+
+
+@pytest.mark.localtest
+def test_call_batcher():
+    import threading
+
+    from runhouse.rns.call_batcher import CallBatcher
+
+    batches = []
+
+    def send_batch(calls):
+        batches.append(calls)
+        return [(sum(args) + kwargs.get("b", 0), None, None) for args, kwargs in calls]
+
+    # Sent as soon as there are max_batch calls, without waiting for the window to close
+    batcher = CallBatcher(send_batch, window_ms=60_000, max_batch=3)
+    futures = [batcher.submit((i,), {"b": 1}) for i in range(3)]
+    assert [future.result(timeout=5) for future in futures] == [1, 2, 3]
+    assert len(batches) == 1
+
+    # Or once the window closes
+    batcher = CallBatcher(send_batch, window_ms=50, max_batch=100)
+    futures = [batcher.submit((i, 1), {}) for i in range(2)]
+    assert [future.result(timeout=5) for future in futures] == [1, 2]
+    assert len(batches) == 2 and len(batches[1]) == 2
+
+    # A burst of full batches is sent from a bounded pool of threads
+    release = threading.Event()
+
+    def slow_send_batch(calls):
+        release.wait(timeout=5)
+        return send_batch(calls)
+
+    batcher = CallBatcher(slow_send_batch, window_ms=60_000, max_batch=1)
+    futures = [batcher.submit((i,), {}) for i in range(10)]
+    senders = [t for t in threading.enumerate() if t.name.startswith("rh-batch")]
+    assert len(senders) <= CallBatcher.MAX_CONCURRENT_BATCHES
+    release.set()
+    assert [future.result(timeout=5) for future in futures] == list(range(10))
+
+
+@pytest.mark.localtest
+def test_call_batcher_errors():
+    from runhouse.rns.call_batcher import CallBatcher
+
+    # A failing call only fails its own future, and calls without an outcome aren't left waiting
+    batcher = CallBatcher(
+        lambda calls: [(1, None, None), (None, TypeError("bad arg"), "traceback")],
+        window_ms=60_000,
+        max_batch=3,
+    )
+    futures = [batcher.submit((), {}) for _ in range(3)]
+    assert futures[0].result(timeout=5) == 1
+    with pytest.raises(TypeError):
+        futures[1].result(timeout=5)
+    with pytest.raises(RuntimeError):
+        futures[2].result(timeout=5)
+
+    def send_batch(calls):
+        raise ConnectionError("cluster unreachable")
+
+    batcher = CallBatcher(send_batch, window_ms=60_000, max_batch=2)
+    futures = [batcher.submit((), {}) for _ in range(2)]
+    assert all(
+        isinstance(future.exception(timeout=5), ConnectionError) for future in futures
+    )
+
+
+@pytest.mark.clustertest
+def test_run_key_args(cpu_cluster):
+    re_fn = rh.function(summer, system=cpu_cluster)
+    run_key = re_fn.remote(1, 2)
+    # Run keys passed as args are swapped for their results on the cluster
+    assert re_fn(run_key, b=3) == 6
+    assert re_fn(1, b=run_key) == 4
+    # Strings which aren't keys are passed through as is
+    assert re_fn("a", b="b") == "ab"
+
+
 @pytest.mark.clustertest
 def test_function_git_fn(cpu_cluster):
     remote_parse = rh.function(
@@ -204,6 +380,82 @@ def test_list_keys(cpu_cluster):
     assert set([pid_ref1, pid_ref2]).issubset(current_jobs)
 
 
+def sleep_and_touch(path, secs):
+    import time
+    from pathlib import Path
+
+    time.sleep(secs)
+    Path(path).expanduser().touch()
+
+
+def return_timeout(timeout=None):
+    return timeout
+
+
+@pytest.mark.clustertest
+def test_call_timeout(cpu_cluster):
+    import time
+
+    sleep_fn = rh.function(sleep_and_touch, system=cpu_cluster)
+    with pytest.raises(TimeoutError):
+        sleep_fn("~/timed_out_call", secs=5, call_timeout=1)
+    with pytest.raises(TimeoutError):
+        sleep_fn.map(["~/timed_out_map_0", "~/timed_out_map_1"], secs=5, call_timeout=1)
+    # The function's own timeout argument is passed through to it
+    assert rh.function(return_timeout, system=cpu_cluster)(timeout=3) == 3
+
+    # The Ray tasks were cancelled, so they never got to the end
+    time.sleep(6)
+    res = cpu_cluster.run(["ls ~ | grep timed_out || true"])
+    assert "timed_out" not in res[0][1]
+
+
+def describe_arg(arg):
+    return type(arg).__name__, str(arg)[:100]
+
+
+@pytest.mark.clustertest
+def test_bulk_args(cpu_cluster, tmp_path):
+    import time
+
+    import numpy as np
+
+    rh.configs.defaults_cache["bulk_arg_threshold"] = 1024 * 1024
+    try:
+        cpu_cluster.disconnect()
+        cpu_cluster.clear_bulk_args()
+        describe_fn = rh.function(describe_arg, system=cpu_cluster)
+
+        # Large args are uploaded over SFTP, and loaded on the cluster as memory-mapped arrays or paths
+        arr = np.ones((1024, 1024))
+        assert describe_fn(arr)[0] == "memmap"
+        local_file = tmp_path / "data.bin"
+        local_file.write_bytes(b"0" * 2 * 1024 * 1024)
+        _, path = describe_fn(local_file)
+        assert path.endswith("/data.bin") and path != str(local_file)
+
+        # Uploaded args aren't sent again, even from a new connection
+        cpu_cluster.disconnect()
+        start = time.time()
+        assert describe_fn(arr)[0] == "memmap"
+        assert time.time() - start < 5
+    finally:
+        rh.configs.defaults_cache.pop("bulk_arg_threshold", None)
+        cpu_cluster.disconnect()
+
+
+@pytest.mark.localtest
+def test_bulk_args_unknown_host(tmp_path, monkeypatch):
+    from runhouse.servers.grpc.bulk_args import BulkArgUploader
+
+    # No known_hosts, so the host key isn't trusted and args are sent in the message instead
+    monkeypatch.setenv("HOME", str(tmp_path))
+    uploader = BulkArgUploader("10.0.0.1", "ubuntu", "~/.ssh/id_rsa", threshold=10)
+    payload = b"0" * 100
+    assert uploader.swap((payload,)) == (payload,)
+    assert uploader._disabled and uploader._ssh is None
+
+
 @pytest.mark.clustertest
 def test_cancel_jobs(cpu_cluster):
     pid_fn = rh.function(getpid, system=cpu_cluster)
@@ -438,6 +690,17 @@ def test_nested_same_cluster(cpu_cluster):
     assert res == 6
 
 
+@pytest.mark.clustertest
+def test_nested_remote_same_cluster(cpu_cluster):
+    summer_cpu = rh.function(fn=summer, system=cpu_cluster)
+    call_function_cpu = rh.function(fn=call_function_remote, system=cpu_cluster)
+
+    res, host = call_function_cpu(summer_cpu, a=1, b=5)
+    assert res == 6
+    # Connected to the server over its Unix socket rather than an SSH tunnel
+    assert host.startswith("unix://")
+
+
 # test that deprecated arguments are still backwards compatible for now
 @pytest.mark.clustertest
 def test_reqs_backwards_compatible(cpu_cluster):
@@ -1,4 +1,5 @@
 import logging
+import os
 import time
 import unittest
 
@@ -51,6 +52,156 @@ def test_put_and_get_on_cluster(cpu_cluster):
     assert all(a == b for (a, b) in zip(ret, test_list))
 
 
+@pytest.mark.clustertest
+def test_put_and_get_chunked_on_cluster(cpu_cluster):
+    from runhouse.servers.grpc.unary_client import UnaryClient
+
+    # Spans several chunks, with a partial chunk at the end
+    payload = os.urandom(3 * UnaryClient.CHUNK_SIZE + 7)
+    cpu_cluster.put("my_large_bytes", payload)
+    ret = cpu_cluster.get("my_large_bytes")
+    assert ret == payload
+    cpu_cluster.clear_pins(["my_large_bytes"])
+
+
+@pytest.mark.clustertest
+def test_put_and_get_compressed_on_cluster(cpu_cluster):
+    # Compresses well, so is sent compressed in both directions
+    lines = [f"line {i}\n" for i in range(1_000_000)]
+    cpu_cluster.put("my_lines", lines)
+    assert cpu_cluster.get("my_lines") == lines
+    cpu_cluster.clear_pins(["my_lines"])
+
+
+@pytest.mark.localtest
+def test_compress_and_decompress():
+    from runhouse.servers.grpc.serialization import (
+        available_codecs,
+        compress,
+        COMPRESSION_THRESHOLD,
+        decompress,
+        resolve_codec,
+    )
+
+    assert "gzip" in available_codecs()
+    data = b"".join(f"line {i}\n".encode() for i in range(COMPRESSION_THRESHOLD))
+    for codec in available_codecs():
+        compressed, used = compress(data, codec)
+        assert used == codec and len(compressed) < len(data)
+        assert decompress(compressed, used) == data
+
+    # Small payloads and ones which don't compress are sent as they are
+    assert compress(b"small", "gzip") == (b"small", "")
+    random_bytes = os.urandom(COMPRESSION_THRESHOLD)
+    assert compress(random_bytes, "gzip") == (random_bytes, "")
+    assert decompress(random_bytes, "") == random_bytes
+
+    assert resolve_codec("none") is None
+    with pytest.raises(ValueError):
+        resolve_codec("not_a_codec")
+
+
+@pytest.mark.localtest
+def test_serialize_to_chunks():
+    import numpy as np
+
+    from runhouse.servers.grpc.serialization import (
+        deserialize_from_chunks,
+        deserialize_with_buffers,
+        serialize_to_chunks,
+        serialize_with_buffers,
+    )
+
+    obj = {"payload": os.urandom(10_000), "list": list(range(100))}
+    chunks = list(serialize_to_chunks(obj, chunk_size=1024))
+    assert len(chunks) > 1 and all(len(chunk) <= 1024 for chunk in chunks)
+    assert deserialize_from_chunks(chunks, chunk_size=1024) == obj
+
+    # Large arrays are sent out-of-band rather than copied into the pickle stream
+    arr = np.arange(1_000_000)
+    data, buffers = serialize_with_buffers({"arr": arr, "small": np.arange(10)})
+    assert len(buffers) == 1 and len(data) < arr.nbytes
+    read_back = deserialize_with_buffers(data, buffers)
+    assert (read_back["arr"] == arr).all()
+    assert (read_back["small"] == np.arange(10)).all()
+
+
+@pytest.mark.clustertest
+def test_concurrent_gets_on_cluster(cpu_cluster):
+    from concurrent.futures import ThreadPoolExecutor
+
+    # Concurrent gets of the same key share one serialized copy on the server
+    payload = os.urandom(100 * 1024 * 1024)
+    cpu_cluster.put("my_shared_bytes", payload)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(cpu_cluster.get, ["my_shared_bytes"] * 4))
+    assert all(res == payload for res in results)
+
+    # Putting the key again replaces the cached copy
+    cpu_cluster.put("my_shared_bytes", b"new")
+    assert cpu_cluster.get("my_shared_bytes") == b"new"
+    cpu_cluster.clear_pins(["my_shared_bytes"])
+
+
+@pytest.mark.localtest
+@pytest.mark.parametrize("use_inotify", [True, False])
+def test_log_tailer(tmp_path, monkeypatch, use_inotify):
+    import asyncio
+    import sys
+
+    from runhouse.servers.grpc import log_tailer
+
+    if not use_inotify:
+        # As on platforms without inotify
+        monkeypatch.setattr(log_tailer._Inotify, "create", lambda loop, callback: None)
+    elif not sys.platform.startswith("linux"):
+        pytest.skip("inotify is only available on Linux")
+
+    log_file = tmp_path / "worker.out"
+    log_file.write_text("")
+    new_file_dir = tmp_path / "logs"
+    new_file_dir.mkdir()
+
+    def append_to_log():
+        with open(log_file, "a") as f:
+            f.write("hello\n")
+
+    async def woken(event, write):
+        # Give polling a chance to record how the paths look before they change
+        await asyncio.sleep(2 * log_tailer.LogTailer.POLL_INTERVAL)
+        event.clear()
+        write()
+        await asyncio.wait_for(event.wait(), timeout=5)
+
+    async def run():
+        tailer = log_tailer.LogTailer()
+        assert (tailer._inotify is not None) == use_inotify
+
+        file_event = tailer.subscribe()
+        assert tailer.watch(file_event, [log_file])
+        assert not tailer.watch(file_event, [log_file])
+        await woken(file_event, append_to_log)
+
+        # Watching a directory wakes the subscriber when files are created in it
+        dir_event = tailer.subscribe()
+        tailer.watch(dir_event, [new_file_dir])
+        await woken(dir_event, lambda: (new_file_dir / "new.out").write_text("hi"))
+
+        tailer.unsubscribe(file_event)
+        assert not tailer.watch(dir_event, [new_file_dir])
+
+        # Closing wakes the remaining subscribers, and closes the inotify fd
+        inotify_fd = tailer._inotify.fd if use_inotify else None
+        dir_event.clear()
+        tailer.close()
+        assert dir_event.is_set() and not tailer._interests
+        if use_inotify:
+            with pytest.raises(OSError):
+                os.fstat(inotify_fd)
+
+    asyncio.run(run())
+
+
 @pytest.mark.clustertest
 def test_stream_logs(cpu_cluster):
     print_fn = rh.function(fn=do_printing_and_logging, system=cpu_cluster)
@@ -59,6 +210,28 @@ def test_stream_logs(cpu_cluster):
     assert res == list(range(50))
 
 
+@pytest.mark.clustertest
+def test_stream_logs_resume(cpu_cluster):
+    print_fn = rh.function(fn=do_printing_and_logging, system=cpu_cluster)
+    run_key = print_fn.remote()
+
+    stdout, offsets = b"", {}
+    for chunk in cpu_cluster.stream_logs(run_key):
+        if chunk.stream == "stdout":
+            stdout += chunk.data
+        offsets[chunk.file] = chunk.offset
+    assert b"Hello from the cluster! 5" in stdout
+
+    # Nothing new to send from where we left off, and everything from the start
+    assert list(cpu_cluster.stream_logs(run_key, offsets=offsets)) == []
+    stdout_again = b"".join(
+        chunk.data
+        for chunk in cpu_cluster.stream_logs(run_key, follow=False)
+        if chunk.stream == "stdout"
+    )
+    assert stdout_again == stdout
+
+
 @pytest.mark.clustertest
 def test_multiprocessing_streaming(cpu_cluster):
     re_fn = rh.function(